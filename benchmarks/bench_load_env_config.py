@@ -0,0 +1,95 @@
+"""
+Benchmark LoadEnvConfigStrategy against the previous FlatDict based overlay,
+for growing configuration and environment sizes.
+
+Run it from the repository root:
+
+    $ PYTHONPATH=. python benchmarks/bench_load_env_config.py
+"""
+
+
+from __future__ import print_function
+
+from copy import deepcopy
+from os import environ
+from timeit import repeat
+
+from stormpath_config.helpers import _extend_dict
+from stormpath_config.strategies import LoadEnvConfigStrategy
+
+try:
+    from flatdict import FlatDict
+except ImportError:
+    FlatDict = None
+
+
+def flatdict_process(prefix, aliases, config):
+    """The FlatDict based overlay LoadEnvConfigStrategy used to implement."""
+    config = FlatDict(config, delimiter='_')
+    environ_config = {}
+
+    for key in config.keys():
+        env_key = '_'.join([prefix, key.upper()])
+        env_key = aliases.get(env_key, env_key)
+        value = environ.get(env_key)
+
+        if value:
+            if isinstance(config[key], int):
+                value = int(value)
+
+            environ_config[key] = value
+
+    _extend_dict(config, environ_config)
+
+    return config.as_dict()
+
+
+def make_config(size):
+    """Return a configuration with ``size`` leaves, in sections of 10."""
+    return {
+        'section%d' % i: dict(('key%d' % j, j) for j in range(10))
+        for i in range(size // 10)
+    }
+
+
+def make_environ(size):
+    """Return ``size`` unrelated and 5 prefixed environment variables."""
+    env = dict(('UNRELATED_VARIABLE_%d' % i, 'value') for i in range(size))
+    env.update(('BENCH_SECTION%d_KEY1' % i, '42') for i in range(5))
+
+    return env
+
+
+def bench(func, config, number=200):
+    configs = [deepcopy(config) for _ in range(number)]
+    it = iter(configs * 3)
+
+    return min(repeat(lambda: func(next(it)), number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    print('%-10s %-10s %15s %15s' % ('config', 'environ', 'index (us)', 'flatdict (us)'))
+
+    for config_size in (50, 500, 5000):
+        for environ_size in (10, 1000):
+            saved = dict(environ)
+            environ.update(make_environ(environ_size))
+
+            try:
+                config = make_config(config_size)
+                strategy = LoadEnvConfigStrategy('BENCH')
+                indexed = bench(strategy.process, config)
+
+                if FlatDict is not None:
+                    flat = '%15.1f' % bench(lambda c: flatdict_process('BENCH', {}, c), config)
+                else:
+                    flat = '%15s' % 'n/a'
+            finally:
+                environ.clear()
+                environ.update(saved)
+
+            print('%-10d %-10d %15.1f %s' % (config_size, environ_size, indexed, flat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark the merge engine against the previous recursive _extend_dict
+helper, for deep and wide configurations.
+
+Run it from the repository root:
+
+    $ PYTHONPATH=. python benchmarks/bench_merge.py
+"""
+
+
+from __future__ import print_function
+
+from copy import deepcopy
+from timeit import repeat
+
+from stormpath_config.merge import merge, merge_into
+
+
+def extend_dict(original, extend_with):
+    """The recursive, in place helper the merge engine replaces."""
+    for key, value in extend_with.items():
+        if key in original and isinstance(value, dict):
+            extend_dict(original[key], value)
+        else:
+            original[key] = value
+
+    return original
+
+
+def make_wide(width):
+    """Return a configuration with ``width`` sections of 10 values."""
+    return dict(('section%d' % i, dict(('key%d' % j, j) for j in range(10))) for i in range(width))
+
+
+def make_deep(depth):
+    """Return a configuration nested ``depth`` levels deep, with 10 values per level."""
+    config = {}
+    level = config
+    for i in range(depth):
+        level.update(('key%d' % j, j) for j in range(10))
+        level = level.setdefault('level%d' % i, {})
+
+    return config
+
+
+def make_overlay(config, every):
+    """Return an overlay that changes one value in every ``every``-th section."""
+    overlay = {}
+    for i, (key, value) in enumerate(sorted(config.items())):
+        if isinstance(value, dict):
+            if i % every == 0:
+                overlay[key] = make_overlay(value, every)
+        elif i == 0:
+            overlay[key] = -1
+
+    return overlay
+
+
+def bench(func, number=100, config=None):
+    """
+    Return the best time of ``func()``, in microseconds.  If ``config`` is
+    given, ``func`` is called with a fresh copy of it every time, made
+    outside of the timed region, as it may modify it.
+    """
+    if config is None:
+        return min(repeat(func, number=number, repeat=3)) / number * 1e6
+
+    copies = iter([deepcopy(config) for _ in range(number * 3)])
+
+    return min(repeat(lambda: func(next(copies)), number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    cases = [
+        ('wide 100', make_wide(100)),
+        ('wide 1000', make_wide(1000)),
+        ('deep 10', make_deep(10)),
+        ('deep 100', make_deep(100)),
+    ]
+
+    print('%-10s %8s %20s %20s %14s %14s' % (
+        'config', 'layers', 'deepcopy+extend (us)', 'merge (cow) (us)', 'extend (us)', 'merge_into (us)'))
+
+    for name, base in cases:
+        for layers in (1, 4):
+            overlays = [make_overlay(base, every) for every in range(2, 2 + layers)]
+
+            def copy_and_extend():
+                config = deepcopy(base)
+                for overlay in overlays:
+                    extend_dict(config, overlay)
+
+            def extend(config):
+                for overlay in overlays:
+                    extend_dict(config, overlay)
+
+            print('%-10s %8d %20.1f %20.1f %14.1f %14.1f' % (
+                name, layers,
+                bench(copy_and_extend, number=10),
+                bench(lambda: merge(base, *overlays)),
+                bench(extend, config=base),
+                bench(lambda config: merge_into(config, *overlays), config=base),
+            ))
+
+
+if __name__ == '__main__':
+    main()
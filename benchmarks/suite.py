@@ -0,0 +1,657 @@
+"""
+A reproducible, offline benchmark suite for the configuration pipeline.
+
+Synthetic configurations of increasing depth and width, environments of
+increasing size, and a fake Stormpath client (with a configurable latency
+per request and number of account store mappings) are generated, and the
+following are measured:
+
+* ``ConfigLoader.load()`` of a complete pipeline,
+* ``_extend_dict``,
+* ``LoadEnvConfigStrategy``,
+* ``LoadFileConfigStrategy`` (YAML and JSON),
+* ``EnrichClientFromRemoteConfigStrategy`` and
+  ``EnrichIntegrationFromRemoteConfigStrategy``,
+* loading many tenants with a ``ConfigLoader`` each, and with a
+  ``MultiTenantConfigLoader`` (along with the memory their configurations
+  hold).
+
+Run it from the repository root, and save the results:
+
+    $ PYTHONPATH=. python benchmarks/suite.py --output baseline.json
+
+Then compare a later run against them; the exit status is 1 if a benchmark
+got slower by more than the threshold:
+
+    $ PYTHONPATH=. python benchmarks/suite.py --compare baseline.json
+
+Use ``--quick`` for a smaller, faster set of cases, and ``--filter`` to only
+run the benchmarks whose name contains a string.
+"""
+
+
+from __future__ import division, print_function
+
+from argparse import ArgumentParser
+from copy import deepcopy
+from datetime import datetime, timedelta
+from json import dump, dumps, load
+from os import environ, remove
+from os.path import join
+from platform import platform, python_implementation, python_version
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import sleep
+from timeit import default_timer
+
+import yaml
+
+# tracemalloc is only available on Python 3.4+.
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from stormpath_config.helpers import _DEFAULT_PAGE_SIZE, _extend_dict
+from stormpath_config.loader import ConfigLoader, MultiTenantConfigLoader
+from stormpath_config.strategies import EnrichClientFromRemoteConfigStrategy, \
+    EnrichIntegrationFromRemoteConfigStrategy, \
+    ExtendConfigStrategy, \
+    LoadEnvConfigStrategy, \
+    LoadFileConfigStrategy, \
+    ValidateClientConfigStrategy
+
+
+RESULTS_VERSION = 1
+
+PREFIX = 'BENCH'
+APPLICATION_HREF = 'https://api.stormpath.com/v1/applications/bench'
+DEFAULT_CONFIG = 'tests/assets/default_config.yml'
+
+
+# Synthetic configurations.
+
+def make_config(depth, width):
+    """
+    Return a configuration nested ``depth`` levels deep, with ``width``
+    values and ``width`` sections at every level (about ``width ** depth``
+    values in total).
+    """
+    config = {}
+    for i in range(width):
+        kind = i % 4
+        if kind == 0:
+            config['key%d' % i] = i
+        elif kind == 1:
+            config['key%d' % i] = bool(i % 8 == 1)
+        elif kind == 2:
+            config['key%d' % i] = 'value%d' % i
+        else:
+            config['key%d' % i] = ['item%d' % j for j in range(3)]
+
+    if depth > 1:
+        for i in range(width):
+            config['section%d' % i] = make_config(depth - 1, width)
+
+    return config
+
+
+def _leaves(config, path=()):
+    for key, value in sorted(config.items()):
+        if isinstance(value, dict):
+            for leaf in _leaves(value, path + (key,)):
+                yield leaf
+        else:
+            yield path + (key,), value
+
+
+def make_environ(config, size, overrides=0.1):
+    """
+    Return ``size`` environment variables, a fraction ``overrides`` of which
+    override values of the configuration, the rest being unrelated.
+    """
+    env = {}
+
+    for path, value in _leaves(config):
+        if len(env) >= size * overrides:
+            break
+
+        if isinstance(value, bool):
+            value = 'true'
+        elif isinstance(value, int):
+            value = '42'
+        elif isinstance(value, list):
+            continue
+
+        env['_'.join((PREFIX,) + path).upper()] = str(value)
+
+    for i in range(size - len(env)):
+        env['UNRELATED_VARIABLE_%d' % i] = 'value'
+
+    return env
+
+
+class _Environ(object):
+    """Temporarily replace the process environment."""
+    def __init__(self, env):
+        self.env = env
+
+    def __enter__(self):
+        self.saved = dict(environ)
+        environ.clear()
+        environ.update(self.env)
+
+    def __exit__(self, *exc_info):
+        environ.clear()
+        environ.update(self.saved)
+
+
+# A fake Stormpath client.  Every remote request sleeps for ``latency``
+# seconds, and is counted.  Unlike the Stormpath SDK, linked resources aren't
+# cached, so every access is a request.
+
+class FakeAPI(object):
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+
+    def request(self):
+        self.requests += 1
+        if self.latency:
+            sleep(self.latency)
+
+
+class _Resource(dict):
+    """An expanded resource: a dictionary whose items are also attributes."""
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class _Collection(object):
+    """A paged collection of resources."""
+    def __init__(self, api, items):
+        self.api = api
+        self.items = items
+
+    def _pages(self, items, limit):
+        for offset in range(0, max(len(items), 1), limit):
+            self.api.request()
+            for item in items[offset:offset + limit]:
+                yield item
+
+    def __iter__(self):
+        return self._pages(self.items, _DEFAULT_PAGE_SIZE)
+
+    def get(self, href):
+        self.api.request()
+        for item in self.items:
+            if item.href == href:
+                return item
+
+        error = Exception('The resource does not exist.')
+        error.status = 404
+        raise error
+
+    def query(self, name=None, limit=_DEFAULT_PAGE_SIZE, expand=None, **params):
+        if name is not None:
+            self.api.request()
+            return [item for item in self.items if item.name == name]
+
+        if expand is not None:
+            return (item.expand(expand) for item in self._pages(self.items, limit))
+
+        return self._pages(self.items, limit)
+
+
+class _Pages(object):
+    """A paged collection of resources that can't be queried."""
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __iter__(self):
+        return iter(self.collection)
+
+
+def _timestamp():
+    return datetime(2016, 1, 1)
+
+
+def _provider(href, provider_id):
+    return _Resource(
+        href=href + '/provider', provider_id=provider_id, client_id='id', client_secret='secret',
+        redirect_uri='https://example.com/callback', created_at=_timestamp(), modified_at=_timestamp())
+
+
+class _PasswordPolicy(object):
+    def __init__(self, api):
+        self.api = api
+        self.reset_email_status = 'ENABLED'
+
+    @property
+    def strength(self):
+        self.api.request()
+        return _Resource(href='strength', min_length=8, max_length=100, min_lower_case=1, min_upper_case=1,
+                         min_numeric=1, min_symbol=0, min_diacritic=0)
+
+
+class FakeDirectory(object):
+    def __init__(self, api, href, provider_id):
+        self.api = api
+        self.href = href
+        self._provider = _provider(href, provider_id)
+
+    @property
+    def provider(self):
+        self.api.request()
+        return self._provider
+
+    @property
+    def password_policy(self):
+        self.api.request()
+        return _PasswordPolicy(self.api)
+
+    @property
+    def account_creation_policy(self):
+        self.api.request()
+        return _Resource(verification_email_status='DISABLED')
+
+
+class _ExpandedAccountStoreMapping(object):
+    """An account store mapping fetched with its account store expanded."""
+    def __init__(self, mapping):
+        self.account_store = mapping._account_store
+
+
+class FakeAccountStoreMapping(object):
+    def __init__(self, api, account_store):
+        self.api = api
+        self._account_store = account_store
+
+    @property
+    def account_store(self):
+        self.api.request()
+        return self._account_store
+
+    def expand(self, expand):
+        return _ExpandedAccountStoreMapping(self)
+
+
+class FakeApplication(object):
+    def __init__(self, api, name, href, directories, query=True):
+        self.api = api
+        self.name = name
+        self.href = href
+        self._mappings = [FakeAccountStoreMapping(api, directory) for directory in directories]
+        self.account_store_mappings = _Collection(api, self._mappings)
+        if not query:
+            self.account_store_mappings = _Pages(self.account_store_mappings)
+
+    @property
+    def oauth_policy(self):
+        self.api.request()
+        return _Resource(href=self.href + '/oAuthPolicy', access_token_ttl=timedelta(hours=1),
+                         refresh_token_ttl=timedelta(days=60), created_at=_timestamp(),
+                         modified_at=_timestamp())
+
+    @property
+    def default_account_store_mapping(self):
+        self.api.request()
+        return self._mappings[0]
+
+
+class FakeClient(object):
+    """
+    A fake Stormpath client, with a single application mapped to
+    ``mappings`` directories, ``social`` of which are social directories.
+
+    :param float latency: The number of seconds every request takes.
+    :param int mappings: The number of account store mappings.
+    :param int social: The number of social directories.
+    :param bool query: Whether account store mappings can be queried, with
+        their account stores expanded.
+    """
+    def __init__(self, latency=0.0, mappings=10, social=4, query=True):
+        self.api = FakeAPI(latency)
+
+        provider_ids = ['google', 'facebook', 'github', 'linkedin']
+        directories = [
+            FakeDirectory(self.api, 'https://api.stormpath.com/v1/directories/%d' % i,
+                          provider_ids[i % len(provider_ids)] if i < social else 'stormpath')
+            for i in range(mappings)
+        ]
+
+        self.applications = _Collection(self.api, [
+            FakeApplication(self.api, 'Stormpath', 'https://api.stormpath.com/v1/applications/stormpath', []),
+            FakeApplication(self.api, 'Bench', APPLICATION_HREF, directories, query),
+        ])
+
+
+# Measurements.
+
+def measure(func, setup=None, number=10, repeat=3):
+    """
+    Time ``func(setup())``, calling ``setup`` outside of the timed region.
+
+    :returns: A dictionary with the ``min``, ``median`` and ``mean`` durations
+        of a single call, in seconds.
+    """
+    timings = []
+    for _ in range(repeat * number):
+        arg = setup() if setup is not None else None
+        start = default_timer()
+        func(arg)
+        timings.append(default_timer() - start)
+
+    timings.sort()
+
+    return {
+        'min': timings[0],
+        'median': timings[len(timings) // 2],
+        'mean': sum(timings) / len(timings),
+        'number': len(timings),
+    }
+
+
+def _name(benchmark, params):
+    return '%s[%s]' % (benchmark, ','.join('%s=%s' % item for item in sorted(params.items())))
+
+
+def bench_extend_dict(quick):
+    for depth, width in ([(2, 10), (3, 10)] if quick else [(2, 10), (3, 10), (4, 10), (2, 100), (3, 30)]):
+        base = make_config(depth, width)
+        overlay = make_config(depth, width // 2)
+
+        yield {'depth': depth, 'width': width}, measure(
+            lambda config: _extend_dict(config, overlay), lambda: deepcopy(base), number=5)
+
+
+def bench_load_env(quick):
+    shapes = [(3, 10)] if quick else [(3, 10), (4, 10)]
+    sizes = (10, 1000) if quick else (10, 100, 1000, 10000)
+
+    for depth, width in shapes:
+        base = make_config(depth, width)
+
+        for size in sizes:
+            with _Environ(make_environ(base, size)):
+                strategy = LoadEnvConfigStrategy(prefix=PREFIX)
+                yield {'depth': depth, 'width': width, 'environ': size}, measure(
+                    strategy.process, lambda: deepcopy(base), number=5)
+
+
+def bench_load_file(quick):
+    directory = mkdtemp()
+    try:
+        for depth, width in ([(3, 10)] if quick else [(2, 10), (3, 10), (4, 10)]):
+            config = make_config(depth, width)
+
+            for extension in ('yml', 'json'):
+                path = join(directory, 'stormpath.%s' % extension)
+                with open(path, 'w') as f:
+                    if extension == 'json':
+                        f.write(dumps(config))
+                    else:
+                        f.write(yaml.safe_dump(config, default_flow_style=False))
+
+                strategy = LoadFileConfigStrategy(path)
+                yield {'depth': depth, 'width': width, 'format': extension}, measure(
+                    strategy.process, dict, number=3)
+
+                remove(path)
+    finally:
+        rmtree(directory)
+
+
+def _remote_config():
+    return {
+        'client': {'apiKey': {'id': 'id', 'secret': 'secret'}},
+        'application': {'href': APPLICATION_HREF, 'name': None},
+    }
+
+
+def _remote_cases(quick):
+    latencies = (0.0, 0.001)
+    mappings = (10,) if quick else (10, 100, 1000)
+
+    for latency in latencies:
+        for count in mappings:
+            # Every remote request costs latency, so slow cases are run less.
+            yield latency, count, 1 if latency and count > 100 else 3
+
+
+def bench_enrich_client(quick):
+    for latency, mappings, number in _remote_cases(quick):
+        client = FakeClient(latency, mappings)
+        strategy = EnrichClientFromRemoteConfigStrategy(lambda config: client)
+
+        result = measure(strategy.process, _remote_config, number=number)
+        result['requests'] = client.api.requests // result['number']
+
+        yield {'latency': latency, 'mappings': mappings}, result
+
+
+def bench_enrich_integration(quick):
+    for latency, mappings, number in _remote_cases(quick):
+        for query in (True, False):
+            client = FakeClient(latency, mappings, query=query)
+            strategy = EnrichIntegrationFromRemoteConfigStrategy(lambda config: client)
+
+            result = measure(strategy.process, _remote_config, number=number)
+            result['requests'] = client.api.requests // result['number']
+
+            yield {'latency': latency, 'mappings': mappings, 'query': query}, result
+
+
+def bench_loader(quick):
+    directory = mkdtemp()
+    try:
+        for depth, width in ([(3, 10)] if quick else [(2, 10), (3, 10), (4, 10)]):
+            config = make_config(depth, width)
+            path = join(directory, 'stormpath.yml')
+            with open(path, 'w') as f:
+                f.write(yaml.safe_dump(config, default_flow_style=False))
+
+            for latency in (0.0, 0.001):
+                client = FakeClient(latency, mappings=10)
+
+                def factory(config):
+                    return client
+
+                loader = ConfigLoader(
+                    [
+                        LoadFileConfigStrategy(DEFAULT_CONFIG, must_exist=True),
+                        LoadFileConfigStrategy(path),
+                        LoadEnvConfigStrategy(prefix=PREFIX),
+                        ExtendConfigStrategy(_remote_config()),
+                    ],
+                    [
+                        EnrichClientFromRemoteConfigStrategy(factory),
+                        EnrichIntegrationFromRemoteConfigStrategy(factory),
+                    ],
+                    [ValidateClientConfigStrategy()],
+                    schedule_post_processing=True,
+                )
+
+                with _Environ(make_environ(config, 100)):
+                    yield {'depth': depth, 'width': width, 'latency': latency}, measure(
+                        lambda _: loader.load(), number=3)
+    finally:
+        rmtree(directory)
+
+
+def _tenant_strategies(i):
+    return [ExtendConfigStrategy({
+        'application': {'name': 'Tenant %d' % i, 'href': '%s/%d' % (APPLICATION_HREF, i)},
+        'client': {'apiKey': {'id': 'id%d' % i, 'secret': 'secret%d' % i}},
+    })]
+
+
+def _load_tenants_separately(shared, count):
+    configs = []
+    for i in range(count):
+        loader = ConfigLoader(shared() + _tenant_strategies(i), validation_strategies=[ValidateClientConfigStrategy()])
+        configs.append(loader.load())
+
+    return configs
+
+
+def _load_tenants_shared(shared, count):
+    loader = MultiTenantConfigLoader(shared(), validation_strategies=[ValidateClientConfigStrategy()])
+    for i in range(count):
+        loader.add_tenant(i, _tenant_strategies(i))
+
+    return [loader.load(i) for i in range(count)]
+
+
+def _retained_memory(func):
+    """Return the number of bytes allocated by ``func`` and still held by its result."""
+    if tracemalloc is None:
+        return None
+
+    tracemalloc.start()
+    try:
+        result = func()
+        memory = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    del result
+
+    return memory
+
+
+def bench_multi_tenant(quick):
+    directory = mkdtemp()
+    try:
+        path = join(directory, 'stormpath.yml')
+        with open(path, 'w') as f:
+            f.write(yaml.safe_dump(make_config(3, 10), default_flow_style=False))
+
+        def shared():
+            return [
+                LoadFileConfigStrategy(DEFAULT_CONFIG, must_exist=True),
+                LoadFileConfigStrategy(path),
+                LoadEnvConfigStrategy(prefix=PREFIX),
+            ]
+
+        with _Environ({}):
+            for count in ((10,) if quick else (10, 100, 1000)):
+                for mode, func in (('separate', _load_tenants_separately), ('shared', _load_tenants_shared)):
+                    # Separate loaders parse every file for every tenant, so
+                    # they're only measured for fewer tenants.
+                    if mode == 'separate' and count > 100:
+                        continue
+
+                    result = measure(lambda _: func(shared, count), number=1)
+                    result['memory'] = _retained_memory(lambda: func(shared, count))
+
+                    yield {'tenants': count, 'mode': mode}, result
+    finally:
+        rmtree(directory)
+
+
+BENCHMARKS = [
+    ('extend_dict', bench_extend_dict),
+    ('load_env', bench_load_env),
+    ('load_file', bench_load_file),
+    ('enrich_client', bench_enrich_client),
+    ('enrich_integration', bench_enrich_integration),
+    ('loader', bench_loader),
+    ('multi_tenant', bench_multi_tenant),
+]
+
+
+def run(quick=False, filter=None):
+    """
+    Run the benchmarks.
+
+    :param bool quick: Whether to only run a smaller set of cases.
+    :param str filter: Only run the benchmarks whose name contains it.
+    :rtype: dict
+    :returns: The results, keyed by benchmark name and parameters.
+    """
+    results = {}
+
+    for benchmark, func in BENCHMARKS:
+        if filter and filter not in benchmark:
+            continue
+
+        for params, result in func(quick):
+            name = _name(benchmark, params)
+            result['params'] = params
+            results[name] = result
+            print('%-70s %12.1f us' % (name, result['median'] * 1e6))
+
+    return {
+        'version': RESULTS_VERSION,
+        'python': '%s %s' % (python_implementation(), python_version()),
+        'platform': platform(),
+        'quick': quick,
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Print how the median duration of each benchmark changed.
+
+    :param dict baseline: The baseline results.
+    :param dict current: The current results.
+    :param float threshold: The relative slowdown above which a benchmark is
+        reported as a regression, e.g. 0.1 for 10%.
+    :rtype: list
+    :returns: The names of the regressed benchmarks.
+    """
+    regressions = []
+
+    print('%-70s %12s %12s %8s' % ('benchmark', 'baseline', 'current', 'ratio'))
+    for name in sorted(current['results']):
+        if name not in baseline['results']:
+            continue
+
+        before = baseline['results'][name]['median']
+        after = current['results'][name]['median']
+        ratio = after / before if before else float('inf')
+
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+
+        print('%-70s %9.1f us %9.1f us %7.2fx%s' % (name, before * 1e6, after * 1e6, ratio, flag))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = ArgumentParser(description='Benchmark the configuration pipeline.')
+    parser.add_argument('--output', help='Save the results to this JSON file.')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare the results to these saved results.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='The relative slowdown reported as a regression (default: 0.1).')
+    parser.add_argument('--quick', action='store_true', help='Only run a smaller set of cases.')
+    parser.add_argument('--filter', help='Only run the benchmarks whose name contains this string.')
+    args = parser.parse_args(argv)
+
+    results = run(args.quick, args.filter)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = load(f)
+
+        print()
+        if compare(baseline, results, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
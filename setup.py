@@ -36,7 +36,7 @@ setup(
     zip_safe = False,
     keywords = ['stormpath', 'configuration'],
     install_requires = [
-        'flatdict>=1.2.0',
+        'futures; python_version < "3.0"',
         'path.py==8.1.2',
         'pyjavaproperties==0.6',
         'pyyaml>=3.11',
@@ -65,6 +65,9 @@ setup(
         'Topic :: Software Development :: Libraries :: Python Modules',
         'Topic :: Software Development :: Libraries',
     ],
+    entry_points = {
+        'console_scripts': ['stormpath-config = stormpath_config.cli:main'],
+    },
     cmdclass = {'test': TestCommand},
     long_description = open(normpath(join(dirname(abspath(__file__)), 'README.rst'))).read(),
 )
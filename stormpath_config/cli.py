@@ -0,0 +1,247 @@
+"""The ``stormpath-config`` command line tool."""
+
+
+from __future__ import print_function
+
+from argparse import ArgumentParser
+from json import dumps
+from sys import stderr
+
+from .hooks import ProfilingHook, tracemalloc
+from .loader import ConfigLoader
+from .snapshot import compile_snapshot
+from .strategies import EnrichClientFromRemoteConfigStrategy, \
+    EnrichIntegrationFromRemoteConfigStrategy, \
+    LoadAPIKeyConfigStrategy, \
+    LoadAPIKeyFromConfigStrategy, \
+    LoadEnvConfigStrategy, \
+    LoadFileConfigStrategy, \
+    ValidateClientConfigStrategy
+
+
+# The configuration files searched by the Stormpath SDKs, in the order they're
+# loaded.
+SEARCH_PATH = (
+    '~/.stormpath/apiKey.properties',
+    '~/.stormpath/stormpath.json',
+    '~/.stormpath/stormpath.yaml',
+    'apiKey.properties',
+    'stormpath.yaml',
+    'stormpath.json',
+)
+
+# The environment variables the Stormpath SDKs read the API key from, instead
+# of the ones named after its configuration path (without the prefix).
+ENV_ALIASES = {
+    'CLIENT_APIKEY_ID': 'API_KEY_ID',
+    'CLIENT_APIKEY_SECRET': 'API_KEY_SECRET',
+    'CLIENT_APIKEY_FILE': 'API_KEY_FILE',
+}
+
+
+def _file_strategy(file_path):
+    """Return the load strategy for a configuration file, based on its extension."""
+    if file_path.endswith('.properties'):
+        return LoadAPIKeyConfigStrategy(file_path)
+
+    return LoadFileConfigStrategy(file_path)
+
+
+def _load_strategies(files, prefix):
+    """
+    Return the load strategies of the Stormpath SDKs: the given configuration
+    files, then the environment variables with the given prefix, including
+    the API key aliases.
+    """
+    aliases = dict(
+        ('%s_%s' % (prefix, name), '%s_%s' % (prefix, alias)) for name, alias in ENV_ALIASES.items())
+
+    return [_file_strategy(f) for f in files] + [LoadEnvConfigStrategy(prefix=prefix, aliases=aliases)]
+
+
+def snapshot(args):
+    """Compile configuration files into a snapshot."""
+    strategies = [_file_strategy(f) for f in args.files]
+
+    try:
+        compile_snapshot(args.output, strategies)
+    except Exception as e:
+        print('Unable to write snapshot "%s": %s' % (args.output, e), file=stderr)
+        return 1
+
+    print('Wrote snapshot of %d file(s) to "%s".' % (len(strategies), args.output))
+
+    return 0
+
+
+def _client_factory(config):
+    """Create a Stormpath client from the configuration."""
+    from stormpath.client import Client
+
+    return Client(
+        id=config['client']['apiKey']['id'],
+        secret=config['client']['apiKey']['secret'],
+        base_url=config['client'].get('baseUrl'))
+
+
+def _profile_loader(args):
+    """
+    Return the standard loader chain, for the given command line arguments.
+
+    Post-processing strategies run after all load strategies, as with the
+    default ``ConfigLoader``, unless ``--schedule`` is given.
+    """
+    files = args.files or list(SEARCH_PATH)
+    if args.defaults:
+        files.insert(0, args.defaults)
+
+    post_processing_strategies = [LoadAPIKeyFromConfigStrategy()]
+    if args.remote:
+        post_processing_strategies.extend([
+            EnrichClientFromRemoteConfigStrategy(client_factory=_client_factory),
+            EnrichIntegrationFromRemoteConfigStrategy(client_factory=_client_factory),
+        ])
+
+    return ConfigLoader(
+        _load_strategies(files, args.prefix),
+        post_processing_strategies,
+        [ValidateClientConfigStrategy()],
+        schedule_post_processing=args.schedule)
+
+
+def _format(value, scale, pattern):
+    if value is None:
+        return '-'
+
+    return pattern % (value / scale)
+
+
+def _print_profile(steps, totals):
+    row = '%-42s %-16s %10s %12s %12s %9s %8s'
+    print(row % ('strategy', 'phase', 'time (ms)', 'alloc (KiB)', 'peak (KiB)', 'requests', 'values'))
+
+    for step in steps:
+        print(row % (
+            step['strategy'],
+            step['phase'],
+            _format(step['duration'], 1e-3, '%.2f'),
+            _format(step['allocated'], 1024.0, '%.1f'),
+            _format(step['peak'], 1024.0, '%.1f'),
+            _format(step['requests'], 1, '%d'),
+            _format(step['size'], 1, '%d')))
+
+        if step['source']:
+            print('    %s' % step['source'])
+
+        if step['error']:
+            print('    error: %s' % step['error'])
+
+    print(row % (
+        'total', '',
+        _format(totals['duration'], 1e-3, '%.2f'),
+        _format(totals['allocated'], 1024.0, '%.1f'),
+        _format(totals['peak'], 1024.0, '%.1f'),
+        _format(totals['requests'], 1, '%d'),
+        _format(totals['size'], 1, '%d')))
+
+
+def profile(args):
+    """Load the configuration, and report the cost of every strategy."""
+    loader = _profile_loader(args)
+    profiler = loader.add_hook(ProfilingHook())
+
+    tracing = args.memory and tracemalloc is not None and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+
+    error = None
+    try:
+        loader.load()
+    except Exception as e:
+        error = str(e)
+    finally:
+        if tracing:
+            tracemalloc.stop()
+
+    steps = profiler.steps
+
+    def total(key, combine=sum):
+        values = [step[key] for step in steps if step[key] is not None]
+        return combine(values) if values else None
+
+    totals = {
+        'duration': total('duration'),
+        'allocated': total('allocated'),
+        'peak': total('peak', max),
+        'requests': total('requests'),
+        'size': steps[-1]['size'] if steps else None,
+    }
+
+    if args.json:
+        print(dumps({'steps': steps, 'totals': totals, 'error': error}, indent=2, sort_keys=True))
+    else:
+        _print_profile(steps, totals)
+
+    if error is not None:
+        print('Unable to load the configuration: %s' % error, file=stderr)
+        return 1
+
+    return 0
+
+
+def _parser():
+    parser = ArgumentParser(prog='stormpath-config', description='Stormpath configuration tools.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    snapshot_parser = commands.add_parser(
+        'snapshot',
+        help='Compile configuration files into a snapshot, to be loaded by LoadSnapshotStrategy.')
+    snapshot_parser.add_argument('-o', '--output', required=True, help='The snapshot file to write.')
+    snapshot_parser.add_argument(
+        'files', nargs='+', metavar='file',
+        help='Configuration files (YAML, JSON or .properties), in the order they are loaded.')
+    snapshot_parser.set_defaults(func=snapshot)
+
+    profile_parser = commands.add_parser(
+        'profile',
+        help='Load the configuration, and report the time, memory, remote requests and configuration size '
+             'of every strategy.')
+    profile_parser.add_argument(
+        '--defaults', help='A configuration file with default values, loaded before all others.')
+    profile_parser.add_argument(
+        '--prefix', default='STORMPATH', help='The prefix of environment variables (default: STORMPATH).')
+    profile_parser.add_argument(
+        '--remote', action='store_true',
+        help='Also enrich the configuration from the Stormpath API (requires the stormpath package).')
+    profile_parser.add_argument(
+        '--schedule', action='store_true',
+        help='Run each post-processing strategy as soon as the values it depends on are loaded '
+             '(schedule_post_processing=True).')
+    profile_parser.add_argument(
+        '--no-memory', dest='memory', action='store_false', help="Don't trace memory allocations.")
+    profile_parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    profile_parser.add_argument(
+        'files', nargs='*', metavar='file',
+        help='Configuration files (YAML, JSON or .properties), in the order they are loaded.  Defaults to '
+             'the standard search path: %s.' % ', '.join(SEARCH_PATH))
+    profile_parser.set_defaults(func=profile)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the ``stormpath-config`` command.
+
+    :param list argv: The command line arguments.  Defaults to ``sys.argv``.
+    :rtype: int
+    :returns: The exit status.
+    """
+    args = _parser().parse_args(argv)
+
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    exit(main())
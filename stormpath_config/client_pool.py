@@ -0,0 +1,102 @@
+"""Sharing of Stormpath clients between remote strategies."""
+
+
+from json import dumps
+from threading import Lock
+
+from .helpers import _get_path
+
+
+# The configuration keys that affect how a client connects to the Stormpath
+# API.  Clients are shared between configurations that agree on all of them.
+CLIENT_CONFIG_PATHS = (
+    'client.apiKey.id',
+    'client.apiKey.secret',
+    'client.authenticationScheme',
+    'client.baseUrl',
+    'client.connectionTimeout',
+    'client.proxy',
+)
+
+
+def _close_client(client):
+    """
+    Close a client's connections, if it supports it.
+
+    :param obj client: The client to close.
+    """
+    close = getattr(client, 'close', None)
+    if close is None:
+        # The Stormpath SDK keeps its connection pool in a requests session.
+        executor = getattr(getattr(client, 'data_store', None), 'executor', None)
+        close = getattr(getattr(executor, 'session', None), 'close', None)
+
+    if close is not None:
+        close()
+
+
+class _PooledClientFactory(object):
+    """A client factory that gets its clients from a :class:`ClientPool`."""
+    def __init__(self, pool, client_factory):
+        self.pool = pool
+        self.client_factory = client_factory
+
+    def __call__(self, config):
+        return self.pool.get(self.client_factory, config)
+
+
+class ClientPool(object):
+    """
+    Keeps one client per client factory and client configuration, so that
+    all remote strategies (within and across loads) share the same client,
+    and thus the same pooled keep-alive connections.
+
+    Clients are keyed by the values of :data:`CLIENT_CONFIG_PATHS`.  Call
+    :meth:`close` to close all pooled clients.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._clients = {}
+
+    def __len__(self):
+        return len(self._clients)
+
+    def get(self, client_factory, config):
+        """
+        Return the pooled client for the given configuration, creating it
+        with ``client_factory`` if necessary.
+
+        :param client_factory: The function that creates a client from a
+            configuration.
+        :param dict config: The configuration.
+        :returns: The client.
+        """
+        key = (client_factory, dumps([_get_path(config, path) for path in CLIENT_CONFIG_PATHS], sort_keys=True))
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = client_factory(config)
+
+        return client
+
+    def wrap(self, client_factory):
+        """
+        Return a client factory that gets its clients from this pool.
+
+        :param client_factory: The function that creates a client from a
+            configuration.
+        """
+        if isinstance(client_factory, _PooledClientFactory) and client_factory.pool is self:
+            return client_factory
+
+        return _PooledClientFactory(self, client_factory)
+
+    def close(self):
+        """Close all pooled clients, and remove them from the pool."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+
+        for client in clients:
+            _close_client(client)
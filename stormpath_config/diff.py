@@ -0,0 +1,118 @@
+"""Structural diff of configurations."""
+
+
+from .frozen import FrozenDict
+
+
+def _dotted(path):
+    return '.'.join(str(key) for key in path)
+
+
+class ConfigChanges(object):
+    """
+    The differences between two configurations.
+
+    Paths are tuples of keys.  A dictionary that was added or removed as a
+    whole is reported once, at its own path.
+
+    :param dict added: The new values of the added paths.
+    :param dict removed: The old values of the removed paths.
+    :param dict changed: ``(old value, new value)`` tuples of the changed
+        paths.
+    """
+    def __init__(self, added=None, removed=None, changed=None):
+        self.added = added if added is not None else {}
+        self.removed = removed if removed is not None else {}
+        self.changed = changed if changed is not None else {}
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    __nonzero__ = __bool__
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def __repr__(self):
+        return '<ConfigChanges added=%r removed=%r changed=%r>' % (
+            sorted(_dotted(p) for p in self.added),
+            sorted(_dotted(p) for p in self.removed),
+            sorted(_dotted(p) for p in self.changed))
+
+    def paths(self):
+        """Return the dotted paths of all added, removed and changed values, sorted."""
+        return sorted(_dotted(p) for changes in (self.added, self.removed, self.changed) for p in changes)
+
+    def affects(self, path):
+        """
+        Return whether the value at the given dotted path, or anything below
+        or above it, changed.
+
+        For instance, ``changes.affects('web.oauth2')`` is true if
+        ``web.oauth2.enabled`` or ``web`` changed.
+
+        :param str path: A dotted path.
+        :rtype: bool
+        """
+        keys = tuple(path.split('.'))
+
+        for changes in (self.added, self.removed, self.changed):
+            for changed in changes:
+                changed = tuple(str(key) for key in changed)
+                length = min(len(changed), len(keys))
+                if changed[:length] == keys[:length]:
+                    return True
+
+        return False
+
+
+def _unchanged(old, new):
+    """Return whether two values are known to be equal without diffing them."""
+    if old is new:
+        return True
+
+    # Frozen configurations cache their hashes, so equal subtrees that aren't
+    # shared are confirmed by a single dictionary comparison instead of being
+    # diffed key by key.
+    return isinstance(old, FrozenDict) and isinstance(new, FrozenDict) and \
+        hash(old) == hash(new) and old == new
+
+
+def _diff(old, new, path, changes):
+    for key, old_value in old.items():
+        if key not in new:
+            changes.removed[path + (key,)] = old_value
+            continue
+
+        new_value = new[key]
+        if _unchanged(old_value, new_value):
+            continue
+
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            _diff(old_value, new_value, path + (key,), changes)
+        elif old_value != new_value:
+            changes.changed[path + (key,)] = (old_value, new_value)
+
+    for key, new_value in new.items():
+        if key not in old:
+            changes.added[path + (key,)] = new_value
+
+
+def diff(old, new):
+    """
+    Return the differences between two configurations.
+
+    Identical subtrees (such as the subtrees a
+    :meth:`~stormpath_config.frozen.FrozenDict.with_override` configuration
+    shares with its original) are skipped without being compared, and equal
+    frozen subtrees are skipped without being diffed.
+
+    :param dict old: The old configuration.
+    :param dict new: The new configuration.
+    :rtype: ConfigChanges
+    """
+    changes = ConfigChanges()
+    if not _unchanged(old, new):
+        _diff(old, new, (), changes)
+
+    return changes
@@ -0,0 +1,129 @@
+"""Immutable configuration containers."""
+
+
+class FrozenDict(dict):
+    """
+    A read-only, hashable dictionary.
+
+    Since this is still a ``dict``, a frozen configuration can be passed to
+    anything that expects a plain configuration (``json.dumps``, ``isinstance``
+    checks, etc.), but any attempt to modify it raises a ``TypeError``.
+
+    Frozen configurations can be used as dictionary keys (e.g. to key caches)
+    as long as all their values are frozen, and :meth:`with_override` derives
+    new configurations that share all untouched subtrees with the original.
+    """
+    __slots__ = ('_hash',)
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('%s object is immutable.' % type(self).__name__)
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = __ior__ = _immutable
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(frozenset(self.items()))
+            return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def with_override(self, overrides):
+        """
+        Return a new frozen configuration, with the given values overridden.
+
+        Nested dictionaries are merged, all other values are replaced.  Only
+        the dictionaries along the overridden paths are copied: all other
+        subtrees are shared with this configuration.
+
+        :param dict overrides: The (nested) values to override.
+        :rtype: FrozenDict
+        """
+        items = dict(self)
+
+        for key, value in overrides.items():
+            current = items.get(key)
+            if isinstance(value, dict) and isinstance(current, FrozenDict):
+                items[key] = current.with_override(value)
+            else:
+                items[key] = freeze(value)
+
+        return FrozenDict(items)
+
+    def thaw(self):
+        """Return a mutable deep copy of this configuration."""
+        return thaw(self)
+
+
+def freeze(value, previous=None):
+    """
+    Return a deeply immutable version of a configuration value.
+
+    Dictionaries are converted to :class:`FrozenDict` objects and lists to
+    tuples.  Values that are already frozen are returned as they are.
+
+    :param value: The configuration value to freeze.
+    :param previous: A previously frozen version of the value.  Subtrees that
+        are equal to the ones in ``previous`` are replaced by them, so that
+        unchanged subtrees are shared (and compare by identity) between
+        successive versions of a configuration.
+    :returns: The frozen value.
+    """
+    if isinstance(value, FrozenDict):
+        return value
+
+    if isinstance(value, dict):
+        if not isinstance(previous, FrozenDict):
+            return FrozenDict((k, freeze(v)) for k, v in value.items())
+
+        frozen = FrozenDict((k, freeze(v, previous.get(k))) for k, v in value.items())
+        if len(frozen) == len(previous) and all(v is previous.get(k) for k, v in frozen.items()):
+            return previous
+
+        return frozen
+
+    if isinstance(value, (list, tuple)):
+        if isinstance(previous, tuple) and len(previous) == len(value):
+            frozen = tuple(freeze(v, p) for v, p in zip(value, previous))
+            return previous if all(a is b for a, b in zip(frozen, previous)) else frozen
+
+        return tuple(freeze(v) for v in value)
+
+    if isinstance(value, set):
+        value = frozenset(value)
+
+    if type(previous) is type(value) and previous == value:
+        return previous
+
+    return value
+
+
+def thaw(value):
+    """
+    Return a mutable deep copy of a (possibly frozen) configuration value.
+
+    Dictionaries are converted to plain dictionaries, and lists and tuples to
+    lists.
+
+    :param value: The configuration value to thaw.
+    :returns: The mutable copy.
+    """
+    if isinstance(value, dict):
+        return dict((k, thaw(v)) for k, v in value.items())
+
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+
+    if isinstance(value, (set, frozenset)):
+        return set(value)
+
+    return value
@@ -2,7 +2,76 @@
 
 
 from codecs import open as copen
-from os.path import isfile
+from copy import deepcopy
+from os import chmod, fdopen, remove, stat
+from os.path import abspath, dirname, isfile
+from stat import S_IMODE
+from tempfile import mkstemp
+from threading import local
+
+from .merge import merge_into
+
+# os.replace() atomically overwrites existing files on all platforms, but is
+# only available on Python 3.3+.
+try:
+    from os import replace as _replace
+except ImportError:
+    from os import rename as _replace
+
+
+# The page size the Stormpath API uses by default.
+_DEFAULT_PAGE_SIZE = 25
+
+
+# The request counter active on each thread.
+_counters = local()
+
+
+class _RequestCounter(object):
+    """
+    Counts the remote requests made on the current thread within a ``with``
+    block.  Requests are counted where the client sends them, see
+    :func:`_count_requests`.
+    """
+    def __init__(self):
+        self.count = 0
+        self._outer = None
+
+    def __enter__(self):
+        self._outer = getattr(_counters, 'active', None)
+        _counters.active = self
+
+        return self
+
+    def __exit__(self, *exc_info):
+        _counters.active = self._outer
+
+
+def _count_requests(client):
+    """
+    Make a Stormpath client count the HTTP requests it sends, for the
+    :class:`_RequestCounter` active on the sending thread.  Resources the
+    client has cached aren't requested, so they aren't counted either.
+
+    :param obj client: The Stormpath Client object.
+    :returns: The client.
+    """
+    executor = getattr(getattr(client, 'data_store', None), 'executor', None)
+    request = getattr(executor, 'request', None)
+    if request is None or getattr(request, 'counted', False):
+        return client
+
+    def counted_request(*args, **kwargs):
+        counter = getattr(_counters, 'active', None)
+        if counter is not None:
+            counter.count += 1
+
+        return request(*args, **kwargs)
+
+    counted_request.counted = True
+    executor.request = counted_request
+
+    return client
 
 
 def _load_properties(fname):
@@ -30,22 +99,112 @@ def _load_properties(fname):
     return props
 
 
+def _stat_file(path):
+    """
+    Return the inode, size and modification time of a file, which change
+    whenever it's written or replaced, or None if it doesn't exist.
+
+    :param str path: The path of the file.
+    :rtype: tuple
+    """
+    try:
+        st = stat(path)
+    except OSError:
+        return None
+
+    return (st.st_ino, st.st_size, getattr(st, 'st_mtime_ns', st.st_mtime))
+
+
+def _write_atomic(path, data, mode=None):
+    """
+    Write a file atomically, so that concurrent readers either see the old or
+    the new contents.
+
+    The file keeps its permissions if it exists.  Otherwise it's created with
+    ``mode``, or readable and writable by its owner only, since the files
+    written this way may contain API key secrets.
+
+    :param str path: The path of the file to write.
+    :param bytes data: The new contents of the file.
+    :param int mode: The permissions of the file if it doesn't exist yet.
+    """
+    try:
+        mode = S_IMODE(stat(path).st_mode)
+    except OSError:
+        pass
+
+    fd, tmp_path = mkstemp(dir=dirname(abspath(path)), suffix='.tmp')
+    try:
+        with fdopen(fd, 'wb') as f:
+            f.write(data)
+        if mode is not None:
+            chmod(tmp_path, mode)
+        _replace(tmp_path, path)
+    except Exception:
+        remove(tmp_path)
+        raise
+
+
 def _extend_dict(original, extend_with):
     """
-    Extend a dictionary with another.
+    Extend a dictionary with another, in place.  See
+    :func:`~stormpath_config.merge.merge_into`.
 
     :param dict original: The original dictionary to extend.
     :param dict extend_with: The dictionary with which to extend.
     :rtype: dict
     :returns: The extended dictionary.
     """
-    for key, value in extend_with.items():
-        if key in original and isinstance(value, dict):
-            _extend_dict(original[key], value)
-        else:
-            original[key] = value
+    return merge_into(original, extend_with)
+
+
+def _get_path(config, path, default=None):
+    """
+    Get a value from a nested dictionary, given its dotted path.
+
+    :param dict config: The dictionary to get the value from.
+    :param str path: The dotted path of the value, e.g. ``client.apiKey.id``.
+    :param default: The value to return if the path doesn't exist.
+    :returns: The value found at the given path, or the default.
+    """
+    for key in path.split('.'):
+        if not isinstance(config, dict) or key not in config:
+            return default
+
+        config = config[key]
+
+    return config
+
+
+def _resolve_remote(key, secret, fetch, cache=None, single_flight=None):
+    """
+    Resolve remote configuration through an optional on-disk cache and an
+    optional single-flight group.
+
+    :param tuple key: The key identifying the remote configuration, used as
+        the cache key.
+    :param str secret: The API key secret.  Concurrent lookups are only
+        coalesced if they use the same credentials.
+    :param fetch: A function that fetches the remote configuration.
+    :param obj cache: A :class:`~stormpath_config.remote_cache.RemoteConfigCache`, or None.
+    :param obj single_flight: A :class:`~stormpath_config.single_flight.SingleFlight`, or None.
+    :returns: The remote configuration.  Results shared through the
+        single-flight group are copied, so callers can modify them.  They're
+        kept no longer than the cached values are fresh, so the cache still
+        decides when they're refreshed.
+    """
+    def resolve():
+        if cache is None:
+            return fetch()
+
+        return cache.get(key, fetch)
+
+    if single_flight is None:
+        return resolve()
+
+    ttl = cache.ttl if cache is not None else None
 
-    return original
+    return deepcopy(single_flight.do(tuple(key) + (secret,), resolve, ttl))
 
 
 def to_camel_case(s):
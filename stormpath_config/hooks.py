@@ -0,0 +1,269 @@
+"""Hooks for timing and tracing the strategies of a configuration loader."""
+
+
+from bisect import bisect_left
+
+# tracemalloc is only available on Python 3.4+.
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+# The phases of a load.
+LOAD = 'load'
+POST_PROCESSING = 'post_processing'
+VALIDATION = 'validation'
+
+# The upper bounds (in seconds) of the buckets of a duration histogram.
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0,
+    10.0,
+)
+
+
+def _size(value):
+    """Return the number of leaf values of a configuration."""
+    if isinstance(value, dict):
+        return sum(_size(item) for item in value.values())
+
+    if isinstance(value, (list, tuple)):
+        return sum(_size(item) for item in value)
+
+    return 1
+
+
+class StrategyEvent(object):
+    """
+    A single execution of a strategy by a loader.
+
+    The same event is passed to the ``before`` and ``after`` methods of a
+    hook; ``duration``, ``size_after`` and ``exception`` are only set for
+    ``after``.
+
+    :param obj strategy: The strategy.
+    :param str phase: :data:`LOAD`, :data:`POST_PROCESSING` or
+        :data:`VALIDATION`.
+    :param int size_before: The number of values in the configuration before
+        the strategy was processed.
+    """
+    __slots__ = ('strategy', 'phase', 'size_before', 'size_after', 'duration', 'exception')
+
+    def __init__(self, strategy, phase, size_before):
+        self.strategy = strategy
+        self.phase = phase
+        self.size_before = size_before
+        self.size_after = None
+        self.duration = None
+        self.exception = None
+
+    def __repr__(self):
+        return '<StrategyEvent %s phase=%s duration=%r size_delta=%r exception=%r>' % (
+            self.name, self.phase, self.duration, self.size_delta, self.exception)
+
+    @property
+    def name(self):
+        """The class name of the strategy."""
+        return type(self.strategy).__name__
+
+    @property
+    def size_delta(self):
+        """The number of values the strategy added (or removed, if negative)."""
+        if self.size_after is None:
+            return None
+
+        return self.size_after - self.size_before
+
+
+class LoaderHook(object):
+    """
+    Base class of loader hooks.  Register hooks with
+    :meth:`~stormpath_config.loader.ConfigLoader.add_hook`, and override
+    either or both methods.
+    """
+    def before(self, event):
+        """
+        Called right before a strategy is processed.
+
+        :param StrategyEvent event: The event.
+        """
+
+    def after(self, event):
+        """
+        Called right after a strategy is processed, or raised an exception
+        (which is re-raised once all hooks are called).
+
+        :param StrategyEvent event: The event.
+        """
+
+
+class Histogram(object):
+    """
+    A histogram of durations.
+
+    :param tuple buckets: The sorted upper bounds of the buckets, in seconds.
+        Durations above the last bound are counted in an extra bucket.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def __repr__(self):
+        return '<Histogram count=%d mean=%r p50=%r p99=%r>' % (
+            self.count, self.mean, self.percentile(50), self.percentile(99))
+
+    def add(self, duration):
+        """Record a duration, in seconds."""
+        self.counts[bisect_left(self.buckets, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.min = duration if self.min is None else min(self.min, duration)
+        self.max = duration if self.max is None else max(self.max, duration)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent):
+        """
+        Return an estimate of the given percentile: the upper bound of the
+        bucket it falls in, capped at the largest recorded duration.
+
+        :param float percent: The percentile, between 0 and 100.
+        """
+        if not self.count:
+            return None
+
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                if i == len(self.buckets):
+                    return self.max
+
+                return min(self.buckets[i], self.max)
+
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts)),
+        }
+
+
+class TimingCollector(LoaderHook):
+    """
+    A hook that aggregates the durations of all strategies across loads,
+    in one :class:`Histogram` per strategy class and phase.
+
+    :param tuple buckets: The upper bounds of the histogram buckets.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.errors = {}
+        self.size_deltas = {}
+
+    def after(self, event):
+        key = (event.name, event.phase)
+
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+
+        histogram.add(event.duration)
+
+        if event.exception is not None:
+            self.errors[key] = self.errors.get(key, 0) + 1
+        else:
+            self.size_deltas[key] = self.size_deltas.get(key, 0) + event.size_delta
+
+    def reset(self):
+        """Forget all recorded durations."""
+        self.histograms.clear()
+        self.errors.clear()
+        self.size_deltas.clear()
+
+    def summary(self):
+        """
+        Return the statistics of all strategies, slowest first.
+
+        :rtype: list
+        :returns: A list of dictionaries with the ``strategy`` name,
+            ``phase``, number of ``errors``, total ``size_delta`` and the
+            histogram statistics (see :meth:`Histogram.to_dict`).
+        """
+        summary = []
+        for (name, phase), histogram in self.histograms.items():
+            stats = histogram.to_dict()
+            stats.update({
+                'strategy': name,
+                'phase': phase,
+                'errors': self.errors.get((name, phase), 0),
+                'size_delta': self.size_deltas.get((name, phase), 0),
+            })
+            summary.append(stats)
+
+        return sorted(summary, key=lambda stats: -stats['total'])
+
+
+class ProfilingHook(LoaderHook):
+    """
+    A hook that records, for every strategy the loader processes, its wall
+    time, the number of remote requests it made (for strategies with a
+    ``request_count``), and the number of values in the configuration after
+    it.
+
+    If :mod:`tracemalloc` is tracing, the memory allocated by each strategy
+    (net of what it freed) and its peak memory usage are recorded as well;
+    peaks are only available on Python 3.9+.
+
+    The records are available in ``steps``, as dictionaries.
+    """
+    def __init__(self):
+        self.steps = []
+        self._memory = None
+
+    def before(self, event):
+        self._memory = None
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+
+            self._memory = tracemalloc.get_traced_memory()[0]
+
+    def after(self, event):
+        allocated = peak = None
+        if self._memory is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            allocated = current - self._memory
+            peak = peak - self._memory if hasattr(tracemalloc, 'reset_peak') else None
+
+        self.steps.append({
+            'strategy': event.name,
+            'phase': event.phase,
+            'source': getattr(event.strategy, 'file_path', None),
+            'duration': event.duration,
+            'allocated': allocated,
+            'peak': peak,
+            'requests': getattr(event.strategy, 'request_count', None),
+            'size': event.size_after,
+            'error': str(event.exception) if event.exception is not None else None,
+        })
@@ -1,6 +1,120 @@
 """Configuration Loader."""
 
 
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from threading import local
+from timeit import default_timer
+
+from .diff import diff
+from .frozen import FrozenDict, freeze
+from .helpers import _get_path
+from .hooks import LOAD, POST_PROCESSING, VALIDATION, StrategyEvent, _size
+from .provenance import Provenance
+from .shared import open_shared, write_shared
+
+# intern() is a builtin on Python 2.
+try:
+    from sys import intern
+except ImportError:
+    pass
+
+
+_MISSING = object()
+
+
+class CacheStats(object):
+    """
+    Cache statistics for a single strategy.
+
+    :param int hits: Number of loads in which the strategy's inputs were
+        unchanged and its result was served from the cache.
+    :param int misses: Number of loads in which the strategy had to be
+        processed again.
+    :param float recompute_time: Total time (in seconds) spent processing the
+        strategy.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.recompute_time = 0.0
+
+    def __repr__(self):
+        return '<CacheStats hits=%d misses=%d recompute_time=%.6f>' % (
+            self.hits, self.misses, self.recompute_time)
+
+
+class _Schedule(object):
+    """
+    Bookkeeping for scheduled post processing during a single load.
+
+    ``seen`` maps the index of each post processing strategy to the values of
+    its dependencies right after it last ran.
+    """
+    def __init__(self, seen=None):
+        self.seen = seen if seen is not None else {}
+        self.expected = 0
+        self.executed = 0
+
+
+def _dependency_values(config, depends_on):
+    return deepcopy(tuple(_get_path(config, path) for path in depends_on))
+
+
+def _use_client_pool(client_pool, strategies):
+    """Make all strategies with a ``client_factory`` get their clients from a pool."""
+    for strategy in strategies:
+        if getattr(strategy, 'client_factory', None) is not None:
+            strategy.client_factory = client_pool.wrap(strategy.client_factory)
+
+
+def _interned(value):
+    """
+    Return a mutable copy of a configuration value, with all dictionary keys
+    interned, so that configurations built separately share their keys.
+    """
+    if isinstance(value, dict):
+        return dict((intern(k) if type(k) is str else k, _interned(v)) for k, v in value.items())
+
+    if isinstance(value, (list, tuple)):
+        return [_interned(v) for v in value]
+
+    return value
+
+
+def _with_value(config, keys, value):
+    """
+    Return a frozen configuration with the value at the given path replaced,
+    not merged, sharing all other subtrees.
+    """
+    items = dict(config)
+    if len(keys) == 1:
+        items[keys[0]] = freeze(value)
+    else:
+        current = items.get(keys[0])
+        items[keys[0]] = _with_value(current if isinstance(current, FrozenDict) else FrozenDict(), keys[1:], value)
+
+    return FrozenDict(items)
+
+
+def _fingerprint(strategy):
+    """
+    Return a fingerprint of a strategy's inputs.
+
+    Strategies that don't implement a ``fingerprint`` method are assumed to
+    depend only on the configuration they are given.
+
+    :param obj strategy: The strategy to fingerprint.
+    :returns: A value that compares equal as long as the strategy's inputs
+        don't change.
+    """
+    fingerprint = getattr(strategy, 'fingerprint', None)
+    if fingerprint is None:
+        return None
+
+    return fingerprint()
+
+
 class ConfigLoader(object):
     """
     Represents a configuration loader that loads configuration through a list
@@ -11,8 +125,34 @@ class ConfigLoader(object):
         after each load strategy.
     :param validation_strategies: List of strategies that will be performed after
         the load and post processing strategies are finished.
+    :param bool schedule_post_processing: Whether or not to skip post
+        processing strategies whose dependencies didn't change.  A strategy
+        declares its dependencies as a ``depends_on`` tuple of dotted
+        configuration paths, and is only processed after a load strategy if
+        any of these values changed since it last ran.  Strategies with a
+        ``run_at_end`` attribute set to ``True`` are processed only once,
+        after the last load strategy.  Strategies declaring neither are
+        processed after each load strategy, as usual.
+    :param bool cache: Whether or not to cache the loaded configuration.  When
+        enabled, ``load()`` returns a frozen configuration, and keeps a
+        snapshot of the configuration after each load stage.  Once the
+        fingerprint of one of the inputs (files, environment variables, etc.)
+        changes, loading resumes from the snapshot preceding the first stage
+        whose inputs changed.
+    :param client_pool: A :class:`~stormpath_config.client_pool.ClientPool`.
+        If given, all strategies with a ``client_factory`` get their clients
+        from the pool, so they share them within and across loads.  Call
+        :meth:`close` to close the pooled clients.
+    :param bool frozen: Whether or not ``load()`` returns a frozen
+        configuration (a hashable :class:`~stormpath_config.frozen.FrozenDict`)
+        even if caching is disabled.
+    :param bool provenance: Whether or not to record which strategy (and
+        which file or environment variable) supplied each configuration
+        value.  See :meth:`explain`.
     """
-    def __init__(self, load_strategies=None, post_processing_strategies=None, validation_strategies=None):
+    def __init__(self, load_strategies=None, post_processing_strategies=None, validation_strategies=None,
+                 schedule_post_processing=False, cache=False, client_pool=None, frozen=False,
+                 provenance=False):
         if load_strategies is None:
             load_strategies = []
 
@@ -25,17 +165,571 @@ class ConfigLoader(object):
         self.load_strategies = load_strategies
         self.post_processing_strategies = post_processing_strategies
         self.validation_strategies = validation_strategies
+        self.schedule_post_processing = schedule_post_processing
+        self.skipped_executions = 0
+        self.cache = cache
+        self.cache_stats = {}
+        self.client_pool = client_pool
+        self.frozen = frozen
+        self.provenance = Provenance() if provenance else None
+        self.last_config = None
+        self.hooks = []
+        self.invalidate()
 
-    def load(self):
+        if client_pool is not None:
+            _use_client_pool(client_pool, self.strategies)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close all clients in the loader's client pool, if any."""
+        if self.client_pool is not None:
+            self.client_pool.close()
+
+    @property
+    def strategies(self):
+        """All strategies used by this loader, in the order they're declared."""
+        return self.load_strategies + self.post_processing_strategies + self.validation_strategies
+
+    def add_hook(self, hook):
+        """
+        Call the hook's ``before(event)`` and ``after(event)`` methods around
+        every strategy the loader processes.  See
+        :class:`~stormpath_config.hooks.LoaderHook`.
+
+        :param obj hook: The hook, e.g. a
+            :class:`~stormpath_config.hooks.TimingCollector`.
+        :returns: The hook.
+        """
+        self.hooks.append(hook)
+
+        return hook
+
+    def remove_hook(self, hook):
+        """Stop calling the given hook."""
+        self.hooks.remove(hook)
+
+    def invalidate(self):
+        """Drop the cached configuration, forcing the next load to process all strategies."""
+        self._cached_config = None
+        self._stages = []
+        self._post_processing_fingerprints = None
+        self._validation_fingerprints = None
+
+    def _stats(self, strategy):
+        stats = self.cache_stats.get(strategy)
+        if stats is None:
+            stats = self.cache_stats[strategy] = CacheStats()
+
+        return stats
+
+    def _run(self, strategy, config):
+        return strategy.process(config)
+
+    def _run_hooked(self, strategy, config, phase):
+        event = StrategyEvent(strategy, phase, _size(config))
+        for hook in self.hooks:
+            hook.before(event)
+
+        start = default_timer()
+        try:
+            config = self._run(strategy, config)
+        except Exception as e:
+            event.exception = e
+            raise
+        finally:
+            event.duration = default_timer() - start
+            if event.exception is None:
+                event.size_after = _size(config)
+
+            for hook in self.hooks:
+                hook.after(event)
+
+        if self.cache:
+            self._stats(strategy).recompute_time += event.duration
+
+        return config
+
+    def _process(self, strategy, config, phase):
+        if self.provenance is None:
+            return self._execute(strategy, config, phase)
+
+        with self.provenance.recording(strategy, config) as recording:
+            config = self._execute(strategy, config, phase)
+            recording.finish(config)
+
+        return config
+
+    def _execute(self, strategy, config, phase):
+        if self.hooks:
+            config = self._run_hooked(strategy, config, phase)
+        elif not self.cache:
+            config = self._run(strategy, config)
+        else:
+            start = default_timer()
+            config = self._run(strategy, config)
+            self._stats(strategy).recompute_time += default_timer() - start
+
+        return config
+
+    def _process_stage(self, strategy, config, schedule):
+        config = self._process(strategy, config, LOAD)
+
+        for i, strategy in enumerate(self.post_processing_strategies):
+            schedule.expected += 1
+
+            if self.schedule_post_processing:
+                if getattr(strategy, 'run_at_end', False):
+                    continue
+
+                depends_on = getattr(strategy, 'depends_on', None)
+                if depends_on is not None:
+                    if schedule.seen.get(i) == _dependency_values(config, depends_on):
+                        continue
+
+            config = self._process(strategy, config, POST_PROCESSING)
+            schedule.executed += 1
+
+            if self.schedule_post_processing and getattr(strategy, 'depends_on', None) is not None:
+                schedule.seen[i] = _dependency_values(config, strategy.depends_on)
+
+        return config
+
+    def _finish(self, config, schedule):
+        if self.schedule_post_processing:
+            for strategy in self.post_processing_strategies:
+                if getattr(strategy, 'run_at_end', False):
+                    config = self._process(strategy, config, POST_PROCESSING)
+                    schedule.executed += 1
+
+        self.skipped_executions = schedule.expected - schedule.executed
+
+        for strategy in self.validation_strategies:
+            config = self._process(strategy, config, VALIDATION)
+
+        return config
+
+    def _load(self):
         config = dict()
+        schedule = _Schedule()
+
+        if self.provenance is not None:
+            self.provenance.reset()
 
         for strategy in self.load_strategies:
-            config = strategy.process(config)
+            config = self._process_stage(strategy, config, schedule)
 
-            for strategy in self.post_processing_strategies:
-                config = strategy.process(config)
+        return self._finish(config, schedule)
+
+    def _first_stale_stage(self, fingerprints, post_processing_fingerprints):
+        """
+        Return the index of the first load stage that has to be processed
+        again, given the current fingerprints.  A load stage is a load
+        strategy followed by all post processing strategies.
+        """
+        if post_processing_fingerprints != self._post_processing_fingerprints:
+            return 0
+
+        for i, stage in enumerate(self._stages):
+            if stage[0] != fingerprints[i]:
+                return i
+
+        return len(self._stages)
+
+    def _pending_load_strategies(self):
+        """Return the load strategies that the next ``load()`` will process."""
+        if not self.cache:
+            return list(self.load_strategies)
+
+        fingerprints = [_fingerprint(strategy) for strategy in self.load_strategies]
+        post_processing_fingerprints = [_fingerprint(strategy) for strategy in self.post_processing_strategies]
+
+        return self.load_strategies[self._first_stale_stage(fingerprints, post_processing_fingerprints):]
+
+    def load(self):
+        config = self._load_config()
+        self.last_config = config
+
+        return config
+
+    def _load_config(self):
+        if not self.cache:
+            config = self._load()
+            return freeze(config, self.last_config) if self.frozen else config
+
+        fingerprints = [_fingerprint(strategy) for strategy in self.load_strategies]
+        post_processing_fingerprints = [_fingerprint(strategy) for strategy in self.post_processing_strategies]
+        validation_fingerprints = [_fingerprint(strategy) for strategy in self.validation_strategies]
+
+        start = self._first_stale_stage(fingerprints, post_processing_fingerprints)
+        stale = start < len(self.load_strategies) or validation_fingerprints != self._validation_fingerprints
+
+        for i, strategy in enumerate(self.load_strategies):
+            stats = self._stats(strategy)
+            if i < start:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+
+        for strategy in self.post_processing_strategies:
+            stats = self._stats(strategy)
+            if start < len(self.load_strategies):
+                stats.misses += 1
+            else:
+                stats.hits += 1
 
         for strategy in self.validation_strategies:
-            config = strategy.process(config)
+            stats = self._stats(strategy)
+            if stale:
+                stats.misses += 1
+            else:
+                stats.hits += 1
+
+        if self._cached_config is not None and not stale:
+            self.skipped_executions = 0
+            return self._cached_config
+
+        # Resume from the snapshot of the last stage whose inputs didn't
+        # change.  Snapshots are copied, since strategies modify the
+        # configuration in place.
+        del self._stages[start:]
+        if self._stages:
+            config, seen = deepcopy(self._stages[-1][1])
+        else:
+            config, seen = dict(), None
+
+        if self.provenance is not None:
+            self.provenance.reset(self._stages[-1][2] if self._stages else None)
+
+        schedule = _Schedule(seen)
+
+        for i in range(start, len(self.load_strategies)):
+            config = self._process_stage(self.load_strategies[i], config, schedule)
+            provenance = self.provenance.state() if self.provenance is not None else None
+            self._stages.append((fingerprints[i], deepcopy((config, schedule.seen)), provenance))
+
+        config = freeze(self._finish(config, schedule), self._cached_config)
+
+        # The fingerprints of some strategies (e.g. the API key files loaded
+        # by LoadAPIKeyFromConfigStrategy) depend on what they processed, so
+        # they're taken again once the load is done.
+        self._cached_config = config
+        self._post_processing_fingerprints = [
+            _fingerprint(strategy) for strategy in self.post_processing_strategies]
+        self._validation_fingerprints = [_fingerprint(strategy) for strategy in self.validation_strategies]
+
+        return config
+
+    def reload(self):
+        """
+        Load the configuration again, and return it along with what changed
+        since the previous load.
+
+        The comparison is cheapest with ``cache=True`` or ``frozen=True``:
+        unchanged subtrees are then shared with the previous configuration,
+        and skipped by identity.  A mutable configuration returned by the
+        previous load must not have been modified.
+
+        :rtype: tuple
+        :returns: The new configuration and a
+            :class:`~stormpath_config.diff.ConfigChanges`.
+        """
+        previous = self.last_config
+        config = self.load()
+
+        return config, diff(previous if previous is not None else {}, config)
+
+    def explain(self, path):
+        """
+        Return where the value at the given dotted path came from, in the
+        last load.
+
+        :param str path: The dotted path of a value, e.g. ``web.login.enabled``.
+        :returns: A ``{'strategy': ..., 'source': ...}`` dictionary, where
+            ``source`` is the file or environment variable the value was read
+            from (or None), or None if the path isn't a value of the
+            configuration.
+        """
+        if self.provenance is None:
+            raise ValueError('Provenance tracking is disabled. Pass provenance=True to enable it.')
+
+        return self.provenance.explain(path)
+
+    def dump_provenance(self):
+        """
+        Return where every value of the last loaded configuration came from.
+
+        :rtype: dict
+        :returns: ``{'strategy': ..., 'source': ...}`` dictionaries, keyed by
+            dotted path.
+        """
+        if self.provenance is None:
+            raise ValueError('Provenance tracking is disabled. Pass provenance=True to enable it.')
+
+        return self.provenance.dump()
+
+    def load_shared(self, path):
+        """
+        Load the configuration, write it to a memory-mapped shared
+        configuration file, and return a read-only view of it.
+
+        Call this in a pre-forking server's master process, before workers
+        are forked: all workers then share the same mapped copy of the
+        configuration.  Other processes can map the same file with
+        :func:`~stormpath_config.shared.open_shared`.
+
+        :param str path: The path of the shared configuration file to write.
+        :rtype: :class:`~stormpath_config.shared.SharedMapping`
+        """
+        write_shared(path, self.load())
+
+        return open_shared(path)
+
+
+class AsyncConfigLoader(ConfigLoader):
+    """
+    Represents a configuration loader that reads and parses all configuration
+    sources concurrently.
+
+    Load strategies that implement ``read()`` and ``apply(config, data)``
+    (all file based strategies) have their sources read and parsed in a
+    thread pool as soon as loading starts.  The strategies are then applied
+    in their declared order, so the loaded configuration is identical to the
+    one loaded by a :class:`ConfigLoader`.
+
+    :param executor: A ``concurrent.futures.Executor`` used to read
+        configuration sources.  If not provided, a thread pool is created for
+        each load.
+
+    All other parameters are the same as for :class:`ConfigLoader`.
+    """
+    def __init__(self, load_strategies=None, post_processing_strategies=None, validation_strategies=None,
+                 executor=None, **kwargs):
+        super(AsyncConfigLoader, self).__init__(
+            load_strategies, post_processing_strategies, validation_strategies, **kwargs)
+        self.executor = executor
+        # The reads of the load in progress on each thread, so that
+        # concurrent loads don't use (or clear) each other's reads.
+        self._local = local()
+
+    def _run(self, strategy, config):
+        reads = getattr(self._local, 'reads', None)
+        future = reads.pop(strategy, None) if reads is not None else None
+        if future is None:
+            return strategy.process(config)
+
+        try:
+            data = future.result()
+        except NotImplementedError:
+            return strategy.process(config)
+
+        return strategy.apply(config, data)
+
+    def _read_all(self, executor, reads):
+        for strategy in self._pending_load_strategies():
+            if hasattr(strategy, 'read') and hasattr(strategy, 'apply') and strategy not in reads:
+                reads[strategy] = executor.submit(strategy.read)
+
+    def load(self):
+        reads = self._local.reads = {}
+        try:
+            if self.executor is not None:
+                self._read_all(self.executor, reads)
+                return super(AsyncConfigLoader, self).load()
+
+            with ThreadPoolExecutor(max_workers=max(len(self.load_strategies), 1)) as executor:
+                self._read_all(executor, reads)
+                return super(AsyncConfigLoader, self).load()
+        finally:
+            self._local.reads = None
+
+    def load_async(self, loop=None):
+        """
+        Load the configuration without blocking the event loop.
+
+        Sources are read concurrently, and the remaining (blocking) strategies,
+        such as the remote enrichment strategies, are performed in the event
+        loop's default executor.
+
+        :param loop: The asyncio event loop to use.  Defaults to the current
+            event loop.
+        :returns: An awaitable that resolves to the loaded configuration.
+        """
+        if loop is None:
+            from asyncio import get_event_loop
+            loop = get_event_loop()
+
+        return loop.run_in_executor(None, self.load)
+
+
+class _Tenant(object):
+    """The strategies of a tenant, and its last loaded configuration."""
+    def __init__(self, strategies):
+        self.strategies = strategies
+        self.base = None
+        self.fingerprints = None
+        self.config = None
+
+
+class MultiTenantConfigLoader(object):
+    """
+    Represents a configuration loader for many tenants (e.g. Stormpath
+    applications) served by the same process, whose configurations only
+    differ by a few per-tenant layers.
+
+    The shared layers (the default configuration file, a global
+    ``stormpath.yml``, environment variables, etc.) are loaded once, by a
+    caching :class:`ConfigLoader`, into a frozen base configuration.  Each
+    tenant's strategies are then applied on top of it, in order:
+
+    * Strategies with an ``overlay(config)`` method (e.g.
+      :class:`~stormpath_config.strategies.ExtendConfigStrategy`, the file
+      based strategies and the remote enrichment strategies) return the
+      values they'd merge into the configuration, which are applied with
+      :meth:`~stormpath_config.frozen.FrozenDict.with_override`.  Only the
+      dictionaries along the overridden paths are copied; all other subtrees
+      are shared with the base, and by all tenants.  The dotted paths listed
+      in a strategy's ``replaces`` attribute (e.g. the OAuth policy of
+      :class:`~stormpath_config.strategies.EnrichIntegrationFromRemoteConfigStrategy`)
+      are replaced instead of merged, like ``process()`` does.
+    * Strategies with ``depends_on`` paths (e.g.
+      :class:`~stormpath_config.strategies.LoadAPIKeyFromConfigStrategy`)
+      are skipped if these values are the same as in the base.
+    * Other strategies process a mutable copy of the configuration, which is
+      then frozen again, sharing all unchanged subtrees.
+
+    Dictionary keys are interned, and each tenant's configuration is cached
+    until the base or the fingerprint of one of its strategies changes.
+
+    :param list load_strategies: The shared load strategies.
+    :param list post_processing_strategies: The shared post processing
+        strategies, applied to the base configuration.
+    :param list validation_strategies: Strategies applied to each tenant's
+        configuration, which must not modify it.
+    :param kwargs: Other parameters of the base :class:`ConfigLoader`, e.g.
+        ``client_pool``.  The strategies of all tenants get their clients from
+        the same pool.  The base configuration is always cached, so ``cache``
+        can't be disabled.
+    """
+    def __init__(self, load_strategies=None, post_processing_strategies=None, validation_strategies=None,
+                 **kwargs):
+        if not kwargs.pop('cache', True):
+            raise ValueError('The base configuration of a MultiTenantConfigLoader is always cached.')
+
+        self.base_loader = ConfigLoader(load_strategies, post_processing_strategies, cache=True, **kwargs)
+        self.validation_strategies = validation_strategies if validation_strategies is not None else []
+        self._tenants = {}
+        self._loaded_base = None
+        self._base = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close all clients in the base loader's client pool, if any."""
+        self.base_loader.close()
+
+    @property
+    def tenants(self):
+        """The ids of all tenants."""
+        return list(self._tenants)
+
+    def add_tenant(self, tenant_id, strategies):
+        """
+        Add a tenant, or replace its strategies.
+
+        :param tenant_id: A hashable id of the tenant.
+        :param list strategies: The tenant's strategies, e.g. an
+            :class:`~stormpath_config.strategies.ExtendConfigStrategy` with its
+            settings, a :class:`~stormpath_config.strategies.LoadAPIKeyConfigStrategy`
+            with its API key, and remote enrichment strategies.
+        """
+        if self.base_loader.client_pool is not None:
+            _use_client_pool(self.base_loader.client_pool, strategies)
+
+        self._tenants[tenant_id] = _Tenant(strategies)
+
+    def remove_tenant(self, tenant_id):
+        """Remove a tenant, and drop its configuration."""
+        del self._tenants[tenant_id]
+
+    def invalidate(self, tenant_id=None):
+        """
+        Drop the cached configuration of a tenant, or of all tenants and the
+        base configuration.
+        """
+        if tenant_id is not None:
+            self._tenants[tenant_id].config = None
+            return
+
+        self.base_loader.invalidate()
+        for tenant in self._tenants.values():
+            tenant.config = None
+
+    def load_base(self):
+        """
+        Load the shared base configuration.  It's only processed again if the
+        fingerprint of one of its inputs changed.
+
+        :rtype: :class:`~stormpath_config.frozen.FrozenDict`
+        """
+        config = self.base_loader.load()
+        if config is not self._loaded_base:
+            self._base = freeze(_interned(config), self._base)
+            self._loaded_base = config
+
+        return self._base
+
+    def _apply(self, strategy, config, base):
+        overlay = getattr(strategy, 'overlay', None)
+        if overlay is not None:
+            values = overlay(config)
+            if not values:
+                return config
+
+            result = config.with_override(_interned(values))
+            for path in getattr(strategy, 'replaces', ()):
+                value = _get_path(values, path, _MISSING)
+                if value is not _MISSING:
+                    result = _with_value(result, path.split('.'), _interned(value))
+
+            return result
+
+        depends_on = getattr(strategy, 'depends_on', None)
+        if depends_on is not None:
+            if all(_get_path(config, path) == _get_path(base, path) for path in depends_on):
+                return config
+
+        return freeze(_interned(strategy.process(config.thaw())), config)
+
+    def load(self, tenant_id):
+        """
+        Load the configuration of a tenant.
+
+        :param tenant_id: The id of the tenant.
+        :rtype: :class:`~stormpath_config.frozen.FrozenDict`
+        """
+        tenant = self._tenants[tenant_id]
+        base = self.load_base()
+        fingerprints = [_fingerprint(strategy) for strategy in tenant.strategies]
+
+        if tenant.config is not None and tenant.base is base and tenant.fingerprints == fingerprints:
+            return tenant.config
+
+        config = base
+        for strategy in tenant.strategies:
+            config = self._apply(strategy, config, base)
+
+        for strategy in self.validation_strategies:
+            strategy.process(config)
+
+        tenant.base, tenant.fingerprints, tenant.config = base, fingerprints, config
 
         return config
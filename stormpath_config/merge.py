@@ -0,0 +1,226 @@
+"""
+Merging of configuration layers.
+
+Both :func:`merge` and :func:`merge_into` merge any number of layers in a
+single pass per nesting level: each key's values are collected across all
+layers first, and only the keys that actually change are written.
+
+Merge semantics are configurable:
+
+* ``dicts``: ``'merge'`` (default) merges nested dictionaries recursively,
+  ``'replace'`` treats them like any other value.
+* ``lists``: ``'replace'`` (default) replaces lists, ``'append'`` concatenates
+  them.
+* ``none``: ``'override'`` (default) lets None values override lower layers,
+  ``'skip'`` ignores them.
+"""
+
+
+_MISSING = object()
+
+_OPTIONS = {
+    'dicts': ('merge', 'replace'),
+    'lists': ('replace', 'append'),
+    'none': ('override', 'skip'),
+}
+
+
+class _Options(object):
+    __slots__ = ('merge_dicts', 'append_lists', 'skip_none', 'origins', 'simple')
+
+    def __init__(self, options):
+        origins = options.pop('origins', None)
+
+        for name, value in options.items():
+            if name not in _OPTIONS:
+                raise TypeError('Unexpected merge option: %r.' % name)
+
+            if value not in _OPTIONS[name]:
+                raise ValueError('Invalid %s merge option: %r.' % (name, value))
+
+        self.merge_dicts = options.get('dicts', 'merge') == 'merge'
+        self.append_lists = options.get('lists', 'replace') == 'append'
+        self.skip_none = options.get('none', 'override') == 'skip'
+        self.origins = origins
+        self.simple = self.merge_dicts and not self.append_lists and not self.skip_none and origins is None
+
+
+def _record_leaves(origins, value, path, layer):
+    """Record ``layer`` as the origin of all leaves of ``value``."""
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            _record_leaves(origins, item, path + (key,), layer)
+    else:
+        origins[path] = layer
+
+
+def _share(value, shared):
+    """Add the ids of a dictionary and all its nested dictionaries to ``shared``."""
+    shared.add(id(value))
+    for item in value.values():
+        if isinstance(item, dict):
+            _share(item, shared)
+
+
+def _extend(base, overlay, in_place, shared=None):
+    """
+    Merge a single dictionary onto a base dictionary, with the default
+    options.  This is the fast path for the most common case.
+
+    :param set shared: When merging in place, the ids of the dictionaries
+        that were inserted from earlier layers.  They're copied on write, so
+        the layers are never modified.
+    """
+    result = base
+
+    for key, value in overlay.items():
+        current = base.get(key, _MISSING)
+        if isinstance(value, dict) and isinstance(current, dict):
+            value = _extend(current, value, in_place and (shared is None or id(current) not in shared), shared)
+        elif shared is not None and isinstance(value, dict):
+            _share(value, shared)
+
+        if value is not current:
+            if result is base and not in_place:
+                result = dict(base)
+
+            result[key] = value
+
+    return result
+
+
+def _merge(base, base_layer, overlays, in_place, options, path):
+    """
+    Merge dictionaries onto a base dictionary.
+
+    :param dict base: The base dictionary.
+    :param base_layer: The layer index of the base, for origins.
+    :param list overlays: ``(layer index, dict)`` tuples, in merge order.
+    :param bool in_place: Whether to modify ``base``, or copy it on the
+        first change.
+    :returns: The merged dictionary.
+    """
+    # Collect the chain of values of each key, across all overlays.  A chain
+    # is either a single value, or a run of dictionaries (or lists, when
+    # appending) that are merged together.  Once a layer breaks the run of a
+    # key, the base value of that key is replaced, not merged.
+    chains = {}
+    replaced = set()
+    for layer, overlay in overlays:
+        for key, value in overlay.items():
+            if value is None and options.skip_none:
+                continue
+
+            chain = chains.get(key)
+            if chain is not None and (
+                    (options.merge_dicts and isinstance(value, dict) and isinstance(chain[-1][1], dict)) or
+                    (options.append_lists and isinstance(value, list) and isinstance(chain[-1][1], list))):
+                chain.append((layer, value))
+            else:
+                if chain is not None:
+                    replaced.add(key)
+
+                chains[key] = [(layer, value)]
+
+    result = base
+    copied = in_place
+    origins = options.origins
+
+    for key, chain in chains.items():
+        first_layer, first = chain[0]
+        original = base.get(key, _MISSING)
+        current = _MISSING if key in replaced else original
+
+        if options.merge_dicts and isinstance(first, dict):
+            if isinstance(current, dict):
+                value = _merge(current, base_layer, chain, in_place, options, path + (key,))
+            elif len(chain) == 1:
+                value = first
+                if origins is not None:
+                    _record_leaves(origins, value, path + (key,), first_layer)
+            else:
+                value = _merge(first, first_layer, chain[1:], False, options, path + (key,))
+        elif options.append_lists and isinstance(first, list):
+            value = [item for _, items in chain for item in items]
+            if isinstance(current, list):
+                value = current + value
+
+            if origins is not None:
+                origins[path + (key,)] = chain[-1][0]
+        else:
+            value = first
+            if origins is not None:
+                _record_leaves(origins, value, path + (key,), first_layer)
+
+        if value is not original:
+            if not copied:
+                result = dict(base)
+                copied = True
+
+            result[key] = value
+
+    if origins is not None and base_layer is not None:
+        for key, value in base.items():
+            if key not in chains:
+                _record_leaves(origins, value, path + (key,), base_layer)
+
+    return result
+
+
+def merge(*layers, **options):
+    """
+    Merge configuration layers into a new configuration, without modifying
+    any of them.
+
+    Only the dictionaries along the changed paths are copied: all other
+    subtrees are shared with the layers they come from, so the result must
+    be treated as read-only, or thawed first.
+
+    :param layers: The configuration dictionaries, lowest precedence first.
+    :param str dicts: How to merge dictionaries: ``'merge'`` or ``'replace'``.
+    :param str lists: How to merge lists: ``'replace'`` or ``'append'``.
+    :param str none: How to merge None values: ``'override'`` or ``'skip'``.
+    :param dict origins: If given, filled with the index of the layer that
+        supplied each leaf, keyed by path tuple.
+    :rtype: dict
+    :returns: The merged configuration.
+    """
+    options = _Options(options)
+    if not layers:
+        return {}
+
+    if options.simple:
+        result = layers[0]
+        for layer in layers[1:]:
+            result = _extend(result, layer, False)
+
+        return result
+
+    return _merge(layers[0], 0, list(enumerate(layers))[1:], False, options, ())
+
+
+def merge_into(target, *layers, **options):
+    """
+    Merge configuration layers into a target configuration, in place.
+
+    The target's dictionaries are modified along the changed paths.  Layers
+    are never modified, but their subtrees are inserted into the target
+    as they are.
+
+    :param dict target: The configuration to merge the layers into.
+    :param layers: The configuration dictionaries, lowest precedence first.
+    :param options: The same options as :func:`merge`.  Origins are recorded
+        for the changed leaves only, with the first layer as layer 0.
+    :rtype: dict
+    :returns: The target configuration.
+    """
+    options = _Options(options)
+
+    if options.simple:
+        shared = set() if len(layers) > 1 else None
+        for layer in layers:
+            target = _extend(target, layer, True, shared)
+
+        return target
+
+    return _merge(target, None, list(enumerate(layers)), True, options, ())
@@ -0,0 +1,254 @@
+"""Tracking of the strategies that supplied each configuration value."""
+
+
+from threading import local
+
+
+_MISSING = object()
+
+# The paths written by the strategy being recorded, per thread.
+_active = local()
+
+
+def _collect_leaves(value, path, leaves):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _collect_leaves(item, path + (key,), leaves)
+    elif isinstance(value, (list, tuple)):
+        for i, item in enumerate(value):
+            _collect_leaves(item, path + (i,), leaves)
+    else:
+        leaves[path] = value
+
+
+def _leaves(config):
+    """Return the values of all leaves of a configuration, by path tuple."""
+    leaves = {}
+    _collect_leaves(config, (), leaves)
+
+    return leaves
+
+
+def _source(strategy, path):
+    """Return the file or environment variable a strategy read a value from."""
+    source = getattr(strategy, 'source', None)
+    if source is not None:
+        return source(path)
+
+    return getattr(strategy, 'file_path', None)
+
+
+def _get(config, path):
+    for key in path:
+        try:
+            config = config[key]
+        except (LookupError, TypeError):
+            return _MISSING
+
+    return config
+
+
+def _tree(value, source_id):
+    """Return the records of a value supplied by a single source."""
+    if isinstance(value, dict):
+        return dict((key, _tree(item, source_id)) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        return dict((i, _tree(item, source_id)) for i, item in enumerate(value))
+
+    return source_id
+
+
+def _copy(tree):
+    return dict((key, _copy(node) if isinstance(node, dict) else node) for key, node in tree.items())
+
+
+def recorded_writes():
+    """
+    Return the dictionary the paths written by the strategy being recorded on
+    this thread are collected in, or None if provenance isn't tracked.
+
+    Strategies pass it as the ``origins`` of
+    :func:`~stormpath_config.merge.merge_into`.
+    """
+    return getattr(_active, 'writes', None)
+
+
+def record_write(path):
+    """
+    Record that the strategy being recorded on this thread wrote, or
+    removed, the value at the given path.
+
+    :param tuple path: The path of the value, e.g.
+        ``('client', 'apiKey', 'id')``.
+    """
+    writes = recorded_writes()
+    if writes is not None:
+        writes[path] = None
+
+
+class _Recording(object):
+    """
+    Collects the paths a strategy writes while it's processed.
+
+    Strategies without a true ``records_writes`` attribute don't report
+    their writes, so the leaves of the configuration are compared before and
+    after they're processed instead.
+    """
+    def __init__(self, provenance, strategy, config):
+        self.provenance = provenance
+        self.strategy = strategy
+        self.leaves = None if getattr(strategy, 'records_writes', False) else _leaves(config)
+        self.writes = {}
+        self._outer = None
+
+    def __enter__(self):
+        self._outer = recorded_writes()
+        _active.writes = self.writes
+
+        return self
+
+    def __exit__(self, *exc_info):
+        _active.writes = self._outer
+
+    def _changes(self, config):
+        leaves = _leaves(config)
+        previous = self.leaves
+
+        changes = [path for path, value in leaves.items()
+                   if path not in previous or (previous[path] is not value and previous[path] != value)]
+        changes.extend(path for path in previous if path not in leaves)
+
+        return changes
+
+    def finish(self, config):
+        """
+        Attribute the values the strategy wrote to it.
+
+        :param dict config: The configuration the strategy returned.
+        """
+        paths = self.writes if self.leaves is None else self._changes(config)
+        for path in paths:
+            self.provenance._write(self.strategy, path, _get(config, path))
+
+
+class Provenance(object):
+    """
+    Records which strategy, and which file or environment variable, last
+    set each leaf of a configuration.
+
+    Values are attributed as strategies write them: the built-in strategies
+    report the paths they write, through :func:`record_write` or the
+    ``origins`` of :func:`~stormpath_config.merge.merge_into`, so only these
+    paths are recorded, and writing the same value again still counts.  For
+    strategies that don't report their writes (i.e. don't have a true
+    ``records_writes`` attribute), the leaves of the configuration are
+    compared before and after they're processed.
+
+    Strategies can describe where a value came from by implementing a
+    ``source(path)`` method; otherwise their ``file_path`` attribute, if any,
+    is used.
+
+    The records are a tree shaped like the configuration, whose leaves are
+    small integer ids of ``(strategy name, source)`` pairs.
+    """
+    def __init__(self):
+        self.sources = []
+        self._source_ids = {}
+        self._tree = {}
+
+    def state(self):
+        """Return a copy of the current records, to be passed to :meth:`reset`."""
+        return _copy(self._tree)
+
+    def reset(self, state=None):
+        """Forget all records, or restore records returned by :meth:`state`."""
+        self._tree = {} if state is None else _copy(state)
+
+    def _source_id(self, strategy, path):
+        source = (type(strategy).__name__, _source(strategy, path))
+
+        source_id = self._source_ids.get(source)
+        if source_id is None:
+            source_id = self._source_ids[source] = len(self.sources)
+            self.sources.append(source)
+
+        return source_id
+
+    def recording(self, strategy, config):
+        """
+        Return a context manager that collects the values a strategy writes
+        while it's processed.  Call its ``finish(config)`` method with the
+        configuration the strategy returned.
+
+        :param obj strategy: The strategy about to be processed.
+        :param dict config: The configuration it processes.
+        """
+        return _Recording(self, strategy, config)
+
+    def _write(self, strategy, path, value):
+        node = self._tree
+        for key in path[:-1]:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                if value is _MISSING:
+                    return
+
+                child = node[key] = {}
+
+            node = child
+
+        if value is _MISSING:
+            node.pop(path[-1], None)
+        else:
+            node[path[-1]] = _tree(value, self._source_id(strategy, path))
+
+    def _lookup(self, path):
+        keys = path.split('.')
+
+        # List items are keyed by their index.
+        for candidate in (keys, [int(key) if key.isdigit() else key for key in keys]):
+            node = self._tree
+            for key in candidate:
+                node = node.get(key) if isinstance(node, dict) else None
+
+            if node is not None and not isinstance(node, dict):
+                return node
+
+    def explain(self, path):
+        """
+        Return where the value at the given dotted path came from.
+
+        :param str path: The dotted path of a value, e.g.
+            ``web.login.enabled``.  List items are addressed by index, e.g.
+            ``web.produces.0``.
+        :returns: A ``{'strategy': ..., 'source': ...}`` dictionary, or None
+            if the path isn't a value of the configuration.
+        """
+        source_id = self._lookup(path)
+        if source_id is None:
+            return None
+
+        strategy, source = self.sources[source_id]
+
+        return {'strategy': strategy, 'source': source}
+
+    def _dump(self, tree, path, dump):
+        for key, node in tree.items():
+            if isinstance(node, dict):
+                self._dump(node, path + (key,), dump)
+            else:
+                strategy, source = self.sources[node]
+                dump['.'.join(str(key) for key in path + (key,))] = {'strategy': strategy, 'source': source}
+
+    def dump(self):
+        """
+        Return where every value of the configuration came from.
+
+        :rtype: dict
+        :returns: ``{'strategy': ..., 'source': ...}`` dictionaries, keyed by
+            dotted path.
+        """
+        dump = {}
+        self._dump(self._tree, (), dump)
+
+        return dump
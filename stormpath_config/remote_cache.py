@@ -0,0 +1,129 @@
+"""On-disk cache of configuration resolved from the Stormpath API."""
+
+
+from hashlib import sha1
+from json import dumps, load
+from os import makedirs, remove
+from os.path import isdir, join
+from threading import Lock, Thread
+from time import time
+
+from . import log
+from .helpers import _write_atomic
+
+
+class RemoteConfigCache(object):
+    """
+    Caches configuration resolved from the Stormpath API on disk, so it can
+    be shared between processes and survive restarts.
+
+    Entries are fresh for ``ttl`` seconds.  After that, they're stale for
+    another ``stale_ttl`` seconds, during which they're still returned
+    immediately while a background thread fetches a fresh value
+    (stale-while-revalidate).  Older entries are fetched again synchronously.
+
+    :param str directory: The directory to store cache entries in.
+    :param int ttl: Number of seconds an entry is fresh.
+    :param int stale_ttl: Number of seconds an entry can be served stale
+        after it expired.
+    :param clock: A function returning the current time, in seconds.
+    """
+    def __init__(self, directory, ttl=300, stale_ttl=3600, clock=time):
+        self.directory = directory
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._lock = Lock()
+        self._refreshes = {}
+
+    def _path(self, key):
+        return join(self.directory, sha1(dumps(key).encode('utf-8')).hexdigest() + '.json')
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), 'r') as fd:
+                entry = load(fd)
+        except (IOError, OSError, ValueError):
+            return None
+
+        # Guard against hash collisions and foreign files.
+        if entry.get('key') != list(key):
+            return None
+
+        return entry
+
+    def _write(self, key, value):
+        if not isdir(self.directory):
+            try:
+                makedirs(self.directory)
+            except OSError:
+                if not isdir(self.directory):
+                    raise
+
+        data = dumps({'key': list(key), 'created_at': self.clock(), 'value': value})
+        _write_atomic(self._path(key), data.encode('utf-8'))
+
+    def _fetch(self, key, fetch):
+        value = fetch()
+        try:
+            self._write(key, value)
+        except (IOError, OSError, TypeError, ValueError) as e:
+            log.warning('Unable to write remote configuration cache entry to "%s": %s', self.directory, e)
+
+        return value
+
+    def _refresh(self, key, fetch):
+        try:
+            self._fetch(key, fetch)
+        except Exception as e:
+            log.warning('Unable to refresh remote configuration: %s', e)
+        finally:
+            with self._lock:
+                self._refreshes.pop(tuple(key), None)
+
+    def _refresh_in_background(self, key, fetch):
+        with self._lock:
+            if tuple(key) in self._refreshes:
+                return
+
+            thread = Thread(target=self._refresh, args=(key, fetch))
+            thread.daemon = True
+            self._refreshes[tuple(key)] = thread
+
+        thread.start()
+
+    def wait(self, timeout=None):
+        """Wait until all background refreshes are finished."""
+        with self._lock:
+            threads = list(self._refreshes.values())
+
+        for thread in threads:
+            thread.join(timeout)
+
+    def get(self, key, fetch):
+        """
+        Return the cached value for ``key``, fetching it if necessary.
+
+        :param tuple key: The cache key.  Must be JSON serializable.
+        :param fetch: A function that fetches the value from the Stormpath
+            API.  The value must be JSON serializable.
+        :returns: The cached or fetched value.
+        """
+        entry = self._read(key)
+        if entry is not None:
+            age = self.clock() - entry['created_at']
+            if age <= self.ttl:
+                return entry['value']
+
+            if age <= self.ttl + self.stale_ttl:
+                self._refresh_in_background(key, fetch)
+                return entry['value']
+
+        return self._fetch(key, fetch)
+
+    def invalidate(self, key):
+        """Remove the cache entry for ``key``, if any."""
+        try:
+            remove(self._path(key))
+        except OSError:
+            pass
@@ -0,0 +1,341 @@
+"""
+Memory-mapped, read-only configuration, shared between processes.
+
+A configuration is serialized into a compact binary file, which every process
+maps into memory.  The configuration is then accessed through read-only
+mapping and sequence views that decode values from the mapped file on access,
+so all processes on a host share the same (page cache) copy of it, instead of
+holding one deep copy per process whose pages are touched by reference
+counting.
+
+File format (all integers are little endian, offsets are from the start of
+the file)::
+
+    header   magic (8 bytes), root value offset (uint32)
+    None     'N'
+    bool     'T' or 'F'
+    int      'I', int64
+    long     'G', length (uint32), decimal digits
+    float    'D', float64
+    str      'S', length (uint32), UTF-8 bytes
+    dict     'M', count (uint32), count * (key offset, value offset) in
+             insertion order, count * entry number sorted by key bytes
+    list     'L', count (uint32), count * value offset
+"""
+
+
+from mmap import ACCESS_READ, mmap
+from struct import Struct
+
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:
+    from collections import Mapping, Sequence
+
+from .helpers import _write_atomic
+
+try:
+    text_type = unicode
+    integer_types = (int, long)
+except NameError:
+    text_type = str
+    integer_types = (int,)
+
+
+_MAGIC = b'STPCFG1\n'
+_HEADER = Struct('<8sI')
+_UINT = Struct('<I')
+_PAIR = Struct('<II')
+_INT = Struct('<q')
+_FLOAT = Struct('<d')
+
+
+def _encode_text(value):
+    if isinstance(value, bytes):
+        return value
+
+    return value.encode('utf-8')
+
+
+class _Writer(object):
+    """Serializes a configuration into the shared configuration format."""
+    def __init__(self):
+        self.buf = bytearray(_HEADER.size)
+        self.strings = {}
+
+    def _append(self, tag, data=b''):
+        offset = len(self.buf)
+        self.buf += tag
+        self.buf += data
+
+        return offset
+
+    def _write_text(self, value):
+        data = _encode_text(value)
+
+        # Keys and values are repeated a lot, so only store them once.
+        offset = self.strings.get(data)
+        if offset is None:
+            offset = self.strings[data] = self._append(b'S', _UINT.pack(len(data)) + data)
+
+        return offset, data
+
+    def write(self, value):
+        """Write a value, and return its offset."""
+        if value is None:
+            return self._append(b'N')
+
+        if value is True:
+            return self._append(b'T')
+
+        if value is False:
+            return self._append(b'F')
+
+        if isinstance(value, integer_types):
+            if -2 ** 63 <= value < 2 ** 63:
+                return self._append(b'I', _INT.pack(value))
+
+            data = str(value).encode('ascii')
+            return self._append(b'G', _UINT.pack(len(data)) + data)
+
+        if isinstance(value, float):
+            return self._append(b'D', _FLOAT.pack(value))
+
+        if isinstance(value, (bytes, text_type)):
+            return self._write_text(value)[0]
+
+        if isinstance(value, (dict, Mapping)):
+            entries = []
+            for key, item in value.items():
+                if not isinstance(key, (bytes, text_type)):
+                    raise TypeError('Shared configuration keys must be strings, not %r.' % (key,))
+
+                key_offset, key_data = self._write_text(key)
+                entries.append((key_data, key_offset, self.write(item)))
+
+            order = sorted(range(len(entries)), key=lambda i: entries[i][0])
+            data = bytearray(_UINT.pack(len(entries)))
+            for _, key_offset, item_offset in entries:
+                data += _PAIR.pack(key_offset, item_offset)
+            for i in order:
+                data += _UINT.pack(i)
+
+            return self._append(b'M', bytes(data))
+
+        if isinstance(value, (list, tuple, Sequence)):
+            offsets = [self.write(item) for item in value]
+            return self._append(b'L', _UINT.pack(len(offsets)) + b''.join(_UINT.pack(o) for o in offsets))
+
+        raise TypeError('Unable to share configuration value %r.' % (value,))
+
+
+def dumps(config):
+    """
+    Serialize a configuration into the shared configuration format.
+
+    :param dict config: The configuration.  Keys must be strings, and values
+        None, booleans, numbers, strings, dictionaries or lists.
+    :rtype: bytes
+    """
+    writer = _Writer()
+    root = writer.write(config)
+    writer.buf[:_HEADER.size] = _HEADER.pack(_MAGIC, root)
+
+    return bytes(writer.buf)
+
+
+def _read_text(buf, offset):
+    size, = _UINT.unpack_from(buf, offset + 1)
+    return buf[offset + 5:offset + 5 + size]
+
+
+def _read(buf, offset):
+    """Decode the value at the given offset, returning views for containers."""
+    tag = buf[offset:offset + 1]
+
+    if tag == b'S':
+        return _read_text(buf, offset).decode('utf-8')
+
+    if tag == b'M':
+        return SharedMapping(buf, offset)
+
+    if tag == b'L':
+        return SharedSequence(buf, offset)
+
+    if tag == b'I':
+        return _INT.unpack_from(buf, offset + 1)[0]
+
+    if tag == b'D':
+        return _FLOAT.unpack_from(buf, offset + 1)[0]
+
+    if tag == b'N':
+        return None
+
+    if tag == b'T':
+        return True
+
+    if tag == b'F':
+        return False
+
+    if tag == b'G':
+        return int(_read_text(buf, offset))
+
+    raise ValueError('Invalid shared configuration value at offset %d.' % offset)
+
+
+def _thaw(value):
+    if isinstance(value, SharedMapping):
+        return value.to_dict()
+
+    if isinstance(value, SharedSequence):
+        return value.to_list()
+
+    return value
+
+
+class SharedMapping(Mapping):
+    """
+    A read-only view of a dictionary in a shared configuration.
+
+    Lookups are binary searches over the keys, and nested dictionaries and
+    lists are returned as views too.  Iteration follows the original key
+    order.
+    """
+    __slots__ = ('_buf', '_offset', '_count')
+
+    def __init__(self, buf, offset):
+        self._buf = buf
+        self._offset = offset
+        self._count, = _UINT.unpack_from(buf, offset + 1)
+
+    def _entry(self, i):
+        return _PAIR.unpack_from(self._buf, self._offset + 5 + i * _PAIR.size)
+
+    def _sorted_entry(self, i):
+        position = self._offset + 5 + self._count * _PAIR.size + i * _UINT.size
+        return self._entry(_UINT.unpack_from(self._buf, position)[0])
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield _read_text(self._buf, self._entry(i)[0]).decode('utf-8')
+
+    def __getitem__(self, key):
+        if not isinstance(key, (bytes, text_type)):
+            raise KeyError(key)
+
+        data = _encode_text(key)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_offset, value_offset = self._sorted_entry(mid)
+            mid_data = _read_text(self._buf, key_offset)
+
+            if mid_data == data:
+                return _read(self._buf, value_offset)
+
+            if mid_data < data:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        raise KeyError(key)
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.to_dict())
+
+    def to_dict(self):
+        """Return a (mutable) deep copy of the dictionary."""
+        return dict((k, _thaw(v)) for k, v in self.items())
+
+
+class SharedSequence(Sequence):
+    """A read-only view of a list in a shared configuration."""
+    __slots__ = ('_buf', '_offset', '_count')
+
+    def __init__(self, buf, offset):
+        self._buf = buf
+        self._offset = offset
+        self._count, = _UINT.unpack_from(buf, offset + 1)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+
+        if index < 0:
+            index += self._count
+
+        if not 0 <= index < self._count:
+            raise IndexError('Shared configuration list index out of range.')
+
+        offset, = _UINT.unpack_from(self._buf, self._offset + 5 + index * _UINT.size)
+
+        return _read(self._buf, offset)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, SharedSequence)):
+            return NotImplemented
+
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.to_list())
+
+    def to_list(self):
+        """Return a (mutable) deep copy of the list."""
+        return [_thaw(v) for v in self]
+
+
+def loads(data):
+    """
+    Return a read-only view of a serialized shared configuration.
+
+    :param data: The serialized configuration, as returned by :func:`dumps`
+        (``bytes``, or any buffer such as an ``mmap``).
+    :rtype: SharedMapping
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError('Invalid shared configuration.')
+
+    magic, root = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC:
+        raise ValueError('Invalid shared configuration.')
+
+    return _read(data, root)
+
+
+def write_shared(path, config):
+    """
+    Serialize a configuration into a shared configuration file.  The file
+    is replaced atomically, so processes that already mapped the previous
+    file keep using it.
+
+    :param str path: The path of the file to write.
+    :param dict config: The configuration.
+    """
+    _write_atomic(path, dumps(config))
+
+
+def open_shared(path):
+    """
+    Map a shared configuration file into memory, and return a read-only
+    view of it.
+
+    :param str path: The path of the file written by :func:`write_shared`.
+    :rtype: SharedMapping
+    """
+    with open(path, 'rb') as f:
+        buf = mmap(f.fileno(), 0, access=ACCESS_READ)
+
+    return loads(buf)
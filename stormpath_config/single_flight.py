@@ -0,0 +1,103 @@
+"""Coalescing of concurrent identical remote lookups."""
+
+
+from collections import OrderedDict
+from threading import Event, Lock
+from time import time
+
+
+class _Call(object):
+    """An in-flight call, whose outcome is shared by all waiting callers."""
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Makes sure that only one call is in flight for a given key at a time.
+
+    Callers asking for a key that's already being fetched wait for the
+    in-flight call and share its result (or exception).  Completed results are
+    kept in a bounded LRU for ``ttl`` seconds, so later callers get them
+    without calling again.
+
+    :param int max_size: Maximum number of completed results to keep.
+    :param int ttl: Number of seconds a completed result is kept, or None to
+        keep it until it's evicted.
+    :param clock: A function returning the current time, in seconds.
+    """
+    def __init__(self, max_size=128, ttl=300, clock=time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = Lock()
+        self._calls = {}
+        self._results = OrderedDict()
+
+    def _expires_at(self, ttl):
+        ttls = [t for t in (self.ttl, ttl) if t is not None]
+        if not ttls:
+            return None
+
+        return self.clock() + min(ttls)
+
+    def do(self, key, func, ttl=None):
+        """
+        Return the result of ``func()`` for the given key.
+
+        :param key: A hashable key identifying the call.
+        :param func: The function to call if no result is available for the
+            key, and no call is in flight.
+        :param int ttl: Number of seconds the result is kept, if shorter than
+            the ``ttl`` of this group.
+        :returns: The (possibly shared) result of ``func()``.
+        """
+        with self._lock:
+            if key in self._results:
+                result, expires_at = self._results.pop(key)
+                if expires_at is None or self.clock() < expires_at:
+                    self._results[key] = (result, expires_at)
+                    return result
+
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        # BaseExceptions (e.g. KeyboardInterrupt) are shared with the waiting
+        # callers too, and nothing is stored unless the call succeeded.
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._results[key] = (call.result, self._expires_at(ttl))
+                    while len(self._results) > self.max_size:
+                        self._results.popitem(last=False)
+
+            call.done.set()
+
+        return call.result
+
+    def forget(self, key):
+        """Drop the completed result for ``key``, if any."""
+        with self._lock:
+            self._results.pop(key, None)
+
+    def clear(self):
+        """Drop all completed results."""
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,113 @@
+"""Precompiled configuration snapshots."""
+
+
+from hashlib import sha1
+from marshal import dumps, load, version as marshal_version
+from os.path import abspath
+from sys import version_info
+
+from .helpers import _write_atomic
+
+
+# Bump this whenever the snapshot format changes.
+SNAPSHOT_VERSION = 1
+
+_MAGIC = b'STORMPATH-CONFIG-SNAPSHOT\n'
+
+
+def _plain(value):
+    """
+    Convert a configuration value into plain dictionaries and lists, which
+    is what ``marshal`` supports.
+    """
+    if isinstance(value, dict):
+        return dict((k, _plain(v)) for k, v in value.items())
+
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+
+    return value
+
+
+def _hash_file(path):
+    """Return the SHA-1 of a file's contents, or None if it doesn't exist."""
+    try:
+        with open(path, 'rb') as f:
+            return sha1(f.read()).hexdigest()
+    except (IOError, OSError):
+        return None
+
+
+def source_hashes(strategies):
+    """
+    Return the identity and contents hash of the sources of file based load
+    strategies.
+
+    :param list strategies: The file based load strategies.
+    :rtype: list
+    :returns: A ``[strategy class name, file path, contents hash]`` list per
+        strategy.
+    """
+    return [[type(s).__name__, abspath(s.file_path), _hash_file(s.file_path)] for s in strategies]
+
+
+def _header(strategies):
+    return {
+        'version': SNAPSHOT_VERSION,
+        'python': list(version_info[:2]),
+        'marshal': marshal_version,
+        'sources': source_hashes(strategies),
+    }
+
+
+def compile_snapshot(snapshot_path, strategies):
+    """
+    Load the configuration from file based load strategies, and write it to
+    a snapshot file.
+
+    The snapshot is written atomically, so processes reading it concurrently
+    either see the old or the new snapshot.
+
+    :param str snapshot_path: The path of the snapshot file to write.
+    :param list strategies: The file based load strategies (e.g.
+        :class:`~stormpath_config.strategies.LoadFileConfigStrategy`), in the
+        order they're applied.
+    :rtype: dict
+    :returns: The compiled configuration.
+    """
+    header = _header(strategies)
+
+    config = {}
+    for strategy in strategies:
+        config = strategy.process(config)
+
+    _write_atomic(snapshot_path, _MAGIC + dumps(header) + dumps(_plain(config)))
+
+    return config
+
+
+def read_snapshot(snapshot_path, strategies):
+    """
+    Read a configuration snapshot, if it's still up to date.
+
+    A snapshot is up to date if it was written by the same snapshot format
+    and Python version, from the same strategies, and none of their source
+    files changed since.
+
+    :param str snapshot_path: The path of the snapshot file.
+    :param list strategies: The file based load strategies the snapshot was
+        compiled from.
+    :returns: The snapshot configuration, or None if the snapshot doesn't
+        exist or is out of date.
+    """
+    try:
+        with open(snapshot_path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                return None
+
+            if load(f) != _header(strategies):
+                return None
+
+            return load(f)
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
@@ -8,4 +8,5 @@ from .load_apikey_from_config import LoadAPIKeyFromConfigStrategy
 from .load_env_config import LoadEnvConfigStrategy
 from .load_file_config import LoadFileConfigStrategy
 from .load_file_path import LoadFilePathStrategy
+from .load_snapshot import LoadSnapshotStrategy
 from .validate_client_config import ValidateClientConfigStrategy
@@ -1,7 +1,86 @@
+from copy import deepcopy
 from json import dumps
-from logging import getLogger
+from logging import DEBUG, getLogger
 
 from .. import log
+from ..helpers import _get_path
+from ..merge import merge
+from ..provenance import _leaves
+
+
+# The configuration values that are never logged.
+REDACTED_PATHS = (
+    'apiKey.secret',
+    'client.apiKey.secret',
+    'client.proxy.password',
+)
+
+_REDACTED = '********'
+
+
+def _redact(config, paths):
+    """Return the configuration with the given values replaced by a placeholder."""
+    for path in paths:
+        if _get_path(config, path) is not None:
+            override = _REDACTED
+            for key in reversed(path.split('.')):
+                override = {key: override}
+
+            config = merge(config, override)
+
+    return config
+
+
+class _ConfigMessage(object):
+    """
+    A log message that only serializes the configuration when it's
+    formatted, i.e. when a handler actually emits it.
+
+    The configuration is modified in place by later strategies, so the
+    redacted copy that is serialized is taken right away.
+    """
+    def __init__(self, section, config, redact):
+        self.section = section
+        self.config = deepcopy(_redact(config, redact))
+
+    def _body(self):
+        return dumps(self.config, sort_keys=True, indent=4, separators=(',', ': '))
+
+    def __str__(self):
+        message = ''
+        if self.section is not None:
+            message = '%s:\n' % self.section
+
+        return '%s%s\n' % (message, self._body())
+
+
+class _DiffMessage(_ConfigMessage):
+    """A log message that lists the values that changed since the previous one."""
+    def __init__(self, section, previous, leaves, redact):
+        self.section = section
+        self.redact = redact
+        self.previous = previous
+        self.leaves = leaves
+
+    def _format(self, path, value):
+        dotted = '.'.join(str(key) for key in path)
+        if dotted in self.redact and value is not None:
+            value = _REDACTED
+
+        return '%s = %s' % (dotted, dumps(value, sort_keys=True))
+
+    def _body(self):
+        lines = []
+
+        for path in sorted(set(self.previous) | set(self.leaves), key=lambda p: [str(k) for k in p]):
+            if path not in self.leaves:
+                lines.append('- %s' % '.'.join(str(key) for key in path))
+            elif path not in self.previous:
+                lines.append('+ %s' % self._format(path, self.leaves[path]))
+            elif self.previous[path] != self.leaves[path]:
+                lines.append('~ %s' % self._format(path, self.leaves[path]))
+
+        return '\n'.join(lines) if lines else '(no changes)'
 
 
 class DebugConfigStrategy(object):
@@ -13,20 +92,41 @@ class DebugConfigStrategy(object):
 
     If no logger is supplied, the 'python-config' logger will be used by
     default.
+
+    Nothing is serialized unless the logger is enabled for debug messages,
+    and even then only when a handler formats the message.  Secrets (see
+    :data:`REDACTED_PATHS`) are replaced by a placeholder.
+
+    :param str logger: The name of the logger to use.
+    :param str section: A title to log before the configuration.
+    :param bool diff_only: Whether to only log the values that were added,
+        removed or changed since this strategy last logged, instead of the
+        whole configuration.
+    :param redact: The dotted paths of the values that must not be logged.
     """
-    def __init__(self, logger=None, section=None):
+    records_writes = True
+
+    def __init__(self, logger=None, section=None, diff_only=False, redact=REDACTED_PATHS):
         self.section = section
+        self.diff_only = diff_only
+        self.redact = tuple(redact)
+        self._previous = {}
         if logger is None:
             self.log = log
         else:
             self.log = getLogger(logger)
 
     def process(self, config):
-        message = ''
-        if self.section is not None:
-            message = '%s:\n' % self.section
+        if not self.log.isEnabledFor(DEBUG):
+            return config
 
-        message = "%s%s\n" % (message, dumps(config, sort_keys=True, indent=4, separators=(',', ': ')))
-        self.log.debug(message)
+        if self.diff_only:
+            # The configuration is modified in place by later strategies, so
+            # the values are captured now.
+            leaves = _leaves(config)
+            self.log.debug(_DiffMessage(self.section, self._previous, leaves, self.redact))
+            self._previous = leaves
+        else:
+            self.log.debug(_ConfigMessage(self.section, config, self.redact))
 
         return config
@@ -1,3 +1,17 @@
+from copy import deepcopy
+from threading import current_thread
+
+from ..helpers import _RequestCounter, _count_requests, _resolve_remote
+from ..merge import merge_into
+from ..provenance import recorded_writes
+
+
+# There's at most one application named "Stormpath", so a page of three
+# applications is enough to find out whether a tenant has more than one other
+# application.
+_DEFAULT_APPLICATION_PAGE_SIZE = 3
+
+
 def _resolve_application_by_href(client, config, href):
     """
     Finds and returns an Application object given an Application href.  Will
@@ -39,12 +53,20 @@ def _resolve_default_application(client, config):
     """
     If there are only two Applications and one of them is the Stormpath
     Application, then use the other one as default.
+
+    Applications are requested in small pages, and the search stops as soon
+    as a second non-Stormpath Application is seen, so only one page is
+    fetched regardless of the number of Applications in the tenant.
     """
     default_app = None
     message = """Could not automatically resolve a Stormpath Application.
     Please specify your Stormpath Application in your configuration."""
 
-    for app in client.applications:
+    applications = client.applications
+    if hasattr(applications, 'query'):
+        applications = applications.query(limit=_DEFAULT_APPLICATION_PAGE_SIZE)
+
+    for app in applications:
         if app.name != 'Stormpath':
             # Check if we have already found non-Stormpath app.
             # If there is more than one non-Stormpath app, we can't
@@ -63,24 +85,83 @@ def _resolve_default_application(client, config):
 class EnrichClientFromRemoteConfigStrategy(object):
     """Retrieves Stormpath settings from the API service, and ensures
     the local configuration object properly reflects these settings.
+
+    If a :class:`~stormpath_config.remote_cache.RemoteConfigCache` is given,
+    the resolved application name and href are cached by API key ID and
+    application href or name.  If a
+    :class:`~stormpath_config.single_flight.SingleFlight` is given, concurrent
+    lookups of the same application with the same credentials share a single
+    request.
+
+    The number of remote requests made by the last call to ``process()`` (for
+    the default application, the number of pages of applications fetched) is
+    available as ``request_count``.
     """
-    def __init__(self, client_factory):
+    run_at_end = True
+    records_writes = True
+
+    def __init__(self, client_factory, cache=None, single_flight=None):
         self.client_factory = client_factory
+        self.cache = cache
+        self.single_flight = single_flight
+        self.request_count = 0
 
-    def process(self, config):
+    def _fetch(self, config, href, name, counter):
+        client = _count_requests(self.client_factory(config))
+
+        with counter:
+            if href:
+                return [_resolve_application_by_href(client, config, href), href]
+            elif name:
+                return [name, _resolve_application_by_name(client, config, name)]
+
+            return list(_resolve_default_application(client, config))
+
+    def _resolve(self, config, href, name, counter):
+        if self.cache is None and self.single_flight is None:
+            return self._fetch(config, href, name, counter)
+
+        api_key = config.get('client', {}).get('apiKey', {})
+        key = ('application', api_key.get('id'), href or None, name or None)
+
+        # The value may be fetched by another thread, or refreshed in the
+        # background, after the configuration was modified by other
+        # strategies.  Background refreshes aren't made by this call, so
+        # their requests aren't counted.
+        snapshot = deepcopy(config)
+        caller = current_thread()
+
+        def fetch():
+            return self._fetch(snapshot, href, name, counter if current_thread() is caller else _RequestCounter())
+
+        return _resolve_remote(key, api_key.get('secret'), fetch, self.cache, self.single_flight)
+
+    def overlay(self, config):
+        """
+        Resolve the application, and return the values this strategy merges
+        into the configuration, without modifying it.
+
+        :rtype: dict
+        """
         if config.get('skipRemoteConfig'):
-            return config
+            return {}
 
         application = config.get('application', {})
-        client = self.client_factory(config)
-
         href, name = application.get('href'), application.get('name')
+        counter = _RequestCounter()
+
+        try:
+            resolved_name, resolved_href = self._resolve(config, href, name, counter)
+        finally:
+            # Only assigned on the calling thread, once its requests are done.
+            self.request_count = counter.count
 
         if href:
-            config['application']['name'] = _resolve_application_by_href(client, config, href)
+            return {'application': {'name': resolved_name}}
         elif name:
-            config['application']['href'] = _resolve_application_by_name(client, config, name)
-        else:
-            config['application']['name'], config['application']['href'] = _resolve_default_application(client, config)
+            return {'application': {'href': resolved_href}}
+
+        return {'application': {'name': resolved_name, 'href': resolved_href}}
 
-        return config
+    def process(self, config):
+        return merge_into(config, self.overlay(config), origins=recorded_writes())
@@ -1,10 +1,14 @@
-from ..helpers import _extend_dict
+from ..merge import merge_into
+from ..provenance import recorded_writes
 
 
 class EnrichIntegrationConfigStrategy(object):
     """Represents a strategy that enriches the configuration (post
     loading).
     """
+    depends_on = ('website', 'api', 'web')
+    records_writes = True
+
     def __init__(self, user_config):
         self.user_config = user_config
 
@@ -41,5 +45,5 @@ class EnrichIntegrationConfigStrategy(object):
             for feature in (web_features_to_enable - user_configured_features)
         }
 
-        _extend_dict(config, {'web': web_features})
+        merge_into(config, {'web': web_features}, origins=recorded_writes())
         return config
@@ -1,6 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 from datetime import timedelta
+from threading import current_thread
+from timeit import default_timer
 
-from ..helpers import _extend_dict, to_camel_case
+from ..helpers import _RequestCounter, _count_requests, _resolve_remote, to_camel_case
+from ..merge import merge, merge_into
+from ..provenance import record_write, recorded_writes
+
+
+# The page size used when fetching collections with their items expanded.
+_PAGE_SIZE = 100
 
 
 def _resolve_application(client, config):
@@ -108,6 +118,68 @@ def _enrich_with_directory_policies(directory, config):
     }
 
 
+def _enrich_with_default_directory_policies(application, config):
+    """
+    Given a Stormpath Application, and a fully populated Stormpath
+    configuration, find and retrieve the Policies of the Application's default
+    Account Store.
+
+    :param obj application: The Stormpath Application.
+    :param dict config: The fully populated Stormpath configuration.
+    :rtype: dict or None
+    :returns: The Directory Policy configuration, or None.
+    """
+    directory = _resolve_directory(application)
+    if directory is None:
+        return None
+
+    return _enrich_with_directory_policies(directory, config)
+
+
+def _timed(timings, counter, name, func, *args):
+    """
+    Call a function, record how long it took, and count the remote requests
+    it made.
+
+    :param dict timings: The dictionary to record the timing in.
+    :param obj counter: The :class:`~stormpath_config.helpers._RequestCounter`
+        to count the requests with.
+    :param str name: The name to record the timing under.
+    :param func: The function to call.
+    :returns: The value returned by the function.
+    """
+    start = default_timer()
+    try:
+        with counter:
+            return func(*args)
+    finally:
+        timings[name] = default_timer() - start
+
+
+def _iter_providers(application):
+    """
+    Given a Stormpath Application, yield the Provider of each Directory mapped
+    to the Application.
+
+    If the client supports querying collections, the Application's Account
+    Store Mappings are fetched with their Account Stores expanded, so only the
+    Providers of the mapped Directories are fetched one by one.  Otherwise
+    each mapped Account Store is fetched as well.
+
+    :param obj application: The Stormpath Application.
+    """
+    account_store_mappings = application.account_store_mappings
+    if hasattr(account_store_mappings, 'query'):
+        account_store_mappings = account_store_mappings.query(expand='accountStore', limit=_PAGE_SIZE)
+
+    for account_store_mapping in account_store_mappings:
+        account_store = account_store_mapping.account_store
+
+        # Groups don't have a provider.
+        if hasattr(account_store, 'provider'):
+            yield account_store.provider
+
+
 def _enrich_with_social_providers(application, config):
     """
     Given a Stormpath Application, and a fully populated Stormpath
@@ -126,12 +198,8 @@ def _enrich_with_social_providers(application, config):
         }
     }
 
-    for account_store_mapping in application.account_store_mappings:
-        # Iterate directories
-        if not hasattr(account_store_mapping.account_store, 'provider'):
-            continue
-
-        remote_provider = dict(account_store_mapping.account_store.provider)
+    for provider in _iter_providers(application):
+        remote_provider = dict(provider)
         provider_id = remote_provider['provider_id']
 
         # If the provider isn't a Stormpath, AD, or LDAP directory
@@ -149,7 +217,7 @@ def _enrich_with_social_providers(application, config):
             if 'uri' not in local_provider:
                 local_provider['uri'] = '/callbacks/%s' % provider_id
 
-            _extend_dict(local_provider, remote_provider)
+            merge_into(local_provider, remote_provider)
             social_config['web']['social'][provider_id] = local_provider
 
     return social_config
@@ -158,25 +226,134 @@ def _enrich_with_social_providers(application, config):
 class EnrichIntegrationFromRemoteConfigStrategy(object):
     """Retrieves Stormpath settings from the API service, and ensures
     the local configuration object properly reflects these settings.
+
+    Once the application is resolved, its OAuth policy, social providers and
+    directory policies are fetched concurrently through ``executor`` (a
+    ``concurrent.futures.Executor``, by default a thread pool created for
+    each call), and merged into the configuration in that order.  The time
+    each fetch took is available in ``timings`` after each call, and the
+    number of remote requests each fetch made in ``requests``.
+
+    If a :class:`~stormpath_config.remote_cache.RemoteConfigCache` is given,
+    the fetched settings are cached by API key ID and application href.  If a
+    :class:`~stormpath_config.single_flight.SingleFlight` is given, concurrent
+    fetches for the same application with the same credentials share a single
+    set of requests.
+
+    The fetched OAuth policy replaces the one in the configuration, rather
+    than being merged into it, so the policy is listed in ``replaces`` for
+    :class:`~stormpath_config.loader.MultiTenantConfigLoader`.
     """
-    def __init__(self, client_factory):
+    run_at_end = True
+    records_writes = True
+    replaces = ('application.oAuthPolicy',)
+
+    def __init__(self, client_factory, executor=None, cache=None, single_flight=None):
         self.client_factory = client_factory
+        self.executor = executor
+        self.cache = cache
+        self.single_flight = single_flight
+        self.timings = {}
+        self.requests = {}
+
+    @property
+    def request_count(self):
+        """The number of remote requests made by the last call to ``process()``."""
+        return sum(self.requests.values())
+
+    def _fetch_all(self, executor, fetches, timings, counters):
+        futures = [executor.submit(_timed, timings, counters[name], name, func, *args)
+                   for name, func, args in fetches]
+        return [future.result() for future in futures]
+
+    def _fetch(self, config, stats):
+        """
+        Fetch the remote settings, and store the time each fetch took and the
+        number of requests it made in ``stats``.
+        """
+        client = _count_requests(self.client_factory(config))
+        timings = {}
+
+        counters = dict((name, _RequestCounter()) for name in
+                        ('application', 'oauth_policy', 'social_providers', 'directory_policies'))
+
+        try:
+            application = _timed(
+                timings, counters['application'], 'application', _resolve_application, client, config)
+            fetches = [
+                ('oauth_policy', _enrich_with_oauth_policy, (application, config)),
+                ('social_providers', _enrich_with_social_providers, (application, config)),
+                ('directory_policies', _enrich_with_default_directory_policies, (application, config)),
+            ]
+
+            if self.executor is not None:
+                return self._fetch_all(self.executor, fetches, timings, counters)
+
+            with ThreadPoolExecutor(max_workers=len(fetches)) as executor:
+                return self._fetch_all(executor, fetches, timings, counters)
+        finally:
+            stats['timings'] = timings
+            stats['requests'] = dict((name, counter.count) for name, counter in counters.items())
+
+    def _results(self, config):
+        """
+        Fetch the remote settings, or return None if there's nothing to fetch.
+
+        The timings and request counts of the fetches made by this call are
+        only assigned on the calling thread, once it's done.
+        """
+        stats = {}
+        try:
+            return self._resolve(config, stats)
+        finally:
+            self.timings = stats.get('timings', {})
+            self.requests = stats.get('requests', {})
+
+    def _resolve(self, config, stats):
+        if config.get('skipRemoteConfig') or 'href' not in config.get('application', {}):
+            return None
+
+        if self.cache is None and self.single_flight is None:
+            return self._fetch(config, stats)
+
+        api_key = config.get('client', {}).get('apiKey', {})
+        key = ('integration', api_key.get('id'), config['application']['href'])
+
+        # The value may be fetched by another thread, or refreshed in the
+        # background, after the configuration was modified by other
+        # strategies.  Background refreshes aren't made by this call, so
+        # they're not reported.
+        snapshot = deepcopy(config)
+        caller = current_thread()
+
+        def fetch():
+            return self._fetch(snapshot, stats if current_thread() is caller else {})
+
+        return _resolve_remote(key, api_key.get('secret'), fetch, self.cache, self.single_flight)
+
+    def overlay(self, config):
+        """
+        Fetch the remote settings, and return the values this strategy
+        merges into the configuration, without modifying it.
+
+        :rtype: dict
+        """
+        results = self._results(config)
+        if results is None:
+            return {}
+
+        oauth_policy, social_config, policy_config = results
+
+        return merge({'application': {'oAuthPolicy': oauth_policy}}, social_config or {}, policy_config or {})
 
     def process(self, config):
-        if config.get('skipRemoteConfig'):
-            return config
-
-        client = self.client_factory(config)
-
-        if 'href' in config.get('application', {}):
-            application = _resolve_application(client, config)
-            config['application']['oAuthPolicy'] = _enrich_with_oauth_policy(application, config)
-            social_config = _enrich_with_social_providers(application, config)
-            if social_config:
-                _extend_dict(config, social_config)
-            directory = _resolve_directory(application)
-            policy_config = _enrich_with_directory_policies(directory, config)
-            if policy_config:
-                _extend_dict(config, policy_config)
+        results = self._results(config)
+
+        if results is not None:
+            oauth_policy, social_config, policy_config = results
+
+            config['application']['oAuthPolicy'] = oauth_policy
+            record_write(('application', 'oAuthPolicy'))
+            merge_into(config, social_config or {}, policy_config or {}, origins=recorded_writes())
 
         return config
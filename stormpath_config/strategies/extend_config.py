@@ -1,13 +1,34 @@
-from ..helpers import _extend_dict
+from ..frozen import thaw
+from ..merge import merge_into
+from ..provenance import recorded_writes
 
 
 class ExtendConfigStrategy(object):
     """Represents a strategy that extends the configuration."""
+    records_writes = True
+
     def __init__(self, extend_with):
         self.extend_with = extend_with
 
+    def fingerprint(self):
+        """
+        Return the identity of the object the configuration is extended
+        with.  Replacing ``extend_with`` changes the fingerprint, mutating it
+        in place doesn't.
+        """
+        return id(self.extend_with)
+
+    def overlay(self, config=None):
+        """
+        Return the values this strategy merges into the configuration,
+        without modifying it.
+        """
+        return self.extend_with
+
     def process(self, config=None):
         if config is None:
             config = {}
 
-        return _extend_dict(config, self.extend_with)
+        # Copy extend_with, so that the configuration never aliases it, and
+        # later strategies don't modify it.
+        return merge_into(config, thaw(self.extend_with), origins=recorded_writes())
@@ -1,4 +1,5 @@
 from ..helpers import _load_properties
+from ..provenance import record_write
 from .load_file_path import LoadFilePathStrategy
 
 
@@ -6,12 +7,13 @@ class LoadAPIKeyConfigStrategy(LoadFilePathStrategy):
     """Represents a strategy that loads API keys from a .properties
     file into the configuration.
     """
-    def _process_file_path(self, config):
+    def _read_file_path(self):
         try:
-            properties_config = _load_properties(self.file_path)
+            return _load_properties(self.file_path)
         except Exception as e:
-            raise Exception('Error parsing config "%s".\nDetails: %s' % (self.file_path, e.message))
+            raise Exception('Error parsing config "%s".\nDetails: %s' % (self.file_path, e))
 
+    def _apply(self, config, properties_config):
         if not self.must_exist and len(properties_config.items()) == 0:
             return config
 
@@ -27,5 +29,7 @@ class LoadAPIKeyConfigStrategy(LoadFilePathStrategy):
         config['client']['apiKey'].setdefault('secret', None)
         config['client']['apiKey']['id'] = api_key_id
         config['client']['apiKey']['secret'] = api_key_secret
+        record_write(('client', 'apiKey', 'id'))
+        record_write(('client', 'apiKey', 'secret'))
 
         return config
@@ -1,3 +1,4 @@
+from ..provenance import record_write
 from .load_apikey_config import LoadAPIKeyConfigStrategy
 
 
@@ -5,6 +6,19 @@ class LoadAPIKeyFromConfigStrategy(object):
     """Represents a strategy that loads an API key specified in config
     into the configuration.
     """
+    depends_on = ('client.apiKey.file',)
+    records_writes = True
+
+    def __init__(self):
+        self._file_strategies = {}
+
+    def fingerprint(self):
+        """
+        Return the fingerprints of all API key files this strategy has
+        loaded so far.
+        """
+        return tuple(self._file_strategies[path].fingerprint() for path in sorted(self._file_strategies))
+
     def process(self, config=None):
         if config is None:
             config = {}
@@ -12,7 +26,9 @@ class LoadAPIKeyFromConfigStrategy(object):
         api_key_file = config.get('client', {}).get('apiKey', {}).get('file')
         if api_key_file:
             lakcs = LoadAPIKeyConfigStrategy(api_key_file, True)
+            self._file_strategies.setdefault(lakcs.file_path, lakcs)
             config = lakcs.process(config)
             del config['client']['apiKey']['file']
+            record_write(('client', 'apiKey', 'file'))
 
         return config
@@ -1,38 +1,298 @@
+from json import loads
 from os import environ
 
-from flatdict import FlatDict
+from ..helpers import to_camel_case
+from ..provenance import record_write
 
-from ..helpers import _extend_dict
+
+_TRUE = ('1', 'true', 'yes', 'on')
+_FALSE = ('0', 'false', 'no', 'off')
+
+
+def _to_bool(value):
+    value = value.strip().lower()
+    if value in _TRUE:
+        return True
+
+    if value in _FALSE:
+        return False
+
+    raise ValueError('%r is not a boolean.' % value)
+
+
+def _to_list(value):
+    """Parse a JSON list, or a comma separated list of strings."""
+    if value.lstrip().startswith('['):
+        return loads(value)
+
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _to_str(value):
+    return value
+
+
+# Converters for environment variable values, by type.
+_CONVERTERS = {
+    bool: _to_bool,
+    int: int,
+    float: float,
+    list: _to_list,
+    dict: loads,
+    'json': loads,
+    str: _to_str,
+}
+
+
+def _converter(type_):
+    """Return the converter for the given type, or the type itself if it's a callable."""
+    if type_ in _CONVERTERS:
+        return _CONVERTERS[type_]
+
+    if callable(type_):
+        return type_
+
+    raise ValueError('Unsupported environment variable type: %r.' % (type_,))
+
+
+def _items(config):
+    if isinstance(config, dict):
+        return config.items()
+
+    if isinstance(config, list):
+        return enumerate(config)
+
+    return ()
+
+
+def _value_type(value):
+    """Return the type environment variables overriding a value are converted to."""
+    return str if value is None else type(value)
+
+
+def _get(config, path):
+    """Return the value at the given path, or raise a LookupError."""
+    for key in path:
+        if not isinstance(config, (dict, list)):
+            raise KeyError(key)
+
+        config = config[key]
+
+    return config
+
+
+def _set(config, path, value, env_key):
+    """
+    Set the value at the given path, creating missing sections, or raise a
+    ValueError if the path runs through a value that isn't a section.
+    """
+    parent = config
+    for i, key in enumerate(path):
+        if isinstance(parent, list) and isinstance(key, int) and -len(parent) <= key < len(parent):
+            pass
+        elif not isinstance(parent, dict):
+            raise ValueError('Invalid path for environment variable %s: %s is not a section.' % (
+                env_key, '.'.join(str(k) for k in path[:i])))
+
+        if i == len(path) - 1:
+            parent[key] = value
+        elif isinstance(parent, dict):
+            parent = parent.setdefault(key, {})
+        else:
+            parent = parent[key]
+
+
+def _iter_paths(config, path=(), name=''):
+    """
+    Yield the ``(name, path, value)`` of every value in the configuration,
+    where ``name`` is made of the keys along the path, joined with ``_``.
+    Containers are yielded before their items.
+    """
+    if path:
+        yield name, path, config
+
+    for key, value in _items(config):
+        for item in _iter_paths(value, path + (key,), name + '_' + str(key) if name else str(key)):
+            yield item
+
+
+def _iter_prefixes(config, env_key, name, path=()):
+    """
+    Yield the ``(name, path, value)`` of the values whose environment
+    variable name is ``env_key``, or a prefix of it, in the same order as
+    :func:`_iter_paths`.  Only the matching branches of the configuration are
+    walked.
+    """
+    for key, value in _items(config):
+        child = name + '_' + str(key).upper()
+        if child == env_key or env_key.startswith(child + '_'):
+            yield child, path + (key,), value
+
+            for item in _iter_prefixes(value, env_key, child, path + (key,)):
+                yield item
 
 
 class LoadEnvConfigStrategy(object):
     """Represents a strategy that loads configuration variables from
     the environment into the configuration.
+
+    :param str prefix: The prefix of the environment variables, e.g.
+        ``STORMPATH``.
+    :param dict aliases: Maps environment variable names to the names of
+        the variables that should be read instead.
+    :param dict types: Maps dotted configuration paths to the type values are
+        converted to: ``bool``, ``int``, ``float``, ``list``, ``dict``,
+        ``'json'``, ``str`` or any callable taking a string.  Paths that
+        aren't typed here are converted to the type of their current value.
+        Typed paths are loaded even if they're not in the configuration yet.
+    :param bool discover: Whether to load prefixed environment variables
+        that don't match any configuration path.  They're added under the
+        deepest matching configuration section, with the rest of their name
+        camelCased, e.g. ``STORMPATH_WEB_SOME_SETTING`` becomes
+        ``web.someSetting``.
     """
+    records_writes = True
 
-    def __init__(self, prefix, aliases=None):
+    def __init__(self, prefix, aliases=None, types=None, discover=False):
         self.prefix = prefix
         self.aliases = aliases if aliases is not None else {}
+        self.types = types if types is not None else {}
+        self.discover = discover
+        self._index = None
+
+    def fingerprint(self):
+        """
+        Return a snapshot of all environment variables this strategy can
+        read: those starting with the prefix, and all aliases.
+        """
+        prefix = self.prefix + '_'
+
+        return (
+            tuple(sorted((k, v) for k, v in environ.items() if k.startswith(prefix))),
+            tuple(sorted((alias, environ.get(alias)) for alias in self.aliases.values())),
+        )
+
+    def _env_key(self, name):
+        env_key = '_'.join([self.prefix, name.upper()])
+
+        return self.aliases.get(env_key, env_key)
+
+    def source(self, path):
+        """Return the name of the environment variable for the value at ``path``."""
+        return self._env_key('_'.join(str(key) for key in path))
+
+    def _build_index(self, config):
+        """
+        Map the name of every environment variable that can override a
+        configuration value to the path of that value, the type of the value
+        (or None for typed paths) and its converter.
+        """
+        index = {}
+
+        for name, path, value in _iter_paths(config):
+            if not isinstance(value, dict) and '.'.join(str(key) for key in path) not in self.types:
+                # Lists can be overridden as a whole, as well as item by item.
+                type_ = _value_type(value)
+                index.setdefault(self._env_key(name), (path, type_, _converter(type_)))
+
+        for dotted, type_ in self.types.items():
+            path = tuple(dotted.split('.'))
+            index[self._env_key('_'.join(path))] = (path, None, _converter(type_))
+
+        return index
+
+    def _is_valid(self, config, entry):
+        """Return whether an index entry still matches the configuration."""
+        path, type_, convert = entry
+        if type_ is None:
+            return True
+
+        try:
+            value = _get(config, path)
+        except (LookupError, TypeError):
+            return False
+
+        return not isinstance(value, dict) and _value_type(value) is type_
+
+    def _canonical_keys(self, env_key):
+        """Return the names an environment variable is read for, given the aliases."""
+        keys = [key for key, alias in self.aliases.items() if alias == env_key]
+        if env_key not in self.aliases:
+            keys.append(env_key)
+
+        return keys
+
+    def _matches(self, config, env_key):
+        """Return whether an environment variable overrides a value of the configuration."""
+        for key in self._canonical_keys(env_key):
+            for name, path, value in _iter_prefixes(config, key, self.prefix):
+                if name == key and not isinstance(value, dict):
+                    return True
+
+        return False
+
+    def _discover(self, config, env_key):
+        """Return the configuration path for an unknown environment variable."""
+        section, section_name = (), self.prefix
+
+        for name, path, value in _iter_prefixes(config, env_key, self.prefix):
+            if isinstance(value, dict) and name != env_key and len(name) > len(section_name):
+                section, section_name = path, name
+
+        return section + (to_camel_case(env_key[len(section_name) + 1:].lower()),)
+
+    def _lookup(self, config, env_key):
+        """
+        Return the path and converter of the value an environment variable
+        overrides, or None.
+
+        The index is built for the first configuration, and only built again
+        when an environment variable is set whose entry doesn't match the
+        configuration anymore, or which matches a value the index doesn't
+        know about.
+        """
+        if self._index is None:
+            self._index = self._build_index(config)
+
+        entry = self._index.get(env_key)
+        if entry is None and self._matches(config, env_key) or \
+                entry is not None and not self._is_valid(config, entry):
+            self._index = self._build_index(config)
+            entry = self._index.get(env_key)
+
+        if entry is not None:
+            return entry[0], entry[2]
 
     def process(self, config=None):
         if config is None:
             config = {}
 
-        config = FlatDict(config, delimiter='_')
-        environ_config = {}
+        # Only the environment variables that are set are looked up, so the
+        # configuration is never walked as a whole unless its structure
+        # changed where one of them applies.
+        prefix = self.prefix + '_'
+        names = [k for k in environ.keys() if k.startswith(prefix) and k not in self.aliases]
+        names.extend(alias for alias in self.aliases.values() if not alias.startswith(prefix))
 
-        for key in config.keys():
-            env_key = '_'.join([self.prefix, key.upper()])
-            env_key = self.aliases.get(env_key, env_key)
+        for env_key in names:
             value = environ.get(env_key)
+            if not value:
+                continue
 
-            if value:
-                if isinstance(config[key], int):
-                    value = int(value)
+            match = self._lookup(config, env_key)
+            if match is not None:
+                path, convert = match
+            elif self.discover and env_key not in self.aliases.values():
+                path, convert = self._discover(config, env_key), _to_str
+            else:
+                continue
 
-                environ_config[key] = value
+            try:
+                value = convert(value)
+            except ValueError as e:
+                raise ValueError('Invalid value for environment variable %s: %s' % (env_key, e))
 
-        _extend_dict(config, environ_config)
-        config = config.as_dict()
+            _set(config, path, value, env_key)
+            record_write(path)
 
         return config
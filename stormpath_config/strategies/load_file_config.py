@@ -1,18 +1,56 @@
+from json import loads
+from timeit import default_timer
+
 from yaml import load
 
-from ..helpers import _extend_dict
+# libyaml's loader is an order of magnitude faster than the pure Python one,
+# but is only available if PyYAML was built against libyaml.
+try:
+    from yaml import CSafeLoader as YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as YAMLLoader
+
+from ..merge import merge_into
+from ..provenance import recorded_writes
 from .load_file_path import LoadFilePathStrategy
 
 
 class LoadFileConfigStrategy(LoadFilePathStrategy):
     """Represents a strategy that loads configuration from either a
     JSON or YAML file into the configuration.
+
+    ``.json`` files are parsed with the standard library JSON parser, all
+    other files with the fastest available safe YAML loader.  After a file
+    was parsed, ``parser`` holds the name of the parser that was used, and
+    ``parse_time`` the number of seconds parsing took.
     """
-    def _process_file_path(self, config):
-        f = open(self.file_path, 'r')
+    parser = None
+    parse_time = None
+
+    def _parse(self, data):
+        if self.file_path.lower().endswith('.json'):
+            # JSON files used to be parsed as YAML, which is more lenient
+            # (e.g. single quoted strings), so fall back to it.
+            try:
+                self.parser = 'json'
+                return loads(data)
+            except ValueError:
+                pass
+
+        self.parser = YAMLLoader.__name__
+        return load(data, Loader=YAMLLoader)
+
+    def _read_file_path(self):
+        with open(self.file_path, 'r') as f:
+            data = f.read()
+
+        start = default_timer()
         try:
-            loaded_config = load(f.read())
+            return self._parse(data)
         except Exception as e:
-            raise Exception('Error parsing file "%s".\nDetails: %s' % (self.file_path, e.message))
+            raise Exception('Error parsing file "%s".\nDetails: %s' % (self.file_path, e))
+        finally:
+            self.parse_time = default_timer() - start
 
-        return _extend_dict(config, loaded_config)
+    def _apply(self, config, loaded_config):
+        return merge_into(config, loaded_config, origins=recorded_writes())
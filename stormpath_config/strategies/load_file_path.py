@@ -1,32 +1,99 @@
 from path import Path
 
+from ..helpers import _stat_file
+
 
 class LoadFilePathStrategy(object):
     """Base class for all strategies that load configuration from a
     file.
     """
+    records_writes = True
+
     def __init__(self, file_path, must_exist=False):
         self._file_path = Path(file_path).expand()
         self.file_path = self._file_path.abspath()
         self.must_exist = must_exist
 
-    def _process_file_path(self, config):
+    def fingerprint(self):
+        """
+        Return a fingerprint of the file this strategy loads: its path and,
+        if the file exists, its inode, size and modification time.
+        """
+        signature = _stat_file(self.file_path)
+        if signature is None:
+            return (self.file_path, None)
+
+        return (self.file_path,) + signature
+
+    def _read_file_path(self):
         raise NotImplementedError('Subclasses must implement this method.')
 
-    def process(self, config=None):
-        if config is None:
-            config = {}
+    def _apply(self, config, data):
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def _process_file_path(self, config):
+        return self._apply(config, self._read_file_path())
 
+    def _exists(self):
         if self.file_path.startswith('~'):
             if self.must_exist:
                 raise Exception('Unable to load "%s". Environment home not set.' % self.file_path)
 
-            return config
+            return False
 
         if not self._file_path.exists():
             if self.must_exist:
                 raise Exception('Config file "' + self.file_path + '" doesn\'t exist.')
 
+            return False
+
+        return True
+
+    def read(self):
+        """
+        Read and parse the file, without touching any configuration.  This
+        is safe to call concurrently with other strategies.
+
+        :returns: The parsed file contents, to be passed to :meth:`apply`, or
+            None if the file doesn't exist.
+        """
+        if not self._exists():
+            return None
+
+        return self._read_file_path()
+
+    def apply(self, config, data):
+        """
+        Apply file contents previously returned by :meth:`read` to the
+        configuration.
+
+        :param dict config: The configuration to apply the file contents to.
+        :param data: The file contents returned by :meth:`read`.
+        :rtype: dict
+        :returns: The processed configuration.
+        """
+        if config is None:
+            config = {}
+
+        if data is None:
+            return config
+
+        return self._apply(config, data)
+
+    def overlay(self, config=None):
+        """
+        Return the values this strategy merges into the configuration,
+        without modifying it.
+
+        :rtype: dict
+        """
+        return self.apply({}, self.read())
+
+    def process(self, config=None):
+        if config is None:
+            config = {}
+
+        if not self._exists():
             return config
 
         return self._process_file_path(config)
@@ -0,0 +1,48 @@
+from path import Path
+
+from ..helpers import _stat_file
+from ..merge import merge_into
+from ..provenance import recorded_writes
+from ..snapshot import read_snapshot
+
+
+class LoadSnapshotStrategy(object):
+    """Represents a strategy that loads configuration from a precompiled
+    snapshot of file based load strategies, and falls back to these
+    strategies if the snapshot is missing or out of date.
+
+    Snapshots are written by
+    :func:`~stormpath_config.snapshot.compile_snapshot`, or the
+    ``stormpath-config snapshot`` command.
+
+    :param str snapshot_path: The path of the snapshot file.
+    :param list strategies: The file based load strategies the snapshot is
+        compiled from, in the order they're applied.
+    """
+    records_writes = True
+
+    def __init__(self, snapshot_path, strategies):
+        self.snapshot_path = Path(snapshot_path).expand().abspath()
+        self.strategies = strategies
+        self.used_snapshot = None
+
+    def fingerprint(self):
+        """
+        Return a fingerprint of the snapshot file and of all source files.
+        """
+        return (self.snapshot_path, _stat_file(self.snapshot_path), tuple(s.fingerprint() for s in self.strategies))
+
+    def process(self, config=None):
+        if config is None:
+            config = {}
+
+        snapshot = read_snapshot(self.snapshot_path, self.strategies)
+        self.used_snapshot = snapshot is not None
+
+        if snapshot is not None:
+            return merge_into(config, snapshot, origins=recorded_writes())
+
+        for strategy in self.strategies:
+            config = strategy.process(config)
+
+        return config
@@ -2,6 +2,7 @@ class ValidateClientConfigStrategy(object):
     """Represents a strategy that validates the configuration
     (post loading).
     """
+    records_writes = True
 
     def process(self, config=None):
         if config is None:
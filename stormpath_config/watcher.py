@@ -0,0 +1,311 @@
+"""Hot reloading of configuration files."""
+
+
+from ctypes import CDLL, get_errno
+from ctypes.util import find_library
+from errno import EINTR
+from os import close, read
+from os.path import basename, dirname, isdir
+from select import select
+from struct import Struct
+from sys import platform
+from threading import Event, Lock, Thread
+from timeit import default_timer
+
+from . import log
+from .helpers import _stat_file
+from .loader import _fingerprint
+from .snapshot import _hash_file
+
+
+# inotify(7) constants.
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_EVENTS = (
+    0x00000002 |  # IN_MODIFY
+    0x00000004 |  # IN_ATTRIB
+    0x00000008 |  # IN_CLOSE_WRITE
+    0x00000040 |  # IN_MOVED_FROM
+    0x00000080 |  # IN_MOVED_TO
+    0x00000100 |  # IN_CREATE
+    0x00000200    # IN_DELETE
+)
+_EVENT = Struct('iIII')
+
+
+class _Inotify(object):
+    """
+    A minimal inotify wrapper, watching directories for file changes.
+
+    Directories that don't exist yet are watched once they're created: until
+    then, their closest existing parent is watched instead.
+    """
+    def __init__(self, directories):
+        self._libc = CDLL(find_library('c') or 'libc.so.6', use_errno=True)
+
+        self.fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(get_errno(), 'inotify_init1 failed')
+
+        self.missing = set(directories)
+        self.watch_missing()
+
+    def _add_watch(self, directory):
+        if self._libc.inotify_add_watch(self.fd, directory.encode('utf-8'), _IN_EVENTS) < 0:
+            log.debug('Unable to watch "%s" with inotify.', directory)
+
+    def watch_missing(self):
+        """
+        Watch the directories that were created since they were last
+        checked, and the closest existing parents of the others.
+
+        :returns: Whether any directory was created.
+        :rtype: bool
+        """
+        created = set(directory for directory in self.missing if isdir(directory))
+        for directory in created:
+            self._add_watch(directory)
+
+        self.missing -= created
+        for directory in self.missing:
+            parent = dirname(directory)
+            while parent != dirname(parent) and not isdir(parent):
+                parent = dirname(parent)
+
+            self._add_watch(parent)
+
+        return bool(created)
+
+    def wait(self, timeout):
+        """
+        Wait for file events.
+
+        :param float timeout: The maximum number of seconds to wait.
+        :returns: The names of the files that changed.
+        :rtype: set
+        """
+        try:
+            ready, _, _ = select([self.fd], [], [], timeout)
+        except (IOError, OSError, ValueError) as e:
+            if getattr(e, 'errno', None) == EINTR:
+                return set()
+            raise
+
+        if not ready:
+            return set()
+
+        try:
+            data = read(self.fd, 65536)
+        except OSError:
+            return set()
+
+        names = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            _, _, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            names.add(data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace'))
+            offset += length
+
+        return names
+
+    def close(self):
+        close(self.fd)
+
+
+def _file_paths(strategies):
+    """Return the paths of all files read by the given strategies."""
+    paths = []
+
+    for strategy in strategies:
+        if getattr(strategy, 'file_path', None) is not None:
+            paths.append(strategy.file_path)
+
+        if getattr(strategy, 'snapshot_path', None) is not None:
+            paths.append(strategy.snapshot_path)
+            paths.extend(_file_paths(strategy.strategies))
+
+    return paths
+
+
+class ConfigWatcher(object):
+    """
+    Watches the files (and other inputs, such as environment variables) of
+    a :class:`~stormpath_config.loader.ConfigLoader`, reloads the
+    configuration when they change, and publishes it to subscribers.
+
+    The directories of the files of all file based strategies are watched
+    with inotify on Linux, and all inputs are compared whenever an event
+    arrives, and every ``interval`` seconds.  Bursts of writes are debounced, and the
+    configuration is only reloaded if the contents of a file, or the
+    fingerprint of another input, actually changed.
+
+    :param obj loader: The :class:`~stormpath_config.loader.ConfigLoader`.
+    :param float interval: Number of seconds between polls.
+    :param float debounce: Number of seconds the inputs must be left alone
+        before the configuration is reloaded.
+    :param bool use_inotify: Whether to use inotify when available.
+    """
+    def __init__(self, loader, interval=1.0, debounce=0.2, use_inotify=True):
+        self.loader = loader
+        self.interval = interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify
+        self.paths = _file_paths(loader.strategies)
+        self._others = [s for s in loader.strategies if getattr(s, 'file_path', None) is None]
+        self._subscribers = []
+        self._lock = Lock()
+        self._stopped = Event()
+        self._thread = None
+
+        self._signature = self._stat()
+        self._contents = self._hash()
+        self.config = loader.load()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def subscribe(self, callback):
+        """
+        Call ``callback(config, changes)`` with the new configuration and a
+        :class:`~stormpath_config.diff.ConfigChanges` every time the
+        configuration changes.  Callbacks are called from the watcher
+        thread.
+
+        :returns: The callback, so this can be used as a decorator.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop calling ``callback``."""
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    def _stat(self):
+        return [_stat_file(path) for path in self.paths] + [_fingerprint(s) for s in self._others]
+
+    def _hash(self):
+        return [_hash_file(path) for path in self.paths] + [_fingerprint(s) for s in self._others]
+
+    def check(self):
+        """
+        Reload the configuration if any input changed, and publish it to
+        the subscribers if the configuration changed.
+
+        :returns: The :class:`~stormpath_config.diff.ConfigChanges`, or None
+            if no input changed.
+        """
+        signature = self._stat()
+        if signature == self._signature:
+            return None
+
+        self._signature = signature
+        contents = self._hash()
+        if contents == self._contents:
+            return None
+
+        self._contents = contents
+
+        try:
+            config, changes = self.loader.reload()
+        except Exception as e:
+            log.warning('Unable to reload the configuration, keeping the current one: %s', e)
+            return None
+
+        if changes:
+            self.config = config
+
+            with self._lock:
+                subscribers = list(self._subscribers)
+
+            for callback in subscribers:
+                try:
+                    callback(config, changes)
+                except Exception:
+                    log.exception('Configuration change subscriber %r failed.', callback)
+
+        return changes
+
+    def _settle(self, wait):
+        """
+        Wait until the inputs stop changing for ``debounce`` seconds.
+
+        :param wait: A function waiting up to the given number of seconds,
+            and returning whether a watched file changed in the meantime.
+        """
+        signature = self._stat()
+        quiet_since = default_timer()
+
+        while not self._stopped.is_set():
+            remaining = self.debounce - (default_timer() - quiet_since)
+            if remaining <= 0:
+                return
+
+            if wait(remaining):
+                quiet_since = default_timer()
+                continue
+
+            current = self._stat()
+            if current != signature:
+                signature = current
+                quiet_since = default_timer()
+
+    def _run(self, inotify):
+        names = set(basename(path) for path in self.paths)
+
+        def wait(timeout):
+            if inotify is None:
+                self._stopped.wait(timeout)
+                return False
+
+            changed = bool(inotify.wait(timeout) & names)
+            if inotify.missing and inotify.watch_missing():
+                # Files may have been written to new directories before they
+                # were watched.
+                changed = True
+
+            return changed
+
+        try:
+            while not self._stopped.is_set():
+                # All inputs are compared on every wakeup and timeout: events
+                # about other names (e.g. the ``..data`` symlink swapped by
+                # Kubernetes ConfigMap updates, a queue overflow, or a rename
+                # under another name) can change the watched files too.
+                if not wait(self.interval) and self._stat() == self._signature:
+                    continue
+
+                self._settle(wait)
+                self.check()
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def start(self):
+        """Start watching in a background thread."""
+        inotify = None
+        if self.use_inotify and platform.startswith('linux'):
+            try:
+                inotify = _Inotify(set(dirname(path) for path in self.paths))
+            except (OSError, AttributeError) as e:
+                log.debug('inotify is unavailable, polling instead: %s', e)
+
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, args=(inotify,))
+        self._thread.daemon = True
+        self._thread.start()
+
+        return self
+
+    def stop(self, timeout=None):
+        """Stop watching, and wait for the background thread to exit."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
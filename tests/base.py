@@ -3,6 +3,61 @@ import datetime
 from stormpath.resources.base import DictMixin
 
 
+# The remote requests the fake resources below would make, in order.  Like
+# the Stormpath SDK, linked resources are fetched on first access, and
+# collections are fetched one page at a time.
+requests = []
+
+# The page size the Stormpath API uses by default.
+PAGE_SIZE = 25
+
+
+class HttpExecutor(object):
+    """Sends the requests of all fake clients, i.e. records them."""
+    def request(self, method, url, **kwargs):
+        requests.append(url)
+
+
+class DataStore(object):
+    def __init__(self, executor):
+        self.executor = executor
+
+
+executor = HttpExecutor()
+
+
+def _request(what):
+    executor.request('GET', what)
+
+
+def _pages(what, items, limit=PAGE_SIZE):
+    for offset in range(0, max(len(items), 1), limit):
+        _request(what)
+        for item in items[offset:offset + limit]:
+            yield item
+
+
+class _Link(object):
+    """A linked resource, fetched with a single request on first access."""
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, resource, owner):
+        if resource is None:
+            return self
+
+        resource._materialize()
+        fetched = resource.__dict__.setdefault('_fetched', set())
+        if self.name not in fetched:
+            fetched.add(self.name)
+            _request(self.name)
+
+        return resource.__dict__['_' + self.name]
+
+    def __set__(self, resource, value):
+        resource.__dict__['_' + self.name] = value
+
+
 class StormpathError(RuntimeError):
     def __init__(self, msg, http_status=None):
         super(StormpathError, self).__init__(msg)
@@ -40,23 +95,54 @@ class Strength(DictMixin):
 
 
 class AccountCreationPolicy(object):
+    strength = _Link('strength')
+
+    def _materialize(self):
+        pass
+
     def __init__(self):
         self.strength = Strength()
         self.verification_email_status = 'DISABLED'
 
 
 class PasswordPolicy(object):
+    strength = _Link('strength')
+
+    def _materialize(self):
+        pass
+
     def __init__(self):
         self.strength = Strength()
         self.reset_email_status = 'ENABLED'
 
 
 class AccountStore(object):
-    def __init__(self):
+    """
+    An account store, referenced by href until any of its other attributes
+    is accessed.
+    """
+    password_policy = _Link('password_policy')
+    account_creation_policy = _Link('account_creation_policy')
+    provider = _Link('provider')
+
+    def __init__(self, href='https://api.stormpath.com/v1/directories/a'):
+        self._materialized = False
+        self.href = href
         self.password_policy = PasswordPolicy()
         self.account_creation_policy = AccountCreationPolicy()
         self.provider = Provider()
 
+    def _materialize(self):
+        if not self._materialized:
+            self._materialized = True
+            _request('account_store')
+
+    def __getattr__(self, name):
+        if not name.startswith('_'):
+            self._materialize()
+
+        raise AttributeError(name)
+
 
 class Provider(DictMixin):
     def _ensure_data(self):
@@ -75,26 +161,41 @@ class Provider(DictMixin):
 
 
 class AccountStoreMapping(object):
-    def __init__(self):
-        self.account_store = AccountStore()
+    def __init__(self, account_store=None):
+        self.account_store = account_store or AccountStore()
 
 
 class AccountStoreMappings(object):
     def __init__(self, asms):
         self.asms = asms
+        self.queries = []
+
+    def query(self, limit=PAGE_SIZE, **params):
+        params['limit'] = limit
+        self.queries.append(params)
+
+        for asm in _pages('account_store_mappings', self.asms, limit):
+            if params.get('expand') == 'accountStore':
+                # Expanded account stores come with their page of mappings.
+                asm.account_store._materialized = True
+            yield asm
 
     def __iter__(self):
-        for a in self.asms:
-            yield a
+        return _pages('account_store_mappings', self.asms)
 
 
 class Application(DictMixin):
     name = ''
     href = ''
+    oauth_policy = _Link('oauth_policy')
+    default_account_store_mapping = _Link('default_account_store_mapping')
 
     def _ensure_data(self):
         pass
 
+    def _materialize(self):
+        pass
+
     def __init__(self, name, href):
         self.name = name
         self.href = href
@@ -104,17 +205,28 @@ class Application(DictMixin):
 
 
 class Applications(object):
-    def __init__(self, apps):
+    def __init__(self, apps, limit=PAGE_SIZE):
         self.apps = apps
+        self.limit = limit
+        self.queries = []
+        self.iterated = 0
 
     def get(self, href):
+        _request('application')
         for app in self.apps:
             if app.href == href:
                 return app
 
         raise StormpathError('I don\'t exist.', http_status=404)
 
-    def query(self, name):
+    def query(self, name=None, limit=PAGE_SIZE, **params):
+        if name is None:
+            params['limit'] = limit
+            self.queries.append(params)
+            self.queried = Applications(self.apps, limit)
+            return self.queried
+
+        _request('applications')
         for app in self.apps:
             if app.name == name:
                 return [app]
@@ -122,14 +234,13 @@ class Applications(object):
         return []
 
     def __iter__(self):
-        for a in self.apps:
+        for a in _pages('applications', self.apps, self.limit):
+            self.iterated += 1
             yield a
 
 
 class Client(object):
     def __init__(self, apps):
         self.apps = apps
-
-    @property
-    def applications(self):
-        return Applications(self.apps)
+        self.applications = Applications(apps)
+        self.data_store = DataStore(executor)
@@ -0,0 +1,47 @@
+from os import chmod, listdir, stat, umask
+from os.path import join
+from shutil import rmtree
+from stat import S_IMODE
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from stormpath_config.helpers import _write_atomic
+
+
+class WriteAtomicTest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.path = join(self.directory, 'stormpath.snapshot')
+        self.umask = umask(0o022)
+
+    def tearDown(self):
+        umask(self.umask)
+        rmtree(self.directory)
+
+    def _mode(self):
+        return S_IMODE(stat(self.path).st_mode)
+
+    def test_write_atomic(self):
+        _write_atomic(self.path, b'data')
+
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'data')
+
+        self.assertEqual(listdir(self.directory), ['stormpath.snapshot'])
+
+    def test_new_files_are_only_accessible_by_their_owner(self):
+        _write_atomic(self.path, b'data')
+
+        self.assertEqual(self._mode(), 0o600)
+
+    def test_new_files_are_created_with_the_given_mode(self):
+        _write_atomic(self.path, b'data', mode=0o640)
+
+        self.assertEqual(self._mode(), 0o640)
+
+    def test_existing_files_keep_their_mode(self):
+        _write_atomic(self.path, b'data')
+        chmod(self.path, 0o640)
+        _write_atomic(self.path, b'other data', mode=0o600)
+
+        self.assertEqual(self._mode(), 0o640)
@@ -1,7 +1,7 @@
 """Tests for the DebugConfigStrategy class."""
 
 
-from logging import getLogger
+from logging import DEBUG, INFO, getLogger
 from unittest import TestCase
 
 from mock import patch
@@ -10,28 +10,99 @@ from stormpath_config.strategies import DebugConfigStrategy
 
 
 class DebugConfigStrategyTest(TestCase):
+    def _message(self, debug_mock):
+        return str(debug_mock.call_args[0][0])
+
     def test_debug_config_strategy(self):
         with patch('stormpath_config.strategies.debug_config.log') as log_mock:
             dcs = DebugConfigStrategy(section='test')
             config = dcs.process({'abc': '123'})
 
             self.assertEqual(config, {'abc': '123'})
-            log_mock.debug.assert_called_with('test:\n{\n    "abc": "123"\n}\n')
+            self.assertEqual(self._message(log_mock.debug), 'test:\n{\n    "abc": "123"\n}\n')
 
     def test_debug_config_strategy_without_section(self):
         with patch('stormpath_config.strategies.debug_config.log') as log_mock:
             dcs = DebugConfigStrategy()
             config = dcs.process({'abc': '123'})
 
-            log_mock.debug.assert_called_with('{\n    "abc": "123"\n}\n')
+            self.assertEqual(self._message(log_mock.debug), '{\n    "abc": "123"\n}\n')
             self.assertEqual(config, {'abc': '123'})
 
     def test_debug_config_strategy_with_custom_logger(self):
         logger = getLogger('my.custom.logger')
+        logger.setLevel(DEBUG)
+        self.addCleanup(logger.setLevel, 0)
 
         with patch.object(logger, 'debug') as log_mock:
             dcs = DebugConfigStrategy(logger='my.custom.logger', section='sec')
             config = dcs.process({'abc': '123'})
 
-            log_mock.assert_called_with('sec:\n{\n    "abc": "123"\n}\n')
+            self.assertEqual(self._message(log_mock), 'sec:\n{\n    "abc": "123"\n}\n')
             self.assertEqual(config, {'abc': '123'})
+
+    def test_nothing_is_serialized_if_debug_is_disabled(self):
+        logger = getLogger('my.quiet.logger')
+        logger.setLevel(INFO)
+        self.addCleanup(logger.setLevel, 0)
+
+        with patch('stormpath_config.strategies.debug_config.dumps') as dumps_mock, \
+                patch.object(logger, 'debug') as log_mock:
+            DebugConfigStrategy(logger='my.quiet.logger').process({'abc': '123'})
+
+        self.assertFalse(log_mock.called)
+        self.assertFalse(dumps_mock.called)
+
+    def test_message_is_serialized_lazily(self):
+        with patch('stormpath_config.strategies.debug_config.log') as log_mock, \
+                patch('stormpath_config.strategies.debug_config.dumps', return_value='{}') as dumps_mock:
+            DebugConfigStrategy().process({'abc': '123'})
+
+            self.assertFalse(dumps_mock.called)
+            self._message(log_mock.debug)
+            self.assertTrue(dumps_mock.called)
+
+    def test_message_is_copied_eagerly(self):
+        config = {'abc': '123', 'client': {'apiKey': {'secret': 'secret'}}}
+
+        with patch('stormpath_config.strategies.debug_config.log') as log_mock:
+            DebugConfigStrategy().process(config)
+            config['abc'] = '456'
+            config['client']['apiKey']['secret'] = 'other secret'
+
+            message = self._message(log_mock.debug)
+            self.assertIn('"abc": "123"', message)
+            self.assertIn('"secret": "********"', message)
+
+    def test_secrets_are_redacted(self):
+        config = {'client': {'apiKey': {'id': 'id', 'secret': 'secret'}, 'proxy': {'password': None}}}
+
+        with patch('stormpath_config.strategies.debug_config.log') as log_mock:
+            DebugConfigStrategy().process(config)
+
+            message = self._message(log_mock.debug)
+            self.assertNotIn('"secret": "secret"', message)
+            self.assertIn('"secret": "********"', message)
+            self.assertIn('"password": null', message)
+            self.assertEqual(config['client']['apiKey']['secret'], 'secret')
+
+    def test_diff_only(self):
+        with patch('stormpath_config.strategies.debug_config.log') as log_mock:
+            dcs = DebugConfigStrategy(section='diff', diff_only=True)
+            config = {'a': 1, 'b': {'c': 2}, 'client': {'apiKey': {'secret': 'secret'}}}
+            dcs.process(config)
+
+            self.assertEqual(
+                self._message(log_mock.debug),
+                'diff:\n+ a = 1\n+ b.c = 2\n+ client.apiKey.secret = "********"\n')
+
+            del config['a']
+            config['b']['c'] = 3
+            config['d'] = [True]
+            dcs.process(config)
+
+            self.assertEqual(self._message(log_mock.debug), 'diff:\n- a\n~ b.c = 3\n+ d.0 = true\n')
+
+            dcs.process(config)
+
+            self.assertEqual(self._message(log_mock.debug), 'diff:\n(no changes)\n')
@@ -1,14 +1,20 @@
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Thread
 from unittest import TestCase
 
+from stormpath_config.remote_cache import RemoteConfigCache
+from stormpath_config.single_flight import SingleFlight
 from stormpath_config.strategies import EnrichClientFromRemoteConfigStrategy
 
-from ..base import Application, Client
+from ..base import Application, Client, requests
 
 
 class EnrichClientFromRemoteConfigStrategyTest(TestCase):
     def setUp(self):
         self.stormpath_app = Application('Stormpath', 'https://api.stormpath.com/v1/applications/stormpath')
         self.application = Application('My named application', 'https://api.stormpath.com/v1/applications/a')
+        del requests[:]
 
     def test_enrich_client_from_remote_config_app_by_invalid_href(self):
         def _create_client_from_config(config):
@@ -42,6 +48,7 @@ class EnrichClientFromRemoteConfigStrategyTest(TestCase):
             'href': 'https://api.stormpath.com/v1/applications/a',
             'name': 'My named application'
         })
+        self.assertEqual(ecfrcs.request_count, len(requests))
 
     def test_enrich_client_from_remote_config_app_by_invalid_name(self):
         def _create_client_from_config(config):
@@ -75,6 +82,7 @@ class EnrichClientFromRemoteConfigStrategyTest(TestCase):
             'href': 'https://api.stormpath.com/v1/applications/a',
             'name': 'My named application',
         })
+        self.assertEqual(ecfrcs.request_count, len(requests))
 
     def test_enrich_client_from_remote_config_default_app_no_app(self):
         def _create_client_from_config(config):
@@ -110,3 +118,85 @@ class EnrichClientFromRemoteConfigStrategyTest(TestCase):
             'href': 'https://api.stormpath.com/v1/applications/a',
             'name': 'My named application',
         })
+
+    def test_enrich_client_from_remote_config_default_app_stops_early(self):
+        apps = [self.stormpath_app] + [
+            Application('App %d' % i, 'https://api.stormpath.com/v1/applications/%d' % i) for i in range(100)
+        ]
+        client = Client(apps)
+        config = {'application': {}}
+
+        ecfrcs = EnrichClientFromRemoteConfigStrategy(client_factory=lambda config: client)
+        with self.assertRaises(Exception):
+            ecfrcs.process(config)
+
+        self.assertEqual(client.applications.queries, [{'limit': 3}])
+        self.assertEqual(client.applications.queried.iterated, 3)
+        self.assertEqual(ecfrcs.request_count, 1)
+        self.assertEqual(ecfrcs.request_count, len(requests))
+
+    def test_enrich_client_from_remote_config_default_app_request_count(self):
+        client = Client([self.stormpath_app, self.application])
+        config = {'application': {}}
+
+        ecfrcs = EnrichClientFromRemoteConfigStrategy(client_factory=lambda config: client)
+        ecfrcs.process(config)
+
+        self.assertEqual(config['application']['name'], 'My named application')
+        self.assertEqual(ecfrcs.request_count, 1)
+        self.assertEqual(ecfrcs.request_count, len(requests))
+
+    def test_enrich_client_from_remote_config_with_cache(self):
+        clients = []
+
+        def _create_client_from_config(config):
+            clients.append(Client([self.application]))
+            return clients[-1]
+
+        directory = mkdtemp()
+        self.addCleanup(rmtree, directory)
+
+        for _ in range(2):
+            config = {
+                'application': {'name': 'My named application'},
+                'client': {'apiKey': {'id': 'id', 'secret': 'secret'}},
+            }
+            ecfrcs = EnrichClientFromRemoteConfigStrategy(
+                client_factory=_create_client_from_config, cache=RemoteConfigCache(directory))
+            ecfrcs.process(config)
+
+            self.assertEqual(config['application']['href'], 'https://api.stormpath.com/v1/applications/a')
+
+        self.assertEqual(len(clients), 1)
+
+    def test_enrich_client_from_remote_config_with_single_flight(self):
+        clients = []
+
+        def _create_client_from_config(config):
+            clients.append(Client([self.application]))
+            return clients[-1]
+
+        single_flight = SingleFlight()
+        configs = [{'application': {'name': 'My named application'}} for _ in range(4)]
+
+        def process(config):
+            EnrichClientFromRemoteConfigStrategy(
+                client_factory=_create_client_from_config, single_flight=single_flight).process(config)
+
+        threads = [Thread(target=process, args=(config,)) for config in configs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(clients), 1)
+        for config in configs:
+            self.assertEqual(config['application']['href'], 'https://api.stormpath.com/v1/applications/a')
+
+    def test_overlay(self):
+        config = {'application': {'href': self.application.href}}
+        ecfrcs = EnrichClientFromRemoteConfigStrategy(client_factory=lambda config: Client([self.application]))
+
+        self.assertEqual(ecfrcs.overlay(config), {'application': {'name': 'My named application'}})
+        self.assertEqual(config, {'application': {'href': self.application.href}})
+        self.assertEqual(ecfrcs.overlay({'skipRemoteConfig': True}), {})
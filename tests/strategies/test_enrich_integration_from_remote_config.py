@@ -1,13 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+from shutil import rmtree
+from tempfile import mkdtemp
 from unittest import TestCase
 
+from mock import patch
+
+from stormpath_config.remote_cache import RemoteConfigCache
 from stormpath_config.strategies import EnrichIntegrationFromRemoteConfigStrategy
 
-from ..base import Application, Client
+from ..base import AccountStore, \
+    AccountStoreMapping, \
+    AccountStoreMappings, \
+    Application, \
+    Client, \
+    requests
 
 
 class EnrichIntegrationFromRemoteConfigStrategyTest(TestCase):
     def setUp(self):
         self.application = Application('My named application', 'https://api.stormpath.com/v1/applications/a')
+        del requests[:]
 
     def test_enrich_client_from_remote_config(self):
         def _create_client_from_config(config):
@@ -66,3 +78,119 @@ class EnrichIntegrationFromRemoteConfigStrategyTest(TestCase):
             'forgotPassword': {'enabled': True},
             'verifyEmail': {'enabled': False},
         })
+
+    def test_remote_fetches_are_timed_and_issued_through_executor(self):
+        def _create_client_from_config(config):
+            return Client([self.application])
+
+        config = {
+            'application': {
+                'href': 'https://api.stormpath.com/v1/applications/a'
+            }
+        }
+        executor = ThreadPoolExecutor(max_workers=3)
+
+        ecfrcs = EnrichIntegrationFromRemoteConfigStrategy(
+            client_factory=_create_client_from_config, executor=executor)
+        with patch.object(executor, 'submit', wraps=executor.submit) as submit:
+            config = ecfrcs.process(config)
+        executor.shutdown()
+
+        self.assertEqual(submit.call_count, 3)
+        self.assertEqual(sorted(ecfrcs.timings.keys()),
+            ['application', 'directory_policies', 'oauth_policy', 'social_providers'])
+        self.assertEqual(config['application']['oAuthPolicy']['accessTokenTtl'], 3600.0)
+        self.assertEqual(config['web']['social']['google']['clientId'], 'id')
+        self.assertEqual(config['web']['verifyEmail'], {'enabled': False})
+
+    def _set_account_stores(self, count):
+        self.account_stores = [
+            AccountStore('https://api.stormpath.com/v1/directories/%d' % i) for i in range(count)
+        ]
+        self.application.account_store_mappings = AccountStoreMappings([
+            AccountStoreMapping(account_store) for account_store in self.account_stores
+        ])
+
+    def test_account_stores_are_expanded(self):
+        self._set_account_stores(3)
+        config = {'application': {'href': self.application.href}}
+
+        ecfrcs = EnrichIntegrationFromRemoteConfigStrategy(client_factory=lambda config: Client([self.application]))
+        config = ecfrcs.process(config)
+
+        self.assertEqual(config['web']['social']['google']['clientId'], 'id')
+        self.assertEqual(self.application.account_store_mappings.queries, [{'expand': 'accountStore', 'limit': 100}])
+        # A page of mappings, and the provider of each directory.
+        self.assertEqual(ecfrcs.requests['social_providers'], 4)
+        self.assertEqual(ecfrcs.request_count, len(requests))
+        self.assertEqual(requests.count('provider'), 3)
+        self.assertEqual(requests.count('account_store'), 1)
+
+    def test_account_stores_are_fetched_one_by_one(self):
+        self._set_account_stores(3)
+        self.application.account_store_mappings = list(self.application.account_store_mappings.asms)
+        config = {'application': {'href': self.application.href}}
+
+        ecfrcs = EnrichIntegrationFromRemoteConfigStrategy(client_factory=lambda config: Client([self.application]))
+        config = ecfrcs.process(config)
+
+        self.assertEqual(config['web']['social']['google']['clientId'], 'id')
+        # Each account store and its provider.
+        self.assertEqual(ecfrcs.requests['social_providers'], 6)
+        self.assertEqual(ecfrcs.request_count, len(requests))
+        self.assertEqual(requests.count('account_store'), 4)
+
+    def test_enrich_integration_from_remote_config_with_cache(self):
+        clients = []
+
+        def _create_client_from_config(config):
+            clients.append(Client([self.application]))
+            return clients[-1]
+
+        directory = mkdtemp()
+        self.addCleanup(rmtree, directory)
+        configs = []
+
+        for _ in range(2):
+            config = {'application': {'href': self.application.href}, 'client': {'apiKey': {'id': 'id'}}}
+            ecfrcs = EnrichIntegrationFromRemoteConfigStrategy(
+                client_factory=_create_client_from_config, cache=RemoteConfigCache(directory))
+            configs.append(ecfrcs.process(config))
+
+        self.assertEqual(len(clients), 1)
+        self.assertEqual(configs[0], configs[1])
+        self.assertEqual(configs[1]['web']['social']['google']['uri'], '/callbacks/google')
+
+    def test_background_refreshes_are_not_reported(self):
+        directory = mkdtemp()
+        self.addCleanup(rmtree, directory)
+        now = [1000.0]
+        cache = RemoteConfigCache(directory, ttl=10, clock=lambda: now[0])
+
+        ecfrcs = EnrichIntegrationFromRemoteConfigStrategy(
+            client_factory=lambda config: Client([self.application]), cache=cache)
+        ecfrcs.process({'application': {'href': self.application.href}})
+        self.assertGreater(ecfrcs.request_count, 0)
+        self.assertIn('application', ecfrcs.timings)
+
+        # The stale entry is returned, and refreshed in the background.
+        now[0] += 20
+        del requests[:]
+        ecfrcs.process({'application': {'href': self.application.href}})
+        cache.wait()
+
+        self.assertGreater(len(requests), 0)
+        self.assertEqual(ecfrcs.requests, {})
+        self.assertEqual(ecfrcs.timings, {})
+
+    def test_overlay(self):
+        config = {'application': {'href': self.application.href}}
+        ecfrcs = EnrichIntegrationFromRemoteConfigStrategy(client_factory=lambda config: Client([self.application]))
+
+        overlay = ecfrcs.overlay(config)
+
+        self.assertEqual(config, {'application': {'href': self.application.href}})
+        self.assertEqual(overlay['application']['oAuthPolicy']['accessTokenTtl'], 3600.0)
+        self.assertEqual(overlay['web']['social']['google']['uri'], '/callbacks/google')
+        self.assertEqual(overlay['passwordPolicy']['minLength'], 8)
+        self.assertEqual(ecfrcs.overlay({'application': {}}), {})
@@ -1,5 +1,6 @@
 from unittest import TestCase
 
+from stormpath_config.frozen import freeze
 from stormpath_config.strategies import ExtendConfigStrategy
 
 
@@ -31,3 +32,18 @@ class ExtendConfigStrategyTest(TestCase):
         self.assertEqual(config['client']['cacheManager']['k'], 1)
         self.assertEqual(config['key'], ['value1', 'value2', 'value3'])
         self.assertEqual(config['application']['name'], 'Extended App Name')
+
+    def test_extend_with_is_not_aliased(self):
+        extend_with = {'client': {'apiKey': {'id': 'extended api key id'}}, 'key': ['value1']}
+
+        config = ExtendConfigStrategy(extend_with).process()
+        config['client']['apiKey']['id'] = 'other'
+        config['key'].append('value2')
+
+        self.assertEqual(extend_with, {'client': {'apiKey': {'id': 'extended api key id'}}, 'key': ['value1']})
+
+    def test_extend_with_frozen_config(self):
+        config = ExtendConfigStrategy(freeze({'client': {'apiKey': {'id': 'id'}}})).process()
+        config['client']['apiKey']['secret'] = 'secret'
+
+        self.assertEqual(config, {'client': {'apiKey': {'id': 'id', 'secret': 'secret'}}})
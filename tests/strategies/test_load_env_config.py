@@ -4,6 +4,7 @@ from unittest import TestCase
 from mock import patch
 
 from stormpath_config.strategies import LoadEnvConfigStrategy
+from stormpath_config.strategies.load_env_config import _converter, _iter_paths
 
 
 class LoadEnvConfigStrategyTest(TestCase):
@@ -32,3 +33,142 @@ class LoadEnvConfigStrategyTest(TestCase):
         self.assertEqual(config['client']['cacheManager']['defaultTti'], 301)
         self.assertEqual(config['key'], ['value1', 'value2', 'value3'])
         self.assertEqual(config['application']['name'], 'env application name')
+
+    @patch.dict(environ, {
+        'STORMPATH_CLIENT_APIKEY_SECRET': 'ignored, replaced by alias',
+        'STORMPATH_ALIAS': 'env api key secret',
+        'STORMPATH_KEY_1': 'env value2',
+        'STORMPATH_UNKNOWN': 'unknown',
+        'STORMPATH_APPLICATION_NAME': '',
+    })
+    def test_overlay_only_touches_indexed_keys(self):
+        config = {
+            'client': {'apiKey': {'secret': 'api key secret'}},
+            'application': {'name': 'App Name'},
+            'key': ['value1', 'value2'],
+        }
+
+        lecs = LoadEnvConfigStrategy('STORMPATH', {'STORMPATH_CLIENT_APIKEY_SECRET': 'STORMPATH_ALIAS'})
+        config = lecs.process(config)
+
+        self.assertEqual(config, {
+            'client': {'apiKey': {'secret': 'env api key secret'}},
+            'application': {'name': 'App Name'},
+            'key': ['value1', 'env value2'],
+        })
+
+    @patch.dict(environ, {'STORMPATH_APPLICATION_NAME': 'env application name'})
+    def test_index_is_reused_while_lookups_match(self):
+        lecs = LoadEnvConfigStrategy('STORMPATH')
+
+        lecs.process({'application': {'name': 'first'}})
+        index = lecs._index
+
+        with patch('stormpath_config.strategies.load_env_config._iter_paths', wraps=_iter_paths) as iter_paths:
+            config = lecs.process({'application': {'name': 'second', 'href': None}, 'web': {'basePath': '/'}})
+
+        self.assertIs(lecs._index, index)
+        self.assertFalse(iter_paths.called)
+        self.assertEqual(config['application']['name'], 'env application name')
+
+    @patch.dict(environ, {'STORMPATH_APPLICATION_NAME': 'true', 'STORMPATH_WEB_BASEPATH': '/env'})
+    def test_index_is_rebuilt_when_a_lookup_fails(self):
+        lecs = LoadEnvConfigStrategy('STORMPATH')
+
+        lecs.process({'application': {'name': 'first'}})
+        index = lecs._index
+
+        # A value whose type changed.
+        config = lecs.process({'application': {'name': False}})
+
+        self.assertIsNot(lecs._index, index)
+        self.assertIs(config['application']['name'], True)
+
+        # A value that wasn't in the configuration.
+        index = lecs._index
+        config = lecs.process({'application': {'name': 'second'}, 'web': {'basePath': '/'}})
+
+        self.assertIsNot(lecs._index, index)
+        self.assertEqual(config, {'application': {'name': 'true'}, 'web': {'basePath': '/env'}})
+
+    @patch.dict(environ, {
+        'STORMPATH_WEB_REGISTER_ENABLED': 'false',
+        'STORMPATH_WEB_OAUTH2_RATIO': '0.5',
+        'STORMPATH_WEB_PRODUCES': 'application/json, text/html',
+        'STORMPATH_WEB_SCOPES': '["openid", "email"]',
+        'STORMPATH_CLIENT_CACHEMANAGER_DEFAULTTTL': '301',
+        'STORMPATH_CLIENT_CACHEMANAGER_CACHES': '{"account": {"tti": 60}}',
+        'STORMPATH_CLIENT_CONNECTIONTIMEOUT': '30',
+    })
+    def test_values_are_converted_to_the_configured_types(self):
+        config = {
+            'client': {'cacheManager': {'defaultTtl': 300}},
+            'web': {
+                'register': {'enabled': True},
+                'oauth2': {'ratio': 1.0},
+                'produces': ['application/json'],
+                'scopes': [],
+            },
+        }
+
+        lecs = LoadEnvConfigStrategy('STORMPATH', types={
+            'client.cacheManager.caches': 'json',
+            'client.connectionTimeout': int,
+        })
+        config = lecs.process(config)
+
+        self.assertIs(config['web']['register']['enabled'], False)
+        self.assertEqual(config['web']['oauth2']['ratio'], 0.5)
+        self.assertEqual(config['web']['produces'], ['application/json', 'text/html'])
+        self.assertEqual(config['web']['scopes'], ['openid', 'email'])
+        self.assertEqual(config['client']['cacheManager']['defaultTtl'], 301)
+        self.assertEqual(config['client']['cacheManager']['caches'], {'account': {'tti': 60}})
+        self.assertEqual(config['client']['connectionTimeout'], 30)
+
+    @patch.dict(environ, {'STORMPATH_WEB_REGISTER_ENABLED': 'maybe'})
+    def test_invalid_values_raise(self):
+        lecs = LoadEnvConfigStrategy('STORMPATH')
+
+        with self.assertRaises(ValueError) as cm:
+            lecs.process({'web': {'register': {'enabled': True}}})
+
+        self.assertIn('STORMPATH_WEB_REGISTER_ENABLED', str(cm.exception))
+
+    @patch.dict(environ, {'STORMPATH_CLIENT_APIKEY_ID_X': '1'})
+    def test_paths_through_values_raise(self):
+        lecs = LoadEnvConfigStrategy('STORMPATH', types={'client.apiKey.id.x': int})
+
+        with self.assertRaises(ValueError) as cm:
+            lecs.process({'client': {'apiKey': {'id': 'id'}}})
+
+        self.assertIn('STORMPATH_CLIENT_APIKEY_ID_X', str(cm.exception))
+        self.assertIn('client.apiKey.id', str(cm.exception))
+
+    @patch.dict(environ, {
+        'STORMPATH_WEB_SOME_SETTING': 'value',
+        'STORMPATH_APPLICATION_HREF': 'https://api.stormpath.com/v1/applications/id',
+        'STORMPATH_ALIAS': 'alias value',
+    })
+    def test_discover(self):
+        config = {'web': {'register': {'enabled': True}}}
+
+        config = LoadEnvConfigStrategy('STORMPATH').process(config)
+        self.assertEqual(config, {'web': {'register': {'enabled': True}}})
+
+        lecs = LoadEnvConfigStrategy('STORMPATH', {'STORMPATH_CLIENT_APIKEY_SECRET': 'STORMPATH_ALIAS'}, discover=True)
+        config = lecs.process(config)
+
+        self.assertEqual(config, {
+            'web': {'register': {'enabled': True}, 'someSetting': 'value'},
+            'applicationHref': 'https://api.stormpath.com/v1/applications/id',
+        })
+
+    @patch.dict(environ, {'STORMPATH_APPLICATION_NAME': 'env application name'})
+    def test_converters_are_cached_per_shape(self):
+        lecs = LoadEnvConfigStrategy('STORMPATH')
+
+        with patch('stormpath_config.strategies.load_env_config._converter', wraps=_converter) as converter:
+            lecs.process({'application': {'name': 'first'}})
+            lecs.process({'application': {'name': 'second'}})
+
+        self.assertEqual(converter.call_count, 1)
@@ -1,3 +1,5 @@
+from os import fdopen, remove
+from tempfile import mkstemp
 from unittest import TestCase
 
 from stormpath_config.strategies import LoadFileConfigStrategy
@@ -27,6 +29,14 @@ class LoadFileConfigStrategyTest(TestCase):
         self.assertEqual(config['application']['name'], 'App Name')
         self.assertEqual(config['key'], 'value')
 
+    def test_overlay(self):
+        existing_config = {'application': {'name': 'App Name'}}
+        overlay = LoadFileConfigStrategy('tests/assets/stormpath.yml').overlay(existing_config)
+
+        self.assertEqual(overlay['application']['name'], 'MY_APP')
+        self.assertEqual(existing_config, {'application': {'name': 'App Name'}})
+        self.assertEqual(LoadFileConfigStrategy('tests/assets/i-do-not-exist.yml').overlay(existing_config), {})
+
     def test_load_file_json_config_with_existing_config(self):
         config = {'application': {'name': 'App Name'}, 'key': 'value'}
         lfcs = LoadFileConfigStrategy('tests/assets/stormpath.json')
@@ -38,3 +48,44 @@ class LoadFileConfigStrategyTest(TestCase):
         self.assertEqual(config['client']['connectionTimeout'], None)
         self.assertEqual(config['application']['name'], 'MY_JSON_APP')
         self.assertEqual(config['key'], 'value')
+
+    def test_parser_and_parse_time(self):
+        fd, path = mkstemp(suffix='.json')
+        with fdopen(fd, 'w') as f:
+            f.write('{"client": {"connectionTimeout": 30}}')
+
+        try:
+            lfcs = LoadFileConfigStrategy(path)
+            config = lfcs.process()
+        finally:
+            remove(path)
+
+        self.assertEqual(config, {'client': {'connectionTimeout': 30}})
+        self.assertEqual(lfcs.parser, 'json')
+        self.assertGreaterEqual(lfcs.parse_time, 0)
+
+        # Not strictly JSON, but valid YAML.
+        lfcs = LoadFileConfigStrategy('tests/assets/stormpath.json')
+        lfcs.process()
+
+        self.assertIn(lfcs.parser, ('CSafeLoader', 'SafeLoader'))
+
+        lfcs = LoadFileConfigStrategy('tests/assets/stormpath.yml')
+        lfcs.process()
+
+        self.assertIn(lfcs.parser, ('CSafeLoader', 'SafeLoader'))
+        self.assertGreaterEqual(lfcs.parse_time, 0)
+
+    def test_invalid_file(self):
+        fd, path = mkstemp(suffix='.json')
+        with fdopen(fd, 'w') as f:
+            f.write('{"client": ')
+
+        try:
+            lfcs = LoadFileConfigStrategy(path)
+            with self.assertRaises(Exception) as cm:
+                lfcs.process()
+
+            self.assertIn('Error parsing file "%s"' % path, str(cm.exception))
+        finally:
+            remove(path)
@@ -0,0 +1,118 @@
+"""Tests for the stormpath-config command line tool."""
+
+
+from json import loads
+from os import environ
+from unittest import TestCase
+
+from mock import patch
+
+from stormpath_config import cli
+from stormpath_config.cli import main
+
+from .base import Application, Client, requests
+
+
+class ProfileTest(TestCase):
+    def setUp(self):
+        self.files = ['tests/assets/default_config.yml', 'tests/assets/apiKey.properties']
+
+    def _profile(self, *args):
+        with patch('stormpath_config.cli.print', create=True) as print_mock:
+            status = main(['profile'] + list(args))
+
+        output = '\n'.join(
+            str(call[0][0]) for call in print_mock.call_args_list if call[0] and 'file' not in call[1])
+
+        return status, output
+
+    def _client_factory(self, config):
+        return Client([Application('My application', 'https://api.stormpath.com/v1/applications/a')])
+
+    @patch.dict(environ, {})
+    def test_profile(self):
+        status, output = self._profile(*self.files)
+
+        self.assertEqual(status, 0)
+        lines = output.splitlines()
+        self.assertTrue(lines[0].startswith('strategy'))
+        self.assertTrue(lines[1].startswith('LoadFileConfigStrategy'))
+        self.assertTrue(lines[2].strip().endswith('default_config.yml'))
+        self.assertTrue(lines[-1].startswith('total'))
+
+    @patch.dict(environ, {})
+    def test_profile_json(self):
+        status, output = self._profile('--json', *self.files)
+        report = loads(output)
+
+        self.assertEqual(status, 0)
+        self.assertIsNone(report['error'])
+        self.assertEqual([(s['strategy'], s['phase']) for s in report['steps']], [
+            ('LoadFileConfigStrategy', 'load'),
+            ('LoadAPIKeyFromConfigStrategy', 'post_processing'),
+            ('LoadAPIKeyConfigStrategy', 'load'),
+            ('LoadAPIKeyFromConfigStrategy', 'post_processing'),
+            ('LoadEnvConfigStrategy', 'load'),
+            ('LoadAPIKeyFromConfigStrategy', 'post_processing'),
+            ('ValidateClientConfigStrategy', 'validation'),
+        ])
+        self.assertEqual(report['totals']['size'], report['steps'][-1]['size'])
+        self.assertGreater(report['steps'][0]['size'], 0)
+        self.assertGreater(report['totals']['duration'], 0)
+
+        if cli.tracemalloc is not None:
+            self.assertIsNotNone(report['steps'][0]['allocated'])
+
+    @patch.dict(environ, {'STORMPATH_APPLICATION_HREF': 'https://api.stormpath.com/v1/applications/a'})
+    def test_profile_schedule(self):
+        with patch.object(cli, '_client_factory', self._client_factory):
+            status, output = self._profile('--json', '--remote', '--schedule', *self.files)
+
+        self.assertEqual(status, 0)
+        self.assertEqual([s['strategy'] for s in loads(output)['steps']], [
+            'LoadFileConfigStrategy',
+            'LoadAPIKeyFromConfigStrategy',
+            'LoadAPIKeyConfigStrategy',
+            'LoadEnvConfigStrategy',
+            'EnrichClientFromRemoteConfigStrategy',
+            'EnrichIntegrationFromRemoteConfigStrategy',
+            'ValidateClientConfigStrategy',
+        ])
+
+    @patch.dict(environ, {})
+    def test_profile_without_memory(self):
+        status, output = self._profile('--json', '--no-memory', *self.files)
+
+        self.assertTrue(all(s['allocated'] is None for s in loads(output)['steps']))
+
+    @patch.dict(environ, {})
+    def test_profile_error(self):
+        status, output = self._profile('--json', 'tests/assets/default_config.yml')
+
+        report = loads(output)
+        self.assertEqual(status, 1)
+        self.assertEqual(report['error'], 'API key ID and secret are required.')
+        self.assertEqual(report['steps'][-1]['error'], report['error'])
+
+    @patch.dict(environ, {'STORMPATH_API_KEY_ID': 'env api key id', 'STORMPATH_API_KEY_SECRET': 'env api key secret'})
+    def test_profile_env_aliases(self):
+        with patch.object(cli, 'SEARCH_PATH', ()):
+            status, output = self._profile('--json', '--defaults', 'tests/assets/default_config.yml')
+
+        report = loads(output)
+        self.assertEqual(status, 0)
+        self.assertIsNone(report['error'])
+
+    @patch.dict(environ, {'STORMPATH_APPLICATION_HREF': 'https://api.stormpath.com/v1/applications/a'})
+    def test_profile_remote(self):
+        del requests[:]
+
+        with patch.object(cli, '_client_factory', self._client_factory):
+            status, output = self._profile('--json', '--remote', *self.files)
+
+        report = loads(output)
+        steps = dict((s['strategy'], s) for s in report['steps'])
+        self.assertEqual(status, 0)
+        self.assertEqual(steps['EnrichClientFromRemoteConfigStrategy']['requests'], 1)
+        self.assertGreater(steps['EnrichIntegrationFromRemoteConfigStrategy']['requests'], 1)
+        self.assertEqual(report['totals']['requests'], len(requests))
@@ -0,0 +1,79 @@
+"""Tests for the ClientPool class."""
+
+
+from unittest import TestCase
+
+from mock import MagicMock
+
+from stormpath_config.client_pool import ClientPool
+from stormpath_config.loader import ConfigLoader, MultiTenantConfigLoader
+from stormpath_config.strategies import ExtendConfigStrategy
+
+
+class RemoteStrategy(object):
+    def __init__(self, client_factory):
+        self.client_factory = client_factory
+        self.clients = []
+
+    def process(self, config):
+        self.clients.append(self.client_factory(config))
+        return config
+
+
+class ClientPoolTest(TestCase):
+    def setUp(self):
+        self.pool = ClientPool()
+        self.clients = []
+
+    def _client_factory(self, config):
+        self.clients.append(MagicMock())
+        return self.clients[-1]
+
+    def _config(self, api_key_id='id', **kwargs):
+        client = {'apiKey': {'id': api_key_id, 'secret': 'secret'}, 'baseUrl': 'https://api.stormpath.com/v1'}
+        client.update(kwargs)
+        return {'client': client, 'application': {'name': 'My app'}}
+
+    def test_clients_are_shared_by_client_config(self):
+        factory = self.pool.wrap(self._client_factory)
+        config = self._config()
+        client = factory(config)
+
+        config['application']['name'] = 'My other app'
+        self.assertIs(factory(config), client)
+        self.assertIs(self.pool.wrap(self._client_factory)(self._config()), client)
+        self.assertIsNot(factory(self._config('other id')), client)
+        self.assertIsNot(factory(self._config(baseUrl='https://enterprise.stormpath.io/v1')), client)
+        self.assertEqual(len(self.pool), 3)
+
+    def test_close(self):
+        factory = self.pool.wrap(self._client_factory)
+        factory(self._config())
+        factory(self._config('other id'))
+        self.pool.close()
+
+        self.assertEqual(len(self.pool), 0)
+        for client in self.clients:
+            client.close.assert_called_once_with()
+
+    def test_loader_shares_clients_between_strategies(self):
+        strategies = [RemoteStrategy(self._client_factory), RemoteStrategy(self._client_factory)]
+        with ConfigLoader([ExtendConfigStrategy(self._config())], strategies, client_pool=self.pool) as cl:
+            cl.load()
+            cl.load()
+
+        self.assertEqual(len(self.clients), 1)
+        self.assertEqual(strategies[0].clients + strategies[1].clients, [self.clients[0]] * 4)
+        self.clients[0].close.assert_called_once_with()
+
+    def test_multi_tenant_loader_shares_clients_between_tenants(self):
+        strategies = [RemoteStrategy(self._client_factory), RemoteStrategy(self._client_factory)]
+        with MultiTenantConfigLoader([ExtendConfigStrategy(self._config())], client_pool=self.pool) as loader:
+            loader.add_tenant('a', [ExtendConfigStrategy({'application': {'name': 'App a'}}), strategies[0]])
+            loader.add_tenant('b', [ExtendConfigStrategy({'application': {'name': 'App b'}}), strategies[1]])
+            loader.load('a')
+            loader.load('b')
+
+        self.assertEqual(len(self.clients), 1)
+        self.assertEqual(strategies[0].clients + strategies[1].clients, [self.clients[0]] * 2)
+        self.clients[0].close.assert_called_once_with()
@@ -0,0 +1,101 @@
+"""Tests for the configuration diff."""
+
+
+from unittest import TestCase
+
+from mock import patch
+
+from stormpath_config import diff as diff_module
+from stormpath_config.diff import diff
+from stormpath_config.frozen import freeze
+from stormpath_config.loader import ConfigLoader
+from stormpath_config.strategies import ExtendConfigStrategy
+
+
+class DiffTest(TestCase):
+    def setUp(self):
+        self.old = {
+            'client': {'apiKey': {'id': 'id', 'secret': 'secret'}, 'baseUrl': 'https://api.stormpath.com/v1'},
+            'web': {'oauth2': {'enabled': True}, 'produces': ['application/json']},
+            'application': {'name': 'My app'},
+        }
+        self.new = {
+            'client': {'apiKey': {'id': 'id', 'secret': 'other'}, 'baseUrl': 'https://api.stormpath.com/v1'},
+            'web': {'oauth2': {'enabled': True}, 'produces': ['application/json', 'text/html'], 'login': {}},
+        }
+
+    def test_diff(self):
+        changes = diff(self.old, self.new)
+
+        self.assertEqual(changes.added, {('web', 'login'): {}})
+        self.assertEqual(changes.removed, {('application',): {'name': 'My app'}})
+        self.assertEqual(changes.changed, {
+            ('client', 'apiKey', 'secret'): ('secret', 'other'),
+            ('web', 'produces'): (['application/json'], ['application/json', 'text/html']),
+        })
+        self.assertEqual(changes.paths(), ['application', 'client.apiKey.secret', 'web.login', 'web.produces'])
+        self.assertEqual(len(changes), 4)
+        self.assertTrue(changes)
+
+    def test_no_changes(self):
+        self.assertFalse(diff(self.old, self.old))
+        self.assertFalse(diff(freeze(self.old), freeze(self.old)))
+
+    def test_affects(self):
+        changes = diff(self.old, self.new)
+
+        self.assertTrue(changes.affects('client.apiKey'))
+        self.assertTrue(changes.affects('client.apiKey.secret'))
+        self.assertTrue(changes.affects('web'))
+        self.assertTrue(changes.affects('application.name'))
+        self.assertFalse(changes.affects('web.oauth2'))
+        self.assertFalse(changes.affects('client.baseUrl'))
+
+    def test_shared_subtrees_are_not_compared(self):
+        old = freeze(self.old)
+        new = old.with_override({'client': {'apiKey': {'secret': 'other'}}})
+
+        with patch('stormpath_config.diff._diff', wraps=diff_module._diff) as _diff:
+            changes = diff(old, new)
+
+        self.assertEqual(changes.paths(), ['client.apiKey.secret'])
+        # The root, client and client.apiKey only.
+        self.assertEqual(_diff.call_count, 3)
+
+    def test_equal_frozen_subtrees_are_not_diffed(self):
+        new = dict(self.old, client=dict(self.old['client'], apiKey={'id': 'id', 'secret': 'other'}))
+        old, new = freeze(self.old), freeze(new)
+        self.assertIsNot(old['web'], new['web'])
+
+        with patch('stormpath_config.diff._diff', wraps=diff_module._diff) as _diff:
+            changes = diff(old, new)
+
+        self.assertEqual(changes.paths(), ['client.apiKey.secret'])
+        # The root, client and client.apiKey only.
+        self.assertEqual(_diff.call_count, 3)
+
+    def test_freeze_shares_unchanged_subtrees(self):
+        old = freeze(self.old)
+        new = freeze(dict(self.old, application={'name': 'Other app'}), old)
+
+        self.assertIs(new['client'], old['client'])
+        self.assertIs(new['web'], old['web'])
+        self.assertIsNot(new['application'], old['application'])
+        self.assertIs(freeze(self.old, old), old)
+
+    def test_reload(self):
+        extend = ExtendConfigStrategy(self.old)
+        cl = ConfigLoader([extend], cache=True)
+
+        config, changes = cl.reload()
+        self.assertEqual(config, freeze(self.old))
+        self.assertEqual(changes.paths(), ['application', 'client', 'web'])
+
+        extend.extend_with = self.new
+        config, changes = cl.reload()
+        self.assertEqual(config, freeze(self.new))
+        self.assertEqual(changes.paths(), ['application', 'client.apiKey.secret', 'web.login', 'web.produces'])
+        self.assertIs(cl.last_config, config)
+
+        config, changes = cl.reload()
+        self.assertFalse(changes)
@@ -0,0 +1,70 @@
+"""Tests for the frozen configuration containers."""
+
+
+from copy import deepcopy
+from json import dumps
+from unittest import TestCase
+
+from stormpath_config.frozen import FrozenDict, freeze
+
+
+class FreezeTest(TestCase):
+    def setUp(self):
+        self.config = freeze({'client': {'apiKey': {'id': 'id'}}, 'key': ['value1', 'value2']})
+
+    def test_freeze(self):
+        self.assertTrue(isinstance(self.config, FrozenDict))
+        self.assertTrue(isinstance(self.config['client']['apiKey'], FrozenDict))
+        self.assertEqual(self.config['key'], ('value1', 'value2'))
+
+    def test_frozen_dict_is_immutable(self):
+        with self.assertRaises(TypeError):
+            self.config['key'] = 'value'
+
+        with self.assertRaises(TypeError):
+            self.config['client'].update({'apiKey': None})
+
+        with self.assertRaises(TypeError):
+            del self.config['client']['apiKey']['id']
+
+        config = self.config
+        with self.assertRaises(TypeError):
+            config |= {'key': 'value'}
+
+        self.assertEqual(self.config['key'], ('value1', 'value2'))
+
+    def test_frozen_dict_is_a_dict(self):
+        self.assertEqual(dumps(self.config, sort_keys=True),
+            '{"client": {"apiKey": {"id": "id"}}, "key": ["value1", "value2"]}')
+        self.assertIs(deepcopy(self.config), self.config)
+        self.assertIs(freeze(self.config), self.config)
+
+    def test_frozen_dict_is_hashable(self):
+        other = freeze({'key': ['value1', 'value2'], 'client': {'apiKey': {'id': 'id'}}})
+
+        self.assertEqual(hash(self.config), hash(other))
+        self.assertEqual({self.config: 'cached'}[other], 'cached')
+        self.assertNotEqual(hash(self.config), hash(self.config.with_override({'key': 'value'})))
+
+    def test_with_override(self):
+        config = freeze({'client': {'apiKey': {'id': 'id'}, 'cacheManager': {'defaultTtl': 300}}, 'web': {}})
+        derived = config.with_override({'client': {'apiKey': {'secret': ['secret']}}, 'key': 'value'})
+
+        self.assertEqual(derived, {
+            'client': {'apiKey': {'id': 'id', 'secret': ('secret',)}, 'cacheManager': {'defaultTtl': 300}},
+            'web': {},
+            'key': 'value',
+        })
+        self.assertTrue(isinstance(derived['client']['apiKey'], FrozenDict))
+        self.assertIs(derived['client']['cacheManager'], config['client']['cacheManager'])
+        self.assertIs(derived['web'], config['web'])
+        self.assertNotIn('secret', config['client']['apiKey'])
+
+    def test_thaw(self):
+        config = self.config.thaw()
+        config['client']['apiKey']['id'] = 'other'
+        config['key'].append('value3')
+
+        self.assertEqual(type(config), dict)
+        self.assertEqual(config, {'client': {'apiKey': {'id': 'other'}}, 'key': ['value1', 'value2', 'value3']})
+        self.assertEqual(self.config['client']['apiKey']['id'], 'id')
@@ -0,0 +1,177 @@
+"""Tests for loader hooks."""
+
+
+from unittest import TestCase, skipIf
+
+from stormpath_config.hooks import LOAD, POST_PROCESSING, VALIDATION, Histogram, LoaderHook, ProfilingHook, \
+    TimingCollector, tracemalloc
+from stormpath_config.loader import ConfigLoader
+from stormpath_config.strategies import ExtendConfigStrategy
+
+
+class RecordingHook(LoaderHook):
+    def __init__(self):
+        self.calls = []
+
+    def before(self, event):
+        self.calls.append(('before', event.name, event.phase, event.duration))
+
+    def after(self, event):
+        self.calls.append(('after', event.name, event.phase, event.size_delta, event.exception))
+
+
+class FailingStrategy(object):
+    def process(self, config):
+        raise ValueError('Invalid configuration.')
+
+
+class CountingStrategy(object):
+    def process(self, config):
+        config['count'] = config.get('count', 0) + 1
+        return config
+
+
+class HistogramTest(TestCase):
+    def test_empty(self):
+        histogram = Histogram()
+
+        self.assertEqual(histogram.count, 0)
+        self.assertIsNone(histogram.mean)
+        self.assertIsNone(histogram.percentile(50))
+
+    def test_add(self):
+        histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+        for duration in (0.0005, 0.0005, 0.005, 0.05, 0.5):
+            histogram.add(duration)
+
+        self.assertEqual(histogram.counts, [2, 1, 1, 1])
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.total, 0.556)
+        self.assertEqual(histogram.min, 0.0005)
+        self.assertEqual(histogram.max, 0.5)
+        self.assertEqual(histogram.percentile(40), 0.001)
+        self.assertEqual(histogram.percentile(60), 0.01)
+        self.assertEqual(histogram.percentile(100), 0.5)
+
+    def test_percentile_is_capped_at_max(self):
+        histogram = Histogram(buckets=(1.0,))
+        histogram.add(0.2)
+
+        self.assertEqual(histogram.percentile(99), 0.2)
+
+    def test_to_dict(self):
+        histogram = Histogram(buckets=(1.0,))
+        histogram.add(0.5)
+        histogram.add(2.0)
+
+        stats = histogram.to_dict()
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['buckets'], {'1.0': 1, '+Inf': 1})
+        self.assertEqual(stats['p99'], 2.0)
+
+
+class LoaderHookTest(TestCase):
+    def setUp(self):
+        self.load_strategies = [ExtendConfigStrategy({'a': 1, 'b': {'c': 2}})]
+        self.post_processing_strategies = [CountingStrategy()]
+        self.validation_strategies = [CountingStrategy()]
+
+    def test_hooks_are_called_around_strategies(self):
+        loader = ConfigLoader(self.load_strategies, self.post_processing_strategies, self.validation_strategies)
+        hook = loader.add_hook(RecordingHook())
+
+        config = loader.load()
+
+        self.assertEqual(config, {'a': 1, 'b': {'c': 2}, 'count': 2})
+        self.assertEqual(hook.calls, [
+            ('before', 'ExtendConfigStrategy', LOAD, None),
+            ('after', 'ExtendConfigStrategy', LOAD, 2, None),
+            ('before', 'CountingStrategy', POST_PROCESSING, None),
+            ('after', 'CountingStrategy', POST_PROCESSING, 1, None),
+            ('before', 'CountingStrategy', VALIDATION, None),
+            ('after', 'CountingStrategy', VALIDATION, 0, None),
+        ])
+
+    def test_exceptions_are_reported_and_raised(self):
+        loader = ConfigLoader(self.load_strategies, validation_strategies=[FailingStrategy()])
+        hook = loader.add_hook(RecordingHook())
+
+        self.assertRaises(ValueError, loader.load)
+
+        name, phase, size_delta, exception = hook.calls[-1][1:]
+        self.assertEqual((name, phase, size_delta), ('FailingStrategy', VALIDATION, None))
+        self.assertIsInstance(exception, ValueError)
+
+    def test_remove_hook(self):
+        loader = ConfigLoader(self.load_strategies)
+        hook = loader.add_hook(RecordingHook())
+        loader.remove_hook(hook)
+
+        loader.load()
+
+        self.assertEqual(hook.calls, [])
+
+    def test_cached_strategies_are_not_reported(self):
+        loader = ConfigLoader(self.load_strategies, cache=True)
+        hook = loader.add_hook(RecordingHook())
+
+        loader.load()
+        loader.load()
+
+        self.assertEqual(len(hook.calls), 2)
+        self.assertEqual(loader.cache_stats[self.load_strategies[0]].hits, 1)
+        self.assertGreater(loader.cache_stats[self.load_strategies[0]].recompute_time, 0)
+
+    def test_timing_collector(self):
+        loader = ConfigLoader(self.load_strategies, self.post_processing_strategies,
+                              [FailingStrategy()])
+        collector = loader.add_hook(TimingCollector())
+
+        for _ in range(3):
+            self.assertRaises(ValueError, loader.load)
+
+        summary = dict(((s['strategy'], s['phase']), s) for s in collector.summary())
+        self.assertEqual(sorted(summary), [
+            ('CountingStrategy', POST_PROCESSING),
+            ('ExtendConfigStrategy', LOAD),
+            ('FailingStrategy', VALIDATION),
+        ])
+        self.assertEqual(summary[('ExtendConfigStrategy', LOAD)]['count'], 3)
+        self.assertEqual(summary[('ExtendConfigStrategy', LOAD)]['size_delta'], 6)
+        self.assertEqual(summary[('FailingStrategy', VALIDATION)]['errors'], 3)
+        self.assertEqual(summary[('CountingStrategy', POST_PROCESSING)]['errors'], 0)
+
+        collector.reset()
+        self.assertEqual(collector.summary(), [])
+
+
+class ProfilingHookTest(TestCase):
+    def test_profiling_hook(self):
+        strategy = ExtendConfigStrategy({'a': 1})
+        strategy.request_count = 2
+        loader = ConfigLoader([strategy])
+        profiler = loader.add_hook(ProfilingHook())
+
+        loader.load()
+
+        self.assertEqual(len(profiler.steps), 1)
+        step = profiler.steps[0]
+        self.assertEqual(step['strategy'], 'ExtendConfigStrategy')
+        self.assertEqual(step['phase'], LOAD)
+        self.assertEqual(step['requests'], 2)
+        self.assertEqual(step['size'], 1)
+        self.assertIsNone(step['error'])
+        self.assertIsNone(step['allocated'])
+
+    @skipIf(tracemalloc is None, 'tracemalloc is unavailable')
+    def test_memory(self):
+        loader = ConfigLoader([ExtendConfigStrategy({'a': list(range(1000))})])
+        profiler = loader.add_hook(ProfilingHook())
+
+        tracemalloc.start()
+        try:
+            loader.load()
+        finally:
+            tracemalloc.stop()
+
+        self.assertGreater(profiler.steps[0]['allocated'], 0)
@@ -1,19 +1,35 @@
 """Tests for the ConfigLoader class."""
 
 
-from os import environ
-from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from json import dumps
+from os import close, environ, remove, stat, utime
+from sys import version_info
+from tempfile import mkstemp
+from threading import Event, Thread
+from unittest import TestCase, skipIf
 
 from mock import patch
 
-from stormpath_config.loader import ConfigLoader
-from stormpath_config.strategies import ExtendConfigStrategy, \
+from stormpath_config.frozen import FrozenDict
+from stormpath_config.loader import AsyncConfigLoader, ConfigLoader, MultiTenantConfigLoader
+from stormpath_config.strategies import EnrichIntegrationFromRemoteConfigStrategy, \
+    ExtendConfigStrategy, \
     LoadAPIKeyConfigStrategy, \
     LoadAPIKeyFromConfigStrategy, \
     LoadEnvConfigStrategy, \
     LoadFileConfigStrategy, \
     ValidateClientConfigStrategy
 
+from .base import Application, Client
+
+# intern() is a builtin on Python 2.
+try:
+    from sys import intern
+except ImportError:
+    pass
+
 
 class ConfigLoaderTest(TestCase):
     def setUp(self):
@@ -85,3 +101,416 @@ class ConfigLoaderTest(TestCase):
         self.assertEqual(config['client']['cacheManager']['defaultTtl'], 302)
         self.assertEqual(config['client']['cacheManager']['defaultTti'], 303)
         self.assertEqual(config['application']['name'], 'CLIENT_CONFIG_APP')
+
+    def test_frozen_config_loader(self):
+        extend_with = {'application': {'name': 'My app'}}
+        cl = ConfigLoader([ExtendConfigStrategy(extend_with)], frozen=True)
+        config = cl.load()
+
+        self.assertTrue(isinstance(config, FrozenDict))
+        self.assertEqual(config, extend_with)
+        self.assertEqual(hash(config), hash(cl.load()))
+        self.assertIsNot(config['application'], extend_with['application'])
+
+
+class CachingConfigLoaderTest(TestCase):
+    def setUp(self):
+        fd, self.api_key_file = mkstemp(suffix='.properties')
+        close(fd)
+        self._write_api_key_file('API_KEY_ID', 'API_KEY_SECRET')
+
+        self.extend_with = {'application': {'name': 'My app'}}
+        self.load_strategies = [
+            LoadAPIKeyConfigStrategy(self.api_key_file),
+            LoadEnvConfigStrategy(prefix='STORMPATH'),
+            ExtendConfigStrategy(extend_with=self.extend_with),
+        ]
+
+    def tearDown(self):
+        remove(self.api_key_file)
+
+    def _write_api_key_file(self, api_key_id, api_key_secret):
+        with open(self.api_key_file, 'w') as fd:
+            fd.write('apiKey.id = %s\napiKey.secret = %s\n' % (api_key_id, api_key_secret))
+
+    def _touch_api_key_file(self, api_key_id, api_key_secret):
+        mtime = stat(self.api_key_file).st_mtime
+        self._write_api_key_file(api_key_id, api_key_secret)
+        utime(self.api_key_file, (mtime + 10, mtime + 10))
+
+    def test_cached_config_is_frozen(self):
+        cl = ConfigLoader(self.load_strategies, cache=True)
+        config = cl.load()
+
+        self.assertEqual(config['client']['apiKey']['id'], 'API_KEY_ID')
+        with self.assertRaises(TypeError):
+            config['client']['apiKey']['id'] = 'other'
+
+    def test_unchanged_inputs_return_cached_config(self):
+        cl = ConfigLoader(self.load_strategies, cache=True)
+
+        with patch.object(self.load_strategies[0], 'process', wraps=self.load_strategies[0].process) as process:
+            config = cl.load()
+            self.assertIs(cl.load(), config)
+            self.assertEqual(process.call_count, 1)
+
+        stats = cl.cache_stats[self.load_strategies[0]]
+        self.assertEqual(stats.hits, 1)
+        self.assertEqual(stats.misses, 1)
+        self.assertTrue(stats.recompute_time > 0)
+
+    def test_api_key_file_from_config_is_cached(self):
+        self.extend_with['client'] = {'apiKey': {'file': self.api_key_file}}
+        cl = ConfigLoader(self.load_strategies, [LoadAPIKeyFromConfigStrategy()], cache=True)
+
+        config = cl.load()
+        self.assertIs(cl.load(), config)
+
+        stats = cl.cache_stats[self.load_strategies[0]]
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+
+        self._touch_api_key_file('NEW_API_KEY_ID', 'NEW_API_KEY_SECRET')
+        self.assertEqual(cl.load()['client']['apiKey']['id'], 'NEW_API_KEY_ID')
+
+    def test_changed_file_is_reloaded(self):
+        cl = ConfigLoader(self.load_strategies, cache=True)
+        cl.load()
+
+        self._touch_api_key_file('NEW_API_KEY_ID', 'NEW_API_KEY_SECRET')
+        config = cl.load()
+
+        self.assertEqual(config['client']['apiKey']['id'], 'NEW_API_KEY_ID')
+        self.assertEqual(cl.cache_stats[self.load_strategies[0]].misses, 2)
+
+    def test_changed_environment_is_reloaded(self):
+        cl = ConfigLoader(self.load_strategies, cache=True)
+        cl.load()
+
+        with patch.dict(environ, {'STORMPATH_CLIENT_APIKEY_ID': 'env api key id'}):
+            config = cl.load()
+
+        self.assertEqual(config['client']['apiKey']['id'], 'env api key id')
+
+    def test_replaced_extend_with_is_reloaded(self):
+        cl = ConfigLoader(self.load_strategies, cache=True)
+        cl.load()
+
+        self.load_strategies[2].extend_with = {'application': {'name': 'My other app'}}
+        config = cl.load()
+
+        self.assertEqual(config['application']['name'], 'My other app')
+
+    def test_invalidate(self):
+        cl = ConfigLoader(self.load_strategies, cache=True)
+        config = cl.load()
+        cl.invalidate()
+
+        self.assertIsNot(cl.load(), config)
+        self.assertEqual(cl.cache_stats[self.load_strategies[0]].misses, 2)
+
+    def test_only_stages_after_a_change_are_processed(self):
+        cl = ConfigLoader(self.load_strategies, [LoadAPIKeyFromConfigStrategy()], cache=True)
+        cl.load()
+
+        with patch.object(self.load_strategies[0], 'process') as file_process, \
+                patch.object(self.load_strategies[2], 'process', wraps=self.load_strategies[2].process) as extend_process, \
+                patch.dict(environ, {'STORMPATH_APPLICATION_NAME': 'env app'}):
+            config = cl.load()
+
+        self.assertFalse(file_process.called)
+        self.assertEqual(extend_process.call_count, 1)
+        self.assertEqual(config['client']['apiKey']['id'], 'API_KEY_ID')
+        self.assertEqual(config['application']['name'], 'My app')
+        self.assertEqual(cl.cache_stats[self.load_strategies[0]].hits, 1)
+        self.assertEqual(cl.cache_stats[self.load_strategies[1]].misses, 2)
+
+    def test_stage_snapshots_are_not_modified_by_later_stages(self):
+        cl = ConfigLoader(self.load_strategies, cache=True)
+        cl.load()
+
+        self.load_strategies[2].extend_with = {'client': {'apiKey': {'id': 'extended id'}}}
+        self.assertEqual(cl.load()['client']['apiKey']['id'], 'extended id')
+
+        self.load_strategies[2].extend_with = {}
+        self.assertEqual(cl.load()['client']['apiKey']['id'], 'API_KEY_ID')
+
+
+class CountingStrategy(object):
+    def __init__(self, depends_on=None, run_at_end=False):
+        if depends_on is not None:
+            self.depends_on = depends_on
+
+        self.run_at_end = run_at_end
+        self.configs = []
+
+    def process(self, config):
+        self.configs.append(deepcopy(config))
+        return config
+
+
+class ScheduledPostProcessingTest(TestCase):
+    def setUp(self):
+        self.load_strategies = [
+            ExtendConfigStrategy({'application': {'name': 'My app'}}),
+            ExtendConfigStrategy({'client': {'apiKey': {'id': 'id'}}}),
+            ExtendConfigStrategy({'application': {'name': 'My other app'}}),
+        ]
+
+    def test_post_processing_is_performed_after_each_stage_by_default(self):
+        strategy = CountingStrategy(depends_on=('application.name',), run_at_end=True)
+        cl = ConfigLoader(self.load_strategies, [strategy])
+        cl.load()
+
+        self.assertEqual(len(strategy.configs), 3)
+        self.assertEqual(cl.skipped_executions, 0)
+
+    def test_strategies_are_skipped_if_their_dependencies_did_not_change(self):
+        strategy = CountingStrategy(depends_on=('application.name',))
+        cl = ConfigLoader(self.load_strategies, [strategy], schedule_post_processing=True)
+        cl.load()
+
+        self.assertEqual([c['application']['name'] for c in strategy.configs], ['My app', 'My other app'])
+        self.assertEqual(cl.skipped_executions, 1)
+
+    def test_run_at_end_strategies_are_performed_once(self):
+        strategies = [CountingStrategy(run_at_end=True), CountingStrategy()]
+        cl = ConfigLoader(self.load_strategies, strategies, schedule_post_processing=True)
+        config = cl.load()
+
+        self.assertEqual(strategies[0].configs, [config])
+        self.assertEqual(len(strategies[1].configs), 3)
+        self.assertEqual(cl.skipped_executions, 2)
+
+    def test_scheduling_with_cache(self):
+        strategy = CountingStrategy(depends_on=('application.name',))
+        cl = ConfigLoader(self.load_strategies, [strategy], schedule_post_processing=True, cache=True)
+        cl.load()
+
+        self.load_strategies[1].extend_with = {'client': {'apiKey': {'id': 'other id'}}}
+        config = cl.load()
+
+        self.assertEqual(config['client']['apiKey']['id'], 'other id')
+        self.assertEqual(len(strategy.configs), 3)
+        self.assertEqual(cl.skipped_executions, 1)
+
+    def test_api_key_file_is_loaded_once(self):
+        self.load_strategies.insert(1, ExtendConfigStrategy({
+            'client': {'apiKey': {'file': 'tests/assets/apiKey.properties'}},
+        }))
+        strategy = LoadAPIKeyFromConfigStrategy()
+        cl = ConfigLoader(self.load_strategies, [strategy], schedule_post_processing=True)
+
+        with patch.object(strategy, 'process', wraps=strategy.process) as process:
+            config = cl.load()
+
+        self.assertEqual(process.call_count, 2)
+        self.assertEqual(config['client']['apiKey'], {'id': 'id', 'secret': 'API_KEY_PROPERTIES_SECRET'})
+
+
+class AsyncConfigLoaderTest(TestCase):
+    def setUp(self):
+        self.load_strategies = [
+            LoadAPIKeyConfigStrategy('tests/assets/apiKey.properties'),
+            LoadAPIKeyConfigStrategy('tests/assets/no_apiKey.properties'),
+            LoadEnvConfigStrategy(prefix='STORMPATH'),
+            ExtendConfigStrategy(extend_with={'application': {'name': 'My app'}}),
+        ]
+
+    @patch.dict(environ, {'STORMPATH_CLIENT_APIKEY_SECRET': 'env api key secret'})
+    def test_async_config_loader_is_identical_to_config_loader(self):
+        self.load_strategies.insert(0, LoadFileConfigStrategy('tests/assets/default_config.yml', must_exist=True))
+        self.load_strategies.insert(2, LoadFileConfigStrategy('tests/assets/stormpath.yml'))
+        post_processing_strategies = [LoadAPIKeyFromConfigStrategy()]
+        config = ConfigLoader(self.load_strategies, post_processing_strategies).load()
+        async_config = AsyncConfigLoader(self.load_strategies, post_processing_strategies).load()
+
+        self.assertEqual(dumps(async_config, sort_keys=True), dumps(config, sort_keys=True))
+
+    def test_sources_are_read_in_the_executor(self):
+        executor = ThreadPoolExecutor(max_workers=2)
+        cl = AsyncConfigLoader(self.load_strategies, executor=executor)
+
+        with patch.object(executor, 'submit', wraps=executor.submit) as submit:
+            config = cl.load()
+
+        self.assertEqual(submit.call_count, 2)
+        self.assertEqual(config['client']['apiKey']['id'], 'API_KEY_PROPERTIES_ID')
+        executor.shutdown()
+
+    def test_read_errors_are_raised_in_order(self):
+        self.load_strategies.insert(0, LoadAPIKeyConfigStrategy('tests/assets/no_apiKey.properties', must_exist=True))
+
+        with self.assertRaises(Exception):
+            AsyncConfigLoader(self.load_strategies).load()
+
+    def test_concurrent_loads_use_their_own_reads(self):
+        blocking = BlockingStrategy()
+        strategy = self.load_strategies[0]
+        cl = AsyncConfigLoader([blocking] + self.load_strategies)
+        configs = []
+
+        with patch.object(strategy, 'process', wraps=strategy.process) as process:
+            thread = Thread(target=lambda: configs.append(cl.load()))
+            thread.start()
+            self.assertTrue(blocking.blocked.wait(5))
+
+            configs.append(cl.load())
+            blocking.release.set()
+            thread.join(5)
+
+        self.assertEqual(process.call_count, 0)
+        self.assertEqual(len(configs), 2)
+        self.assertEqual(configs[0], configs[1])
+
+    @skipIf(version_info < (3, 4), 'asyncio is not available.')
+    def test_load_async(self):
+        from asyncio import new_event_loop
+
+        loop = new_event_loop()
+        try:
+            config = loop.run_until_complete(AsyncConfigLoader(self.load_strategies).load_async(loop))
+        finally:
+            loop.close()
+
+        self.assertEqual(config['client']['apiKey']['id'], 'API_KEY_PROPERTIES_ID')
+        self.assertEqual(config['application']['name'], 'My app')
+
+
+class BlockingStrategy(object):
+    """A strategy that blocks the first load processing it until released."""
+    def __init__(self):
+        self.blocked = Event()
+        self.release = Event()
+
+    def process(self, config):
+        if not self.blocked.is_set():
+            self.blocked.set()
+            self.release.wait(5)
+
+        return config
+
+
+class RenamingStrategy(object):
+    """A strategy without an overlay, which modifies the configuration in place."""
+    def process(self, config):
+        config['application']['name'] = config['application']['name'].upper()
+        return config
+
+
+class MultiTenantConfigLoaderTest(TestCase):
+    def setUp(self):
+        self.shared = CountingStrategy()
+        self.load_strategies = [
+            LoadFileConfigStrategy('tests/assets/default_config.yml', must_exist=True),
+            ExtendConfigStrategy({'client': {'apiKey': {'id': 'SHARED_ID', 'secret': 'SHARED_SECRET'}}}),
+            self.shared,
+        ]
+        self.loader = MultiTenantConfigLoader(
+            self.load_strategies, [LoadAPIKeyFromConfigStrategy()], [ValidateClientConfigStrategy()])
+
+        for tenant in ('a', 'b'):
+            self.loader.add_tenant(tenant, [
+                ExtendConfigStrategy({'application': {
+                    'name': 'App %s' % tenant,
+                    'href': 'https://api.stormpath.com/v1/applications/%s' % tenant,
+                }}),
+            ])
+
+    def test_tenant_configs_share_the_base(self):
+        a, b = self.loader.load('a'), self.loader.load('b')
+        base = self.loader.load_base()
+
+        self.assertTrue(isinstance(a, FrozenDict))
+        self.assertEqual(a['application']['name'], 'App a')
+        self.assertEqual(b['application']['name'], 'App b')
+        self.assertEqual(a['client']['apiKey']['id'], 'SHARED_ID')
+        self.assertIsNone(base['application']['name'])
+
+        self.assertIs(a['client'], base['client'])
+        self.assertIs(b['client'], base['client'])
+        self.assertIsNot(a['application'], b['application'])
+        self.assertEqual(len(self.shared.configs), 1)
+
+    def test_keys_are_interned(self):
+        key = ''.join(['custom', 'Setting'])
+        self.loader.add_tenant('c', [ExtendConfigStrategy({key: {'enabled': True}})])
+
+        config = self.loader.load('c')
+
+        self.assertIs([k for k in config if k == key][0], intern('customSetting'))
+
+    def test_tenant_configs_are_cached(self):
+        config = self.loader.load('a')
+        self.assertIs(self.loader.load('a'), config)
+
+        self.loader.invalidate('a')
+        reloaded = self.loader.load('a')
+        self.assertIsNot(reloaded, config)
+        self.assertEqual(reloaded, config)
+
+    def test_changed_tenant_strategies_are_reloaded(self):
+        self.loader.load('a')
+        self.loader._tenants['a'].strategies[0].extend_with = {'application': {'name': 'Renamed'}}
+
+        self.assertEqual(self.loader.load('a')['application']['name'], 'Renamed')
+        self.assertEqual(len(self.shared.configs), 1)
+
+    def test_changed_base_is_reloaded(self):
+        config = self.loader.load('a')
+        self.load_strategies[1].extend_with = {'client': {'apiKey': {'id': 'NEW_ID', 'secret': 'NEW_SECRET'}}}
+
+        reloaded = self.loader.load('a')
+
+        self.assertEqual(reloaded['client']['apiKey']['id'], 'NEW_ID')
+        self.assertEqual(reloaded['application'], config['application'])
+        self.assertIs(reloaded['client']['cacheManager'], config['client']['cacheManager'])
+        self.assertEqual(len(self.shared.configs), 2)
+
+    def test_strategies_without_overlay(self):
+        self.loader.add_tenant('c', self.loader._tenants['a'].strategies + [RenamingStrategy()])
+
+        config = self.loader.load('c')
+
+        self.assertEqual(config['application']['name'], 'APP A')
+        self.assertIs(config['client'], self.loader.load_base()['client'])
+
+    def test_overlays_replace_oauth_policies(self):
+        application = Application('App c', 'https://api.stormpath.com/v1/applications/c')
+        self.loader.add_tenant('c', [
+            ExtendConfigStrategy({'application': {'href': application.href, 'oAuthPolicy': {'stale': True}}}),
+            EnrichIntegrationFromRemoteConfigStrategy(lambda config: Client([application])),
+        ])
+
+        config = self.loader.load('c')
+
+        self.assertNotIn('stale', config['application']['oAuthPolicy'])
+        self.assertEqual(config['application']['oAuthPolicy']['accessTokenTtl'], 3600.0)
+        self.assertEqual(config['application']['href'], application.href)
+        self.assertIs(config['client'], self.loader.load_base()['client'])
+
+    def test_the_base_is_always_cached(self):
+        MultiTenantConfigLoader(self.load_strategies, cache=True)
+
+        self.assertRaises(ValueError, MultiTenantConfigLoader, self.load_strategies, cache=False)
+
+    def test_api_key_files(self):
+        self.loader.add_tenant('c', self.loader._tenants['a'].strategies + [LoadAPIKeyFromConfigStrategy()])
+        self.loader.add_tenant('d', self.loader._tenants['a'].strategies + [
+            ExtendConfigStrategy({'client': {'apiKey': {'file': 'tests/assets/apiKey.properties'}}}),
+            LoadAPIKeyFromConfigStrategy(),
+        ])
+
+        self.assertEqual(self.loader.load('c')['client']['apiKey']['id'], 'SHARED_ID')
+        self.assertEqual(self.loader.load('d')['client']['apiKey']['id'], 'API_KEY_PROPERTIES_ID')
+        self.assertNotIn('file', self.loader.load('d')['client']['apiKey'])
+
+    def test_validation(self):
+        self.loader.add_tenant('c', [ExtendConfigStrategy({'application': {'href': 'invalid'}})])
+
+        self.assertRaises(ValueError, self.loader.load, 'c')
+
+    def test_remove_tenant(self):
+        self.loader.remove_tenant('a')
+
+        self.assertEqual(self.loader.tenants, ['b'])
+        self.assertRaises(KeyError, self.loader.load, 'a')
@@ -0,0 +1,130 @@
+"""Tests for the configuration merge engine."""
+
+
+from copy import deepcopy
+from random import Random
+from unittest import TestCase
+
+from stormpath_config.merge import merge, merge_into
+
+
+class MergeTest(TestCase):
+    def setUp(self):
+        self.base = {
+            'client': {'apiKey': {'id': 'id', 'secret': 'secret'}, 'cacheManager': {'defaultTtl': 300}},
+            'web': {'produces': ['application/json'], 'login': {'enabled': True}},
+        }
+        self.file = {'client': {'apiKey': {'id': 'file id'}}, 'web': {'produces': ['text/html']}}
+        self.extend = {'client': {'apiKey': {'secret': None}}, 'application': {'name': 'My app'}}
+        self.originals = deepcopy((self.base, self.file, self.extend))
+
+    def test_merge(self):
+        config = merge(self.base, self.file, self.extend)
+
+        self.assertEqual(config, {
+            'client': {'apiKey': {'id': 'file id', 'secret': None}, 'cacheManager': {'defaultTtl': 300}},
+            'web': {'produces': ['text/html'], 'login': {'enabled': True}},
+            'application': {'name': 'My app'},
+        })
+        self.assertEqual((self.base, self.file, self.extend), self.originals)
+
+    def test_merge_only_copies_changed_paths(self):
+        config = merge(self.base, self.file, self.extend)
+
+        self.assertIsNot(config['client'], self.base['client'])
+        self.assertIs(config['client']['cacheManager'], self.base['client']['cacheManager'])
+        self.assertIs(config['web']['login'], self.base['web']['login'])
+        self.assertIs(config['application'], self.extend['application'])
+        self.assertIs(merge(self.base, {}, {'web': {}}), self.base)
+
+    def test_merge_layers_without_base(self):
+        config = merge({}, {'a': {'b': 1}}, {'a': {'c': 2}})
+
+        self.assertEqual(config, {'a': {'b': 1, 'c': 2}})
+        self.assertEqual(merge(), {})
+
+    def test_options(self):
+        self.assertEqual(
+            merge(self.base, self.file, self.extend, lists='append', none='skip'),
+            merge(self.base, {'client': {'apiKey': {'id': 'file id'}}, 'application': {'name': 'My app'}},
+                  {'web': {'produces': ['application/json', 'text/html']}}))
+
+        config = merge(self.base, {'web': {'login': {'uri': '/login'}}}, dicts='replace')
+        self.assertEqual(config['web'], {'login': {'uri': '/login'}})
+
+        self.assertRaises(TypeError, merge, self.base, unknown='option')
+        self.assertRaises(ValueError, merge, self.base, lists='prepend')
+
+    def test_values_written_between_dicts_replace_the_base(self):
+        layers = ({'a': {'x': 1}}, {'a': 5}, {'a': {'y': 2}})
+
+        for options in ({}, {'origins': {}}, {'lists': 'append'}, {'none': 'skip'}, {'dicts': 'replace'}):
+            self.assertEqual(merge(*layers, **options), {'a': {'y': 2}}, options)
+            self.assertEqual(merge_into(deepcopy(layers[0]), *layers[1:], **options), {'a': {'y': 2}}, options)
+
+        layers = ({'a': [1]}, {'a': 5}, {'a': [2]})
+        self.assertEqual(merge(*layers, lists='append'), {'a': [2]})
+        self.assertEqual(merge_into({'a': [1]}, *layers[1:], lists='append'), {'a': [2]})
+
+        origins = {}
+        merge({'a': {'x': 1}}, {'a': 5}, {'a': {'y': 2}}, origins=origins)
+        self.assertEqual(origins, {('a', 'y'): 2})
+
+    def test_options_match_the_simple_path(self):
+        rng = Random(0)
+
+        def value(depth):
+            if depth < 3 and rng.random() < 0.6:
+                return dict((rng.choice('abc'), value(depth + 1)) for _ in range(rng.randint(0, 3)))
+
+            return rng.choice([1, 2, 'x', [1]])
+
+        for _ in range(2000):
+            layers = [value(0) if rng.random() < 0.9 else {} for _ in range(rng.randint(1, 4))]
+            layers = [layer if isinstance(layer, dict) else {} for layer in layers]
+            self.assertEqual(merge(*layers, origins={}), merge(*layers), layers)
+
+    def test_origins(self):
+        origins = {}
+        merge(self.base, self.file, self.extend, origins=origins)
+
+        self.assertEqual(origins, {
+            ('client', 'apiKey', 'id'): 1,
+            ('client', 'apiKey', 'secret'): 2,
+            ('client', 'cacheManager', 'defaultTtl'): 0,
+            ('web', 'produces'): 1,
+            ('web', 'login', 'enabled'): 0,
+            ('application', 'name'): 2,
+        })
+
+    def test_merge_into(self):
+        target = deepcopy(self.base)
+        client = target['client']
+        origins = {}
+
+        config = merge_into(target, self.file, self.extend, origins=origins)
+
+        self.assertIs(config, target)
+        self.assertIs(config['client'], client)
+        self.assertEqual(config, merge(self.base, self.file, self.extend))
+        self.assertEqual((self.file, self.extend), self.originals[1:])
+        self.assertEqual(origins, {
+            ('client', 'apiKey', 'id'): 0,
+            ('client', 'apiKey', 'secret'): 1,
+            ('web', 'produces'): 0,
+            ('application', 'name'): 1,
+        })
+
+    def test_merge_into_does_not_modify_layers(self):
+        first, second = {'a': {'b': 1}}, {'a': {'c': 2}}
+        config = merge_into({}, first, second)
+
+        self.assertEqual(config, {'a': {'b': 1, 'c': 2}})
+        self.assertEqual(first, {'a': {'b': 1}})
+        self.assertEqual(second, {'a': {'c': 2}})
+
+        first = {'a': {'b': {'c': 1}}}
+        config = merge_into({}, first, {'a': {'d': 2}}, {'a': {'b': {'e': 3}}})
+
+        self.assertEqual(config, {'a': {'b': {'c': 1, 'e': 3}, 'd': 2}})
+        self.assertEqual(first, {'a': {'b': {'c': 1}}})
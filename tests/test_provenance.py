@@ -0,0 +1,123 @@
+"""Tests for provenance tracking."""
+
+
+from os import environ
+from os.path import abspath
+from unittest import TestCase
+
+from mock import patch
+
+from stormpath_config.loader import ConfigLoader
+from stormpath_config.provenance import Provenance, record_write
+from stormpath_config.strategies import ExtendConfigStrategy, LoadAPIKeyConfigStrategy, \
+    LoadAPIKeyFromConfigStrategy, LoadEnvConfigStrategy, LoadFileConfigStrategy
+
+
+class ProvenanceTest(TestCase):
+    def setUp(self):
+        self.extend_with = {'application': {'name': 'My app'}, 'web': {'produces': ['application/json']}}
+        self.load_strategies = [
+            LoadFileConfigStrategy('tests/assets/stormpath.yml', must_exist=True),
+            LoadAPIKeyConfigStrategy('tests/assets/apiKey.properties'),
+            LoadEnvConfigStrategy(prefix='STORMPATH'),
+            ExtendConfigStrategy(extend_with=self.extend_with),
+        ]
+
+    @patch.dict(environ, {'STORMPATH_CLIENT_CACHEMANAGER_DEFAULTTTI': '303'})
+    def test_explain(self):
+        cl = ConfigLoader(self.load_strategies, provenance=True)
+        cl.load()
+
+        self.assertEqual(cl.explain('client.baseUrl'), {
+            'strategy': 'LoadFileConfigStrategy', 'source': abspath('tests/assets/stormpath.yml')})
+        self.assertEqual(cl.explain('client.apiKey.id'), {
+            'strategy': 'LoadAPIKeyConfigStrategy', 'source': abspath('tests/assets/apiKey.properties')})
+        self.assertEqual(cl.explain('client.cacheManager.defaultTti'), {
+            'strategy': 'LoadEnvConfigStrategy', 'source': 'STORMPATH_CLIENT_CACHEMANAGER_DEFAULTTTI'})
+        self.assertEqual(cl.explain('application.name'), {'strategy': 'ExtendConfigStrategy', 'source': None})
+        self.assertEqual(cl.explain('web.produces.0'), {'strategy': 'ExtendConfigStrategy', 'source': None})
+        self.assertIsNone(cl.explain('client.cacheManager'))
+        self.assertIsNone(cl.explain('missing'))
+
+    def test_dump_provenance(self):
+        cl = ConfigLoader(self.load_strategies, provenance=True)
+        cl.load()
+
+        dump = cl.dump_provenance()
+        self.assertEqual(dump['client.cacheManager.defaultTtl']['strategy'], 'LoadFileConfigStrategy')
+        self.assertEqual(dump['web.produces.0']['strategy'], 'ExtendConfigStrategy')
+        self.assertEqual(set(dump['client.proxy.port']), {'strategy', 'source'})
+
+    def test_provenance_with_cache(self):
+        cl = ConfigLoader(self.load_strategies, cache=True, provenance=True)
+        cl.load()
+
+        self.extend_with = {'client': {'baseUrl': 'https://example.com'}}
+        self.load_strategies[-1].extend_with = self.extend_with
+        cl.load()
+
+        self.assertEqual(cl.explain('client.baseUrl'), {'strategy': 'ExtendConfigStrategy', 'source': None})
+        self.assertEqual(cl.explain('client.apiKey.id')['strategy'], 'LoadAPIKeyConfigStrategy')
+        self.assertEqual(cl.explain('application.name')['strategy'], 'LoadFileConfigStrategy')
+        self.assertIsNone(cl.explain('web.produces.0'))
+
+    def test_removed_values_are_forgotten(self):
+        provenance = Provenance()
+        strategy = object()
+
+        config = {'apiKey': {'id': 'id'}}
+        with provenance.recording(strategy, {}) as recording:
+            recording.finish(config)
+
+        with provenance.recording(strategy, config) as recording:
+            recording.finish({'client': {'apiKey': {'id': 'id'}}})
+
+        self.assertEqual(list(provenance.dump()), ['client.apiKey.id'])
+        self.assertEqual(provenance.sources, [('object', None)])
+
+    def test_only_recorded_writes_are_attributed(self):
+        class Strategy(object):
+            records_writes = True
+
+            def process(self, config):
+                config['a'] = 1
+                config['b'] = 2
+                record_write(('a',))
+                return config
+
+        cl = ConfigLoader([Strategy()], provenance=True)
+        cl.load()
+
+        self.assertEqual(cl.explain('a'), {'strategy': 'Strategy', 'source': None})
+        self.assertIsNone(cl.explain('b'))
+
+    @patch.dict(environ, {'STORMPATH_CLIENT_BASEURL': 'https://api.stormpath.com/v2'})
+    def test_writes_of_the_same_value_are_attributed(self):
+        cl = ConfigLoader(self.load_strategies, provenance=True)
+        config = cl.load()
+
+        self.assertEqual(config['client']['baseUrl'], 'https://api.stormpath.com/v2')
+        self.assertEqual(cl.explain('client.baseUrl'), {
+            'strategy': 'LoadEnvConfigStrategy', 'source': 'STORMPATH_CLIENT_BASEURL'})
+
+    def test_replaced_values_are_forgotten(self):
+        cl = ConfigLoader([
+            ExtendConfigStrategy(extend_with={'client': {'proxy': {'host': 'proxy', 'port': 8080}}}),
+            ExtendConfigStrategy(extend_with={'client': {'proxy': None}}),
+            ExtendConfigStrategy(extend_with={'client': {'apiKey': {'file': 'tests/assets/apiKey.properties'}}}),
+            LoadAPIKeyFromConfigStrategy(),
+        ], provenance=True)
+        cl.load()
+
+        self.assertEqual(cl.dump_provenance(), {
+            'client.proxy': {'strategy': 'ExtendConfigStrategy', 'source': None},
+            'client.apiKey.id': {'strategy': 'LoadAPIKeyFromConfigStrategy', 'source': None},
+            'client.apiKey.secret': {'strategy': 'LoadAPIKeyFromConfigStrategy', 'source': None},
+        })
+
+    def test_provenance_is_disabled_by_default(self):
+        cl = ConfigLoader(self.load_strategies)
+        cl.load()
+
+        self.assertRaises(ValueError, cl.explain, 'client.baseUrl')
+        self.assertRaises(ValueError, cl.dump_provenance)
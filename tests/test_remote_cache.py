@@ -0,0 +1,99 @@
+"""Tests for the RemoteConfigCache class."""
+
+
+from os import listdir
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import patch
+
+from stormpath_config.helpers import _resolve_remote
+from stormpath_config.remote_cache import RemoteConfigCache
+from stormpath_config.single_flight import SingleFlight
+
+
+class RemoteConfigCacheTest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.now = 1000
+        self.cache = RemoteConfigCache(self.directory, ttl=10, stale_ttl=100, clock=lambda: self.now)
+        self.fetches = []
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def _fetch(self, value):
+        def fetch():
+            self.fetches.append(value)
+            return value
+
+        return fetch
+
+    def test_fresh_entries_are_not_fetched_again(self):
+        key = ('application', 'id', 'href')
+
+        self.assertEqual(self.cache.get(key, self._fetch({'name': 'My app'})), {'name': 'My app'})
+        self.now += 10
+        self.assertEqual(self.cache.get(key, self._fetch({'name': 'Other app'})), {'name': 'My app'})
+        self.assertEqual(self.fetches, [{'name': 'My app'}])
+
+    def test_entries_are_shared_between_cache_instances(self):
+        key = ('application', 'id', 'href')
+        self.cache.get(key, self._fetch('My app'))
+
+        cache = RemoteConfigCache(self.directory, ttl=10, clock=lambda: self.now)
+        self.assertEqual(cache.get(key, self._fetch('Other app')), 'My app')
+
+    def test_stale_entries_are_refreshed_in_the_background(self):
+        key = ('application', 'id', 'href')
+        self.cache.get(key, self._fetch('My app'))
+
+        self.now += 50
+        self.assertEqual(self.cache.get(key, self._fetch('Other app')), 'My app')
+        self.cache.wait()
+        self.assertEqual(self.cache.get(key, self._fetch('Third app')), 'Other app')
+        self.assertEqual(self.fetches, ['My app', 'Other app'])
+
+    def test_expired_entries_are_fetched_again(self):
+        key = ('application', 'id', 'href')
+        self.cache.get(key, self._fetch('My app'))
+
+        self.now += 111
+        self.assertEqual(self.cache.get(key, self._fetch('Other app')), 'Other app')
+
+    def test_writes_are_atomic(self):
+        self.cache.get(('application', 'id', 'href'), self._fetch('My app'))
+        self.cache.get(('application', 'id', 'other href'), self._fetch('Other app'))
+
+        files = listdir(self.directory)
+        self.assertEqual(len(files), 2)
+        self.assertTrue(all(f.endswith('.json') for f in files))
+
+    def test_values_that_cannot_be_serialized_are_not_cached(self):
+        key = ('application', 'id', 'href')
+        value = {'names': set(['My app'])}
+
+        with patch('stormpath_config.remote_cache.log') as log:
+            self.assertIs(self.cache.get(key, self._fetch(value)), value)
+
+        self.assertTrue(log.warning.called)
+        self.assertEqual(listdir(self.directory), [])
+        self.assertEqual(self.cache.get(key, self._fetch('Other app')), 'Other app')
+
+    def test_single_flight_results_expire_with_the_cache_entries(self):
+        key = ('application', 'id', 'href')
+        single_flight = SingleFlight(clock=lambda: self.now)
+        _resolve_remote(key, 'secret', self._fetch('My app'), self.cache, single_flight)
+
+        self.now += 50
+        self.assertEqual(_resolve_remote(key, 'secret', self._fetch('Other app'), self.cache, single_flight), 'My app')
+        self.cache.wait()
+        self.assertEqual(self.fetches, ['My app', 'Other app'])
+
+    def test_invalidate(self):
+        key = ('application', 'id', 'href')
+        self.cache.get(key, self._fetch('My app'))
+        self.cache.invalidate(key)
+
+        self.assertEqual(self.cache.get(key, self._fetch('Other app')), 'Other app')
@@ -0,0 +1,98 @@
+"""Tests for memory-mapped shared configuration."""
+
+
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from stormpath_config.frozen import freeze
+from stormpath_config.loader import ConfigLoader
+from stormpath_config.shared import SharedMapping, SharedSequence, dumps, loads, open_shared, write_shared
+from stormpath_config.strategies import ExtendConfigStrategy
+
+
+CONFIG = {
+    'client': {
+        'apiKey': {'id': 'id', 'secret': u'secr\xe9t'},
+        'cacheManager': {'defaultTtl': 300, 'ratio': 0.5, 'big': 2 ** 70, 'negative': -1},
+        'proxy': None,
+    },
+    'web': {
+        'login': {'enabled': True, 'uri': '/login'},
+        'register': {'enabled': False, 'form': {'fieldOrder': ['username', 'givenName', 'email']}},
+        'produces': ['application/json', 'text/html'],
+        'empty': {},
+    },
+    'zeta': [{'name': 'a'}, [1, 2]],
+    'alpha': 'first key in sorted order, last in insertion order',
+}
+
+
+class SharedConfigTest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.path = join(self.directory, 'stormpath.shared')
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def test_round_trip(self):
+        config = loads(dumps(CONFIG))
+
+        self.assertIsInstance(config, SharedMapping)
+        self.assertIsInstance(config['web']['produces'], SharedSequence)
+        self.assertEqual(config, CONFIG)
+        self.assertEqual(config.to_dict(), CONFIG)
+        self.assertEqual(list(config), list(CONFIG))
+
+    def test_access(self):
+        config = loads(dumps(CONFIG))
+
+        self.assertIs(config['web']['login']['enabled'], True)
+        self.assertEqual(config['client']['apiKey']['secret'], u'secr\xe9t')
+        self.assertEqual(config['client']['cacheManager']['big'], 2 ** 70)
+        self.assertEqual(config['web']['register']['form']['fieldOrder'][-1], 'email')
+        self.assertEqual(config['web']['register']['form']['fieldOrder'][:2], ['username', 'givenName'])
+        self.assertEqual(config.get('missing', 'default'), 'default')
+        self.assertIn('web', config)
+        self.assertNotIn('missing', config)
+        self.assertRaises(KeyError, lambda: config['missing'])
+        self.assertRaises(IndexError, lambda: config['web']['produces'][2])
+
+    def test_read_only(self):
+        config = loads(dumps(CONFIG))
+
+        with self.assertRaises(TypeError):
+            config['web'] = {}
+
+        self.assertFalse(hasattr(config, 'update'))
+
+    def test_frozen_config(self):
+        self.assertEqual(loads(dumps(freeze(CONFIG))), CONFIG)
+
+    def test_invalid_values(self):
+        self.assertRaises(TypeError, dumps, {1: 'non string key'})
+        self.assertRaises(TypeError, dumps, {'key': object()})
+        self.assertRaises(ValueError, loads, b'not a shared configuration')
+
+    def test_strings_are_stored_once(self):
+        self.assertLess(len(dumps({'a': ['value'] * 10})), len(dumps({'a': ['value%d' % i for i in range(10)]})))
+
+    def test_files(self):
+        write_shared(self.path, CONFIG)
+        config = open_shared(self.path)
+
+        self.assertEqual(config, CONFIG)
+
+        # Replacing the file doesn't affect existing mappings.
+        write_shared(self.path, {'other': 'config'})
+        self.assertEqual(config, CONFIG)
+        self.assertEqual(open_shared(self.path), {'other': 'config'})
+
+    def test_load_shared(self):
+        config = ConfigLoader([ExtendConfigStrategy(CONFIG)]).load_shared(self.path)
+
+        self.assertIsInstance(config, SharedMapping)
+        self.assertEqual(config, CONFIG)
+        self.assertEqual(open_shared(self.path), CONFIG)
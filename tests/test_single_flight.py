@@ -0,0 +1,127 @@
+"""Tests for the SingleFlight class."""
+
+
+from threading import Event, Thread
+from time import sleep
+from unittest import TestCase
+
+from stormpath_config.single_flight import SingleFlight
+
+
+class Abort(BaseException):
+    pass
+
+
+class SingleFlightTest(TestCase):
+    def setUp(self):
+        self.now = 1000
+        self.single_flight = SingleFlight(max_size=2, ttl=10, clock=lambda: self.now)
+        self.calls = []
+
+    def _func(self, value, started=None, release=None):
+        def func():
+            self.calls.append(value)
+            if started is not None:
+                started.set()
+                release.wait(5)
+
+            return value
+
+        return func
+
+    def test_concurrent_calls_are_coalesced(self):
+        started, release = Event(), Event()
+        results = []
+
+        leader = Thread(target=lambda: results.append(self.single_flight.do('key', self._func(1, started, release))))
+        leader.start()
+        started.wait(5)
+
+        followers = [
+            Thread(target=lambda: results.append(self.single_flight.do('key', self._func(2))))
+            for _ in range(3)
+        ]
+        for follower in followers:
+            follower.start()
+
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(self.calls, [1])
+        self.assertEqual(results, [1, 1, 1, 1])
+
+    def test_completed_results_are_kept_in_a_bounded_lru(self):
+        self.single_flight.do('a', self._func('a'))
+        self.single_flight.do('b', self._func('b'))
+        self.single_flight.do('a', self._func('a'))
+        self.single_flight.do('c', self._func('c'))
+        self.single_flight.do('a', self._func('a'))
+        self.single_flight.do('b', self._func('b'))
+
+        self.assertEqual(self.calls, ['a', 'b', 'c', 'b'])
+
+    def test_completed_results_expire(self):
+        self.single_flight.do('key', self._func(1))
+        self.now += 9
+        self.assertEqual(self.single_flight.do('key', self._func(2)), 1)
+        self.now += 1
+        self.assertEqual(self.single_flight.do('key', self._func(3)), 3)
+
+        self.assertEqual(self.calls, [1, 3])
+
+    def test_results_expire_with_the_shortest_ttl(self):
+        self.single_flight.do('key', self._func(1), ttl=5)
+        self.now += 5
+        self.assertEqual(self.single_flight.do('key', self._func(2), ttl=20), 2)
+        self.now += 10
+        self.assertEqual(self.single_flight.do('key', self._func(3)), 3)
+
+    def test_exceptions_are_not_cached(self):
+        def fail():
+            self.calls.append('fail')
+            raise ValueError('Failed.')
+
+        with self.assertRaises(ValueError):
+            self.single_flight.do('key', fail)
+
+        self.assertEqual(self.single_flight.do('key', self._func('value')), 'value')
+
+    def test_base_exceptions_are_shared_and_not_cached(self):
+        started, release = Event(), Event()
+        results = []
+
+        def abort():
+            self.calls.append('abort')
+            started.set()
+            release.wait(5)
+            raise Abort()
+
+        def do(func):
+            try:
+                results.append(self.single_flight.do('key', func))
+            except Abort:
+                results.append('aborted')
+
+        leader = Thread(target=do, args=(abort,))
+        leader.start()
+        started.wait(5)
+
+        follower = Thread(target=do, args=(self._func(2),))
+        follower.start()
+        # Let the follower start waiting for the leader.
+        sleep(0.1)
+
+        release.set()
+        for thread in (leader, follower):
+            thread.join(5)
+
+        self.assertEqual(self.calls, ['abort'])
+        self.assertEqual(results, ['aborted', 'aborted'])
+        self.assertEqual(self.single_flight.do('key', self._func(3)), 3)
+
+    def test_forget(self):
+        self.single_flight.do('key', self._func(1))
+        self.single_flight.forget('key')
+
+        self.assertEqual(self.single_flight.do('key', self._func(2)), 2)
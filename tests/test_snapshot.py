@@ -0,0 +1,91 @@
+"""Tests for configuration snapshots."""
+
+
+from os.path import join
+from shutil import copy, rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from stormpath_config.cli import main
+from stormpath_config.snapshot import compile_snapshot, read_snapshot
+from stormpath_config.strategies import LoadAPIKeyConfigStrategy, LoadFileConfigStrategy, LoadSnapshotStrategy
+
+
+class SnapshotTest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.yml = join(self.directory, 'stormpath.yml')
+        self.properties = join(self.directory, 'apiKey.properties')
+        self.snapshot = join(self.directory, 'stormpath.snapshot')
+        copy('tests/assets/default_config.yml', self.yml)
+        copy('tests/assets/apiKey.properties', self.properties)
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def _strategies(self):
+        return [LoadFileConfigStrategy(self.yml), LoadAPIKeyConfigStrategy(self.properties)]
+
+    def _load(self, strategies):
+        config = {}
+        for strategy in strategies:
+            config = strategy.process(config)
+
+        return config
+
+    def test_compile_and_read(self):
+        config = compile_snapshot(self.snapshot, self._strategies())
+
+        self.assertEqual(config, self._load(self._strategies()))
+        self.assertEqual(read_snapshot(self.snapshot, self._strategies()), config)
+
+    def test_snapshot_is_out_of_date_when_sources_change(self):
+        compile_snapshot(self.snapshot, self._strategies())
+
+        with open(self.yml, 'a') as f:
+            f.write('\nextra: value\n')
+
+        self.assertIsNone(read_snapshot(self.snapshot, self._strategies()))
+
+    def test_snapshot_is_out_of_date_when_strategies_change(self):
+        compile_snapshot(self.snapshot, self._strategies())
+
+        self.assertIsNone(read_snapshot(self.snapshot, self._strategies()[:1]))
+        self.assertIsNone(read_snapshot(self.snapshot, self._strategies()[::-1]))
+
+    def test_invalid_snapshots_are_ignored(self):
+        self.assertIsNone(read_snapshot(self.snapshot, self._strategies()))
+
+        with open(self.snapshot, 'wb') as f:
+            f.write(b'not a snapshot')
+
+        self.assertIsNone(read_snapshot(self.snapshot, self._strategies()))
+
+    def test_load_snapshot_strategy(self):
+        expected = self._load(self._strategies())
+
+        strategy = LoadSnapshotStrategy(self.snapshot, self._strategies())
+        self.assertEqual(strategy.process(), expected)
+        self.assertFalse(strategy.used_snapshot)
+
+        compile_snapshot(self.snapshot, self._strategies())
+        self.assertEqual(strategy.process({'key': 'value'}), dict(expected, key='value'))
+        self.assertTrue(strategy.used_snapshot)
+
+        with open(self.yml, 'a') as f:
+            f.write('\nextra: value\n')
+
+        self.assertEqual(strategy.process()['extra'], 'value')
+        self.assertFalse(strategy.used_snapshot)
+
+    def test_cli(self):
+        self.assertEqual(main(['snapshot', '-o', self.snapshot, self.yml, self.properties]), 0)
+
+        strategy = LoadSnapshotStrategy(self.snapshot, self._strategies())
+        self.assertEqual(strategy.process(), self._load(self._strategies()))
+        self.assertTrue(strategy.used_snapshot)
+
+    def test_cli_error(self):
+        status = main(['snapshot', '-o', join(self.directory, 'missing', 'stormpath.snapshot'), self.yml])
+
+        self.assertEqual(status, 1)
@@ -0,0 +1,176 @@
+"""Tests for the ConfigWatcher class."""
+
+
+from os import environ, makedirs, rename, stat, symlink, utime
+from os.path import join
+from shutil import rmtree
+from sys import platform
+from tempfile import mkdtemp
+from threading import Event
+from time import sleep
+from timeit import default_timer
+from unittest import TestCase, skipIf
+
+from mock import patch
+
+from stormpath_config.loader import ConfigLoader
+from stormpath_config.strategies import LoadEnvConfigStrategy, LoadFileConfigStrategy
+from stormpath_config.watcher import ConfigWatcher
+
+
+class ConfigWatcherTest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.path = join(self.directory, 'stormpath.yml')
+        self.published = []
+        self.writes = 0
+        self._write('application:\n  name: My app\n')
+        self.loader = ConfigLoader([LoadFileConfigStrategy(self.path), LoadEnvConfigStrategy(prefix='STORMPATH')])
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def _write(self, contents):
+        with open(self.path, 'w') as f:
+            f.write(contents)
+
+        # Make sure the change is visible even on file systems with a coarse
+        # modification time.
+        self.writes += 1
+        st = stat(self.path)
+        utime(self.path, (st.st_atime, st.st_mtime + self.writes))
+
+    def _subscriber(self, config, changes):
+        self.published.append((config, changes))
+
+    def test_check_publishes_changes(self):
+        watcher = ConfigWatcher(self.loader)
+        watcher.subscribe(self._subscriber)
+
+        self.assertIsNone(watcher.check())
+        self.assertEqual(watcher.config, {'application': {'name': 'My app'}})
+
+        self._write('application:\n  name: Other app\n')
+        changes = watcher.check()
+
+        self.assertEqual(changes.paths(), ['application.name'])
+        self.assertEqual(watcher.config, {'application': {'name': 'Other app'}})
+        self.assertEqual(self.published, [(watcher.config, changes)])
+
+    def test_unchanged_contents_are_not_reloaded(self):
+        watcher = ConfigWatcher(self.loader)
+
+        with patch.object(self.loader, 'reload') as reload_mock:
+            self._write('application:\n  name: My app\n')
+            self.assertIsNone(watcher.check())
+
+        self.assertFalse(reload_mock.called)
+
+    @patch.dict(environ, {})
+    def test_environment_changes_are_reloaded(self):
+        watcher = ConfigWatcher(self.loader)
+        environ['STORMPATH_APPLICATION_NAME'] = 'Env app'
+
+        self.assertEqual(watcher.check().paths(), ['application.name'])
+        self.assertEqual(watcher.config['application']['name'], 'Env app')
+
+    def test_invalid_files_keep_the_current_config(self):
+        watcher = ConfigWatcher(self.loader)
+        watcher.subscribe(self._subscriber)
+
+        self._write('application: [\n')
+        self.assertIsNone(watcher.check())
+        self.assertEqual(watcher.config, {'application': {'name': 'My app'}})
+        self.assertEqual(self.published, [])
+
+        self._write('application:\n  name: Fixed app\n')
+        self.assertEqual(watcher.check().paths(), ['application.name'])
+
+    def test_failing_subscribers_do_not_stop_others(self):
+        watcher = ConfigWatcher(self.loader)
+        watcher.subscribe(lambda config, changes: 1 / 0)
+        watcher.subscribe(self._subscriber)
+
+        self._write('application:\n  name: Other app\n')
+        watcher.check()
+
+        self.assertEqual(len(self.published), 1)
+
+    def _watch(self, use_inotify):
+        changed = Event()
+
+        with ConfigWatcher(self.loader, interval=0.05, debounce=0.05, use_inotify=use_inotify) as watcher:
+            watcher.subscribe(lambda config, changes: changed.set())
+
+            self._write('application:\n  name: Other app\n')
+            self.assertTrue(changed.wait(5))
+
+        self.assertEqual(watcher.config, {'application': {'name': 'Other app'}})
+
+    def test_polling(self):
+        self._watch(use_inotify=False)
+
+    @skipIf(not platform.startswith('linux'), 'inotify is only available on Linux')
+    def test_inotify(self):
+        self._watch(use_inotify=True)
+
+    @skipIf(not platform.startswith('linux'), 'inotify is only available on Linux')
+    def test_inotify_watches_directories_created_later(self):
+        self.path = join(self.directory, 'config', 'stormpath.yml')
+        self.loader = ConfigLoader([LoadFileConfigStrategy(self.path)])
+        changed = Event()
+
+        # Files are only polled when inotify is unavailable.
+        with ConfigWatcher(self.loader, interval=0.5, debounce=0.05) as watcher:
+            watcher.subscribe(lambda config, changes: changed.set())
+
+            makedirs(join(self.directory, 'config'))
+            self._write('application:\n  name: Other app\n')
+            self.assertTrue(changed.wait(5))
+
+        self.assertEqual(watcher.config, {'application': {'name': 'Other app'}})
+
+    @skipIf(not platform.startswith('linux'), 'inotify is only available on Linux')
+    def test_inotify_detects_symlink_swaps(self):
+        # The layout of a Kubernetes ConfigMap volume, whose ``..data``
+        # symlink is replaced atomically on updates.
+        for version, name in (('..v1', 'My app'), ('..v2', 'Other app')):
+            makedirs(join(self.directory, version))
+            with open(join(self.directory, version, 'stormpath.yml'), 'w') as f:
+                f.write('application:\n  name: %s\n' % name)
+
+        self.path = join(self.directory, 'config', 'stormpath.yml')
+        makedirs(join(self.directory, 'config'))
+        symlink(join(self.directory, '..v1'), join(self.directory, 'config', '..data'))
+        symlink(join('..data', 'stormpath.yml'), self.path)
+        self.loader = ConfigLoader([LoadFileConfigStrategy(self.path)])
+        changed = Event()
+
+        with ConfigWatcher(self.loader, interval=0.5, debounce=0.05) as watcher:
+            watcher.subscribe(lambda config, changes: changed.set())
+
+            symlink(join(self.directory, '..v2'), join(self.directory, 'config', '..data_tmp'))
+            rename(join(self.directory, 'config', '..data_tmp'), join(self.directory, 'config', '..data'))
+            self.assertTrue(changed.wait(5))
+
+        self.assertEqual(watcher.config, {'application': {'name': 'Other app'}})
+
+    def test_settle_waits_for_the_last_change(self):
+        watcher = ConfigWatcher(self.loader, debounce=0.05)
+        changes = [True, True, True]
+        timeouts = []
+
+        def wait(timeout):
+            timeouts.append(timeout)
+            if changes:
+                return changes.pop()
+
+            sleep(timeout)
+            return False
+
+        start = default_timer()
+        watcher._settle(wait)
+
+        self.assertEqual(len(timeouts), 4)
+        self.assertGreaterEqual(default_timer() - start, 0.05)
+        self.assertGreater(timeouts[-1], 0.04)